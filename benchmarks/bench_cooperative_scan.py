@@ -0,0 +1,80 @@
+"""
+Benchmark the cooperative id scan steps of the id sets tree population
+
+The tree population runs one step at a time from the Qt event loop, so the
+longest step bounds how long the ui is blocked. Reports the steps count,
+the longest step and the total time of utils.iter_id_objects_dict against
+the blocking utils.id_objects_dict, and fails if a step exceeds the budget
+
+Usage: python benchmarks/bench_cooperative_scan.py [chunk size]
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+ID_SETS = ["id%s" % x for x in range(20)]
+
+# Longest step allowed in milliseconds, a 20 Hz ui refresh
+STEP_BUDGET_MS = 50
+
+# Number of object sets hiding a seventh of the objects each
+HIDDEN_SET_COUNT = 5
+
+
+def main():
+    chunk_size = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    print("%8s %10s %8s %14s %10s" % ("objects", "blocking s", "steps",
+                                      "longest ms", "total s"))
+
+    for object_count in (10000, 100000):
+        scene = fake_cmds.build_scene(object_count, ID_SETS)
+        for set_index in range(HIDDEN_SET_COUNT):
+            scene.create_set("hidden%s_SET" % set_index,
+                             ["|geo_GRP|obj%s_GEO" % x
+                              for x in range(set_index, object_count, 7)],
+                             False)
+
+        fake_cmds.install(scene)
+
+        import utils
+
+        start = time.time()
+        utils.id_objects_dict(ID_SETS)
+        blocking_time = time.time() - start
+
+        steps = utils.iter_id_objects_dict(
+            ID_SETS, chunk_size or utils.ID_SCAN_CHUNK_SIZE)
+
+        step_count = 0
+        longest = 0.0
+
+        start = time.time()
+        while True:
+            step_start = time.time()
+            try:
+                next(steps)
+            except StopIteration:
+                break
+
+            step_count += 1
+            longest = max(longest, time.time() - step_start)
+
+        total_time = time.time() - start
+
+        print("%8s %10.3f %8s %14.1f %10.3f" % (object_count, blocking_time,
+                                                step_count, longest * 1000,
+                                                total_time))
+
+        assert longest * 1000 <= STEP_BUDGET_MS, \
+            "longest step over the %s ms budget" % STEP_BUDGET_MS
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark utils.get_layers_aovs on 50 render layers x 40 id aovs
+
+The previous implementation, which queried every layer and aov pair, is
+kept here as a reference for the call counts and wall time
+
+Usage: python benchmarks/bench_get_layers_aovs.py
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+
+def build_scene(layer_count, aov_count):
+    scene = fake_cmds.FakeCmds()
+
+    layers = [scene.create_render_layer("layer%s" % x)
+              for x in range(layer_count)]
+
+    for index in range(aov_count):
+        aov = scene.create_node("aiAOV_id%s" % index, "aiAOV")
+        scene.add_attribute(aov, "enabled", index % 2 == 0)
+        scene.add_attribute(aov, "attr_id", False)
+
+        # Override every third aov on every other layer
+        if index % 3 == 0:
+            for layer in layers[::2]:
+                scene.add_override(layer, "%s.enabled" % aov, True)
+
+    return scene
+
+
+def legacy_get_layers_aovs(cmds):
+    aov_dict = dict()
+
+    render_layers = [x for x in cmds.ls(type="renderLayer")
+                     if "defaultRenderLayer" not in x]
+
+    scene_aovs = [x for x in cmds.ls(type="aiAOV")
+                  if cmds.attributeQuery('attr_id', n=x, exists=True)]
+
+    for render_layer in render_layers:
+        aov_dict[render_layer] = ["beauty"]
+
+        for aov in scene_aovs:
+            layer_overrides = cmds.listConnections("%s.enabled" % aov,
+                                                   plugs=1)
+            value = cmds.getAttr("%s.enabled" % aov)
+
+            if layer_overrides:
+                attribute_plug = False
+                for layer_over in layer_overrides:
+                    if "defaultRenderLayer" == layer_over.split(".")[0]:
+                        attribute_plug = layer_over
+
+                for layer_over in layer_overrides:
+                    if render_layer == layer_over.split(".")[0]:
+                        attribute_plug = layer_over
+
+                if not attribute_plug:
+                    continue
+
+                value = [False, True][int(cmds.getAttr(
+                    attribute_plug.replace("plug", "value")))]
+
+            if value is True:
+                aov_dict[render_layer].append(aov.split("aiAOV_")[-1])
+
+    return aov_dict
+
+
+def measure(function, scene):
+    scene.calls.clear()
+
+    start = time.time()
+    result = function()
+    elapsed = time.time() - start
+
+    return result, elapsed, sum(scene.calls.values())
+
+
+def main():
+    scene = fake_cmds.install(build_scene(50, 40))
+
+    import utils
+
+    legacy = measure(lambda: legacy_get_layers_aovs(scene), scene)
+    batched = measure(utils.get_layers_aovs, scene)
+
+    assert legacy[0] == batched[0], "get_layers_aovs results differ"
+
+    print("50 layers x 40 aovs")
+    print("%10s %10s %8s" % ("", "seconds", "calls"))
+    print("%10s %10.3f %8s" % ("legacy", legacy[1], legacy[2]))
+    print("%10s %10.3f %8s" % ("batched", batched[1], batched[2]))
+
+
+if __name__ == '__main__':
+    main()
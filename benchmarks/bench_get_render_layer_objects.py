@@ -0,0 +1,102 @@
+"""
+Benchmark utils.get_render_layer_objects on large render layers
+
+The layer members hold every transform and its shape, as Maya returns
+them. The previous implementation, which queried every member and deduped
+against a list, is kept here as a reference. It is quadratic so it is only
+run up to LEGACY_LIMIT members
+
+Usage: python benchmarks/bench_get_render_layer_objects.py
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+LEGACY_LIMIT = 20000
+
+
+def build_scene(object_count):
+    scene = fake_cmds.build_scene(object_count, [])
+
+    members = []
+    for transform in scene.layer_members["layer1"]:
+        members.extend([transform, scene.children[transform][0]])
+
+    scene.layer_members["layer1"] = members
+
+    return scene
+
+
+def legacy_get_render_layer_objects(cmds, render_layer):
+    objects_list = cmds.editRenderLayerMembers(render_layer,
+                                               q=True,
+                                               fullNames=True) or []
+
+    layer_objects = list(set(objects_list)) or None
+
+    if layer_objects is None:
+        return False
+
+    layer_transform_nodes = []
+
+    for node in layer_objects:
+        if cmds.nodeType(node) != "transform":
+            transform_node = cmds.listRelatives(node,
+                                                parent=True,
+                                                fullPath=True)
+            if transform_node and \
+                    transform_node[0] not in layer_transform_nodes:
+                layer_transform_nodes.append(transform_node[0])
+        elif node not in layer_transform_nodes:
+            layer_transform_nodes.append(node)
+
+    return layer_transform_nodes
+
+
+def measure(function, scene):
+    scene.calls.clear()
+
+    start = time.time()
+    result = function()
+    elapsed = time.time() - start
+
+    return result, elapsed, sum(scene.calls.values())
+
+
+def main():
+    print("%8s %10s %8s %10s %8s" % ("members", "legacy s", "calls",
+                                     "batched s", "calls"))
+
+    for object_count in (5000, 10000, 25000):
+        scene = fake_cmds.install(build_scene(object_count))
+
+        import utils
+
+        batched = measure(lambda: utils.get_render_layer_objects("layer1"),
+                          scene)
+
+        if object_count * 2 <= LEGACY_LIMIT:
+            legacy = measure(lambda: legacy_get_render_layer_objects(
+                scene, "layer1"), scene)
+
+            assert set(legacy[0]) == set(batched[0]), "results differ"
+
+            legacy = ("%.3f" % legacy[1], legacy[2])
+        else:
+            legacy = ("-", "-")
+
+        print("%8s %10s %8s %10.3f %8s" % (object_count * 2,
+                                           legacy[0],
+                                           legacy[1],
+                                           batched[1],
+                                           batched[2]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark id reassignment per object against a single transaction
+
+Before: utils.set_attribute_id called once per object, each edit being its
+own undo chunk followed by its own refresh
+After: utils.set_attribute_ids inside one utils.id_edit_transaction
+
+Runs inside mayapy when maya.standalone is available, otherwise on the fake
+maya.cmds backend where only the call overhead is measured
+
+Usage: [mayapy|python] benchmarks/bench_id_edit_transaction.py [count]
+
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "id_manager"))
+
+
+def build_maya_scene(object_count):
+    import maya.cmds as cmds
+
+    cmds.file(new=True, force=True)
+
+    objects = [cmds.polyCube(name="obj%s_GEO" % x)[0]
+               for x in range(object_count)]
+    objects = cmds.ls(objects, long=True)
+
+    layer = cmds.createRenderLayer(objects, name="layer1")
+    cmds.editRenderLayerGlobals(currentRenderLayer=layer)
+
+    return objects, None
+
+
+def build_fake_scene(object_count):
+    from tests import fake_cmds
+
+    scene = fake_cmds.install(fake_cmds.build_scene(object_count, []))
+
+    return scene.layer_members["layer1"], scene
+
+
+def main():
+    object_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+
+    try:
+        import maya.standalone
+        maya.standalone.initialize()
+        build_scene = build_maya_scene
+        backend = "maya"
+    except ImportError:
+        build_scene = build_fake_scene
+        backend = "fake"
+
+        from tests import fake_cmds
+        fake_cmds.install()
+
+    import utils
+
+    objects, scene = build_scene(object_count)
+
+    start = time.time()
+    for object_name in objects:
+        utils.set_attribute_id(object_name, "idA", "Red")
+    before = time.time() - start
+    before_calls = dict(scene.calls) if scene else {}
+
+    objects, scene = build_scene(object_count)
+
+    start = time.time()
+    with utils.id_edit_transaction():
+        utils.set_attribute_ids(objects, "idA", "Red")
+    after = time.time() - start
+    after_calls = dict(scene.calls) if scene else {}
+
+    print("%s objects on the %s backend" % (object_count, backend))
+    print("%12s %10s %10s %10s" % ("", "seconds", "undo", "refresh"))
+    print("%12s %10.3f %10s %10s" % ("per object", before,
+                                     before_calls.get("undoInfo", "-"),
+                                     before_calls.get("refresh", "-")))
+    print("%12s %10.3f %10s %10s" % ("transaction", after,
+                                     after_calls.get("undoInfo", "-"),
+                                     after_calls.get("refresh", "-")))
+
+
+if __name__ == '__main__':
+    main()
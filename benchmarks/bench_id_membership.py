@@ -0,0 +1,137 @@
+"""
+Benchmark the memory of the id sets membership on 100k objects x 20 id sets
+
+The previous build_id_dict, which kept a list of object long names per id
+color with every object of an id set listed in one of them, is kept here
+as a reference. The id scan is built in memory so only the id dictionaries
+are measured
+
+Usage: python benchmarks/bench_id_membership.py [object count] [id sets]
+
+"""
+
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+ID_VALUES = [None, None, None, (1, 0, 0), (0, 1, 0), (0, 0, 1), (0, -1, 0)]
+
+
+def build_id_scan(object_count, id_sets):
+    random.seed(0)
+
+    id_scan = dict()
+
+    for index in range(object_count):
+        object_name = "|scene_GRP|chars_GRP|char%s_GRP|body%s_GEO" % (
+            index // 100, index)
+
+        attribute_values = dict()
+        for id_set in id_sets:
+            value = random.choice(ID_VALUES)
+            if value is not None:
+                attribute_values["mtoa_constant_%s" % id_set] = value
+
+        id_scan[object_name] = attribute_values
+
+    return id_scan
+
+
+def legacy_build_id_dict(utils, id_scan, id_sets):
+    id_dict = dict()
+
+    for id_set in id_sets:
+        id_dict[id_set] = {"Red": [],
+                           "Green": [],
+                           "Blue": [],
+                           "Holdout": []
+                           }
+
+        color_attribute = "mtoa_constant_%s" % id_set
+        alpha_attribute = "%s_Alpha" % color_attribute
+
+        for object_name, attribute_values in id_scan.items():
+            id_colors = [utils.get_alpha_id_color(attribute_values.get(
+                             alpha_attribute)),
+                         utils.get_rgb_id_color(attribute_values.get(
+                             color_attribute))]
+
+            id_colors = [x for x in id_colors if x is not None]
+
+            for id_color in id_colors:
+                id_dict[id_set].setdefault(id_color, []).append(object_name)
+
+            if not id_colors:
+                id_dict[id_set]["Holdout"].append(object_name)
+
+    return id_dict
+
+
+def measure(function):
+    """
+
+    :param function: function building an id dictionary
+    :return: the id dictionary, the build time in seconds and the memory
+             it retains in bytes
+    """
+
+    # Time without tracing, tracemalloc slows down every allocation
+    gc.collect()
+    start = time.time()
+    function()
+    elapsed = time.time() - start
+
+    gc.collect()
+    tracemalloc.start()
+
+    id_dict = function()
+
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return id_dict, elapsed, retained
+
+
+def main():
+    object_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    id_set_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    fake_cmds.install()
+
+    import utils
+
+    id_sets = ["id%s" % x for x in range(id_set_count)]
+    id_scan = build_id_scan(object_count, id_sets)
+
+    print("%s objects x %s id sets" % (object_count, id_set_count))
+    print("%10s %10s %10s %12s" % ("", "build s", "MB", "holdout s"))
+
+    for name, function in (("lists", legacy_build_id_dict),
+                           ("bitsets", utils.build_id_dict)):
+        id_dict, elapsed, retained = measure(
+            lambda: function(utils, id_scan, id_sets)
+            if function is legacy_build_id_dict
+            else function(id_scan, id_sets))
+
+        start = time.time()
+        for id_colors in id_dict.values():
+            id_colors["Holdout"]
+        holdout_time = time.time() - start
+
+        print("%10s %10.3f %10.1f %12.3f" % (name, elapsed,
+                                             retained / 1048576.0,
+                                             holdout_time))
+
+        del id_dict
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark utils.id_objects_dict against the scene size
+
+Reports the wall time and the maya.cmds calls made by the id scan on fake
+scenes of growing object counts
+
+Usage: python benchmarks/bench_id_objects_dict.py
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+
+def run(object_count, id_set_count):
+    id_sets = ["id%s" % x for x in range(id_set_count)]
+
+    scene = fake_cmds.install(fake_cmds.build_scene(object_count, id_sets))
+
+    import utils
+
+    scene.calls.clear()
+
+    start = time.time()
+    utils.id_objects_dict(id_sets)
+    elapsed = time.time() - start
+
+    return elapsed, scene.calls
+
+
+def main():
+    print("%8s %8s %10s %8s  %s" % ("objects", "id sets", "seconds",
+                                    "calls", "per command"))
+
+    for object_count in (1000, 5000, 10000):
+        for id_set_count in (1, 12):
+            elapsed, calls = run(object_count, id_set_count)
+            per_command = ", ".join("%s=%s" % x for x in sorted(calls.items()))
+
+            print("%8s %8s %10.3f %8s  %s" % (object_count,
+                                              id_set_count,
+                                              elapsed,
+                                              sum(calls.values()),
+                                              per_command))
+
+
+if __name__ == '__main__':
+    main()
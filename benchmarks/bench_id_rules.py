@@ -0,0 +1,58 @@
+"""
+Benchmark id_rules.apply_rules on large render layers
+
+Matches every layer member against a rules file of glob, regex and set
+rules in dry run mode, then applies the changes
+
+Usage: python benchmarks/bench_id_rules.py
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+RULES = [{"glob": "obj1*_GEO", "id_set": "idA", "color": "Green"},
+         {"regex": r"obj\d*[05]_GEO", "id_set": "idA", "color": "Blue"},
+         {"set": "red_SET", "id_set": "idB", "color": "Red"},
+         {"glob": "*_GEO", "id_set": "idB", "color": "Alpha"}]
+
+
+def main():
+    print("%8s %10s %8s %10s %8s %8s" % ("objects", "dry run s", "calls",
+                                         "apply s", "calls", "changes"))
+
+    for object_count in (1000, 10000, 100000):
+        scene = fake_cmds.install(fake_cmds.build_scene(object_count,
+                                                        ["idA", "idB"]))
+
+        for id_set in ("idA", "idB"):
+            scene.create_node("aiAOV_%s" % id_set, "aiAOV")
+            scene.add_attribute("aiAOV_%s" % id_set, "enabled", False)
+            scene.add_attribute("aiAOV_%s" % id_set, "attr_id", False)
+
+        scene.create_set("red_SET", list(scene.layer_members["layer1"])[::7])
+
+        import id_rules
+
+        timings = []
+        for dry_run in (True, False):
+            scene.calls.clear()
+
+            start = time.time()
+            changes = id_rules.apply_rules(id_rules.IdRules(RULES),
+                                           "layer1",
+                                           dry_run=dry_run)
+            timings.extend([time.time() - start, sum(scene.calls.values())])
+
+        print("%8s %10.3f %8s %10.3f %8s %8s" % tuple([object_count] +
+                                                      timings +
+                                                      [len(changes)]))
+
+
+if __name__ == '__main__':
+    main()
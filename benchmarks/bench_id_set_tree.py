@@ -0,0 +1,123 @@
+"""
+Headless benchmark of the id sets tree build time and peak memory
+
+Compares the IdSetTreeView model against the previous QTreeWidget build,
+which created an item for every object under every id color up front.
+Each variant runs in its own process so the peak memory is not shared
+
+Usage: python benchmarks/bench_id_set_tree.py [object rows]
+
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "id_manager"))
+
+COLORS = ["Red", "Green", "Blue", "Holdout"]
+
+
+def build_id_data(row_count, id_set_count=10):
+    objects_per_set = row_count // id_set_count
+    objects = ["|geo_GRP|obj%s_GEO" % x for x in range(objects_per_set)]
+
+    id_data = dict()
+    for set_index in range(id_set_count):
+        id_dict = dict((x, []) for x in COLORS)
+        for index, object_name in enumerate(objects):
+            color = COLORS[(index + set_index) % len(COLORS)]
+            id_dict[color].append(object_name)
+        id_data["id%s" % set_index] = id_dict
+
+    return id_data
+
+
+def build_legacy(id_data):
+    from PySide import QtGui, QtCore
+
+    tree = QtGui.QTreeWidget()
+    items_dict = dict()
+
+    for id_set, id_dict in sorted(id_data.items()):
+        set_item = QtGui.QTreeWidgetItem(tree)
+        set_item.setText(0, id_set)
+
+        for id_color, id_objects in sorted(id_dict.items()):
+            color_item = QtGui.QTreeWidgetItem(set_item)
+            tree.setItemWidget(color_item, 0,
+                               QtGui.QPushButton(id_color, tree))
+
+            for object_name in id_objects:
+                object_item = QtGui.QTreeWidgetItem(color_item)
+                object_item.setText(0, object_name.split("|")[-1])
+
+                font = QtGui.QFont()
+                font.setPointSize(10)
+                object_item.setFont(0, font)
+                object_item.setData(0, QtCore.Qt.UserRole, "object")
+                object_item.setData(1, QtCore.Qt.UserRole, object_name)
+
+                items_dict.setdefault(object_name, {})[set_item] = object_item
+
+    return tree
+
+
+def build_model(id_data):
+    from tests import fake_cmds
+    fake_cmds.install()
+
+    import id_set_tree
+
+    tree = id_set_tree.IdSetTreeView(None)
+    tree.id_model.set_id_data(id_data)
+
+    return tree
+
+
+def run_variant(variant, row_count):
+    from PySide import QtGui
+
+    app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+    id_data = build_id_data(row_count)
+    base_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.time()
+    tree = {"legacy": build_legacy, "model": build_model}[variant](id_data)
+    app.processEvents()
+    elapsed = time.time() - start
+
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print("%s %.3f %s" % (variant, elapsed, (peak_memory - base_memory) // 1024))
+
+
+def main():
+    if len(sys.argv) > 2:
+        run_variant(sys.argv[1], int(sys.argv[2]))
+        return
+
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+
+    print("%s object rows" % row_count)
+    print("%10s %10s %12s" % ("", "seconds", "peak MB"))
+
+    for variant in ("legacy", "model"):
+        output = subprocess.check_output([sys.executable,
+                                          os.path.abspath(__file__),
+                                          variant,
+                                          str(row_count)],
+                                         env=env)
+        print("%10s %10s %12s" % tuple(output.decode().split()))
+
+
+if __name__ == '__main__':
+    main()
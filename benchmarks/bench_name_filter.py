@@ -0,0 +1,139 @@
+"""
+Benchmark the id sets tree filter on each keystroke
+
+Times the short name index build, then each keystroke of a few filter
+texts typed one character at a time: the index match and the filtering of
+every id color, the first page of the expanded colors and the first object
+of the collapsed ones, as IdSetTreeModel.set_filter does. The model itself
+is timed too when PySide is available
+
+Usage: python benchmarks/bench_name_filter.py [object rows] [id sets]
+
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "id_manager"))
+
+COLORS = ["Red", "Green", "Blue", "Holdout"]
+
+FILTER_TEXTS = ["body12_GEO", "char9", "*_geo", "body1*_GEO", "zzz"]
+
+# Object rows found again for an expanded id color, see
+# id_set_tree.FILTER_FETCH_SIZE
+PAGE_SIZE = 100
+
+
+def build_id_data(row_count, id_set_count):
+    objects_per_set = row_count // id_set_count
+    objects = ["|scene_GRP|chars_GRP|char%s_GRP|body%s_GEO" % (x // 100, x)
+               for x in range(objects_per_set)]
+
+    id_data = dict()
+    for set_index in range(id_set_count):
+        id_dict = dict((x, []) for x in COLORS)
+        for index, object_name in enumerate(objects):
+            color = COLORS[(index + set_index) % len(COLORS)]
+            id_dict[color].append(object_name)
+        id_data["id%s" % set_index] = id_dict
+
+    return id_data
+
+
+def filter_colors(index, text, color_lists):
+    match = index.match(text)
+
+    for position, objects in enumerate(color_lists):
+        # The first id set is expanded
+        match.filter(objects, 0, PAGE_SIZE if position < len(COLORS) else 1)
+
+
+def time_keystrokes(function):
+    """
+
+    :param function: function called with each filter text typed
+    :return: the longest and average keystroke time in milliseconds
+    """
+
+    times = []
+
+    for text in FILTER_TEXTS:
+        for length in range(1, len(text) + 1):
+            start = time.time()
+            function(text[:length])
+            times.append(time.time() - start)
+
+        function("")
+
+    return max(times) * 1000, sum(times) / len(times) * 1000
+
+
+def time_model(id_data):
+    from PySide import QtGui
+
+    app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+    import id_set_tree
+
+    model = id_set_tree.IdSetTreeModel()
+    model.set_id_data(id_data)
+
+    # Populate the first page of the first id set colors
+    set_index = model.index(0, 0)
+    for row in range(model.rowCount(set_index)):
+        model.fetchMore(model.index(row, 0, set_index))
+
+    for _ in model.iter_name_index():
+        pass
+
+    app.processEvents()
+
+    return time_keystrokes(model.set_filter)
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    id_set_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    from tests import fake_cmds
+    fake_cmds.install()
+
+    import name_index
+
+    id_data = build_id_data(row_count, id_set_count)
+
+    color_lists = [id_dict[x] for _, id_dict in sorted(id_data.items())
+                   for x in COLORS]
+
+    object_names = set()
+    for objects in color_lists:
+        object_names.update(objects)
+
+    start = time.time()
+    index = name_index.NameIndex(object_names)
+    index.join_names()
+    build_time = time.time() - start
+
+    print("%s object rows, %s id sets, %s objects" % (row_count, id_set_count,
+                                                      len(object_names)))
+    print("index build %.3f s" % build_time)
+    print("%10s %12s %12s" % ("keystroke", "longest ms", "average ms"))
+
+    print("%10s %12.1f %12.1f" % ((("index",) +
+                                   time_keystrokes(
+                                       lambda x: filter_colors(index, x,
+                                                               color_lists)))))
+
+    try:
+        print("%10s %12.1f %12.1f" % (("model",) + time_model(id_data)))
+    except ImportError as error:
+        print("%10s skipped: %s" % ("model", error))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark the id dialog refresh after creating id aovs
+
+Creates id aovs one at a time on a large scene and refreshes the render
+layers and aovs listed after each creation, as IdDialog._refresh_content
+does. The previous refresh switched to the defaultRenderLayer and back
+before listing the aovs; it is kept here as a reference. The current
+refresh reads the aovs from the aov registry
+
+Offline the scene is a snapshot file, built with 100k objects if not
+given. The snapshot backend switches layers for free, so the comparison
+shows the calls saved. Run with mayapy and --maya on a scene file to time
+the real layer switches
+
+Usage: python benchmarks/bench_refresh.py [scene.snapshot.json.gz]
+       mayapy benchmarks/bench_refresh.py --maya scene.ma
+
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+cmds = None
+
+ID_SETS = ["id%s" % x for x in range(10)]
+
+
+def build_snapshot(object_count, file_path):
+    """
+    Write the snapshot of a fake scene with an id aov per id set
+
+    :param object_count: number of meshes to create
+    :param file_path: the snapshot file path
+    :return:
+    """
+
+    import snapshot
+
+    scene = fake_cmds.build_scene(object_count, ID_SETS)
+
+    for index, id_set in enumerate(ID_SETS):
+        ai_aov = scene.create_node("aiAOV_%s" % id_set, "aiAOV")
+        scene.add_attribute(ai_aov, "enabled", False)
+        scene.add_attribute(ai_aov, "attr_id", False)
+
+        if index % 2 == 0:
+            scene.add_override("layer1", "%s.enabled" % ai_aov, True)
+
+    scene.current_layer = "layer1"
+
+    snapshot.write_snapshot(scene.to_snapshot(), file_path)
+
+    return
+
+
+def refresh(utils):
+    cmds.editRenderLayerGlobals(query=True, currentRenderLayer=True)
+
+    return utils.get_layers_aovs()
+
+
+def legacy_refresh(utils):
+    user_layer = cmds.editRenderLayerGlobals(query=True,
+                                             currentRenderLayer=True)
+
+    cmds.editRenderLayerGlobals(currentRenderLayer="defaultRenderLayer")
+    cmds.editRenderLayerGlobals(currentRenderLayer=user_layer)
+
+    return refresh(utils)
+
+
+def run(scene_path, refresh_function, aov_count, maya):
+    """
+    Open the scene then create and list aov_count id aovs
+
+    :param scene_path: the scene or snapshot file path
+    :param refresh_function: refresh or legacy_refresh
+    :param aov_count: number of id aovs to create
+    :param maya: bool if running in a maya session
+    :return: the wall time in seconds and the cmds calls count per command
+    """
+
+    import utils
+    import aov_registry
+    import cmds_profiler
+
+    cmds.file(scene_path, open=True, force=True)
+
+    registry = aov_registry.registry
+
+    # The snapshot backend has no callbacks, the registry is kept up to
+    # date by create_id_aovs alone
+    if maya:
+        registry.register_callbacks()
+    else:
+        registry.invalidate()
+        registry.tracking = True
+
+    render_layer = cmds.editRenderLayerGlobals(query=True,
+                                               currentRenderLayer=True)
+
+    profiler = cmds_profiler.enable([utils, aov_registry,
+                                     sys.modules[__name__]])
+    profiler.reset()
+
+    try:
+        start = time.time()
+
+        for index in range(aov_count):
+            aov_name = "bench%s" % index
+            utils.create_id_aovs([aov_name], render_layer)
+
+            aov_dict = refresh_function(utils)
+            assert aov_name in aov_dict[render_layer]
+
+        elapsed = time.time() - start
+
+    finally:
+        cmds_profiler.disable()
+
+        if maya:
+            registry.deregister_callbacks()
+        else:
+            registry.tracking = False
+
+    return elapsed, dict((x, y["count"]) for x, y in profiler.commands.items())
+
+
+def main(args=None):
+    global cmds
+
+    parser = argparse.ArgumentParser(description="id dialog refresh")
+    parser.add_argument("scene", nargs="?",
+                        help="scene file, or snapshot file offline")
+    parser.add_argument("--maya", action="store_true",
+                        help="run in a maya standalone session")
+    parser.add_argument("--objects", type=int, default=100000,
+                        help="objects of the snapshot built if no scene")
+    parser.add_argument("--aovs", type=int, default=5,
+                        help="number of id aovs to create")
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+
+    temp_folder = None
+
+    if options.maya:
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+
+        import maya.cmds
+        maya.cmds.loadPlugin("mtoa", quiet=True)
+
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))), "id_manager"))
+    else:
+        fake_cmds.install()
+
+    cmds = sys.modules["maya.cmds"]
+
+    scene_path = options.scene
+    if scene_path is None:
+        temp_folder = tempfile.mkdtemp()
+        scene_path = os.path.join(temp_folder, "scene.snapshot.json")
+        build_snapshot(options.objects, scene_path)
+
+    print("%-16s %9s %14s %8s" % ("refresh", "seconds",
+                                  "layer globals", "calls"))
+
+    try:
+        for name, function in (("layer switch", legacy_refresh),
+                               ("aov registry", refresh)):
+            elapsed, calls = run(scene_path, function, options.aovs,
+                                 options.maya)
+
+            print("%-16s %9.3f %14s %8s" % (name, elapsed,
+                                            calls.get("editRenderLayerGlobals",
+                                                      0),
+                                            sum(calls.values())))
+    finally:
+        if temp_folder is not None:
+            shutil.rmtree(temp_folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Micro-benchmark of the item construction time with shared resources
+
+Builds 50k tree items setting a font and an icon on each, once creating a
+new QFont and QIcon per item as the tree used to, and once using the
+shared instances from the resources module
+
+Usage: python benchmarks/bench_resources.py [item count]
+
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, os.path.join(ROOT, "id_manager"))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide import QtGui
+
+import resources
+
+
+def build_items(item_count, get_font, get_icon):
+    items = []
+
+    start = time.time()
+    for index in range(item_count):
+        item = QtGui.QStandardItem("obj%s_GEO" % index)
+        item.setFont(get_font())
+        item.setIcon(get_icon())
+        items.append(item)
+
+    return time.time() - start
+
+
+def new_font():
+    font = QtGui.QFont()
+    font.setPointSize(10)
+    return font
+
+
+def new_icon():
+    return QtGui.QIcon(os.path.join(resources.ICON_FOLDER, "IdSet.png"))
+
+
+def main():
+    item_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+    per_item = build_items(item_count, new_font, new_icon)
+    shared = build_items(item_count,
+                         lambda: resources.get_font(10),
+                         lambda: resources.get_icon("IdSet.png"))
+
+    print("%s items" % item_count)
+    print("%10s %10s" % ("", "seconds"))
+    print("%10s %10.3f" % ("per item", per_item))
+    print("%10s %10.3f" % ("shared", shared))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark loading scene snapshots
+
+Writes the snapshot of fake scenes with 5 id sets and a render layer
+override per 100 objects, then times reading the file and rebuilding the
+SnapshotCmds scene. Each object is a transform and a shape so the node
+count is twice the object count
+
+Usage: python benchmarks/bench_snapshot.py
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+import snapshot
+
+ID_SETS = ["id%s" % x for x in range(5)]
+
+
+def build_scene(object_count):
+    scene = fake_cmds.build_scene(object_count, ID_SETS)
+
+    for member in scene.layer_members["layer1"][::100]:
+        shape = scene.children[member][0]
+        scene.add_override("layer1", "%s.mtoa_constant_id0" % shape,
+                           [(0, 0, 1)])
+
+    return scene
+
+
+def main():
+    temp_folder = tempfile.mkdtemp()
+
+    print("%8s %8s %10s %10s %10s" % ("nodes", "file", "MB", "read s",
+                                      "load s"))
+
+    try:
+        for object_count in (10000, 50000, 100000):
+            data = build_scene(object_count).to_snapshot()
+
+            for file_name in ("scene.json", "scene.json.gz"):
+                file_path = os.path.join(temp_folder, file_name)
+                snapshot.write_snapshot(data, file_path)
+
+                start = time.time()
+                read_data = snapshot.read_snapshot(file_path)
+                read_time = time.time() - start
+
+                start = time.time()
+                snapshot.SnapshotCmds.from_snapshot(read_data)
+                load_time = time.time() - start
+
+                print("%8s %8s %10.1f %10.3f %10.3f" % (
+                    len(data["names"]),
+                    file_name.split(".")[-1],
+                    os.path.getsize(file_path) / 1024.0 / 1024.0,
+                    read_time,
+                    load_time))
+    finally:
+        shutil.rmtree(temp_folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Benchmark suite of the id manager hot paths
+
+Runs the utils queries and edits, and the id sets tree build, on fake
+scenes of growing object and id set counts. Every case reports its wall
+time, its peak python memory and the maya.cmds calls it made, and is
+compared against the baselines stored in benchmarks/baselines.json:
+
+- more calls to any command than the baseline is a regression
+- a wall time over TIME_TOLERANCE times the baseline is a regression
+- a peak memory over MEMORY_TOLERANCE times the baseline is a regression
+
+The call counts do not depend on the machine so they are checked exactly,
+lower counts are reported so the baselines can be updated. The tree build
+case is skipped when PySide is not available
+
+Usage: python benchmarks/suite.py [--objects 1000 10000] [--id-sets 1 10]
+                                  [--case id_objects_dict] [--update]
+
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fake_cmds
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "baselines.json")
+
+OBJECT_COUNTS = [1000, 10000, 100000]
+ID_SET_COUNTS = [1, 10, 50]
+
+TIME_TOLERANCE = 1.5
+MEMORY_TOLERANCE = 1.25
+
+# Absolute margins so the fast cases do not fail on noise
+TIME_MARGIN = 0.05
+MEMORY_MARGIN = 1024 * 1024
+
+
+def build_scene(object_count, id_sets):
+    """
+    Build a fake scene with an id aov per id set, every other aov being
+    enabled with a render layer override
+
+    :param object_count: number of meshes to create
+    :param id_sets: list of id set names
+    :return: the FakeCmds instance with the scene
+    """
+
+    scene = fake_cmds.build_scene(object_count, id_sets)
+
+    for index, id_set in enumerate(id_sets):
+        ai_aov = scene.create_node("aiAOV_%s" % id_set, "aiAOV")
+        scene.add_attribute(ai_aov, "enabled", False)
+        scene.add_attribute(ai_aov, "attr_id", False)
+
+        if index % 2 == 0:
+            scene.add_override("layer1", "%s.enabled" % ai_aov, True)
+
+    return scene
+
+
+def get_layers_aovs(context):
+    context["utils"].get_layers_aovs()
+
+
+def get_render_layer_objects(context):
+    context["utils"].get_render_layer_objects("layer1")
+
+
+def id_objects_dict(context):
+    context["utils"].id_objects_dict(context["id_sets"])
+
+
+def tree_build(context):
+    context["id_set_tree"].IdSetTreeModel().set_id_data(context["id_dict"])
+
+
+def set_attribute_id(context):
+    for object_name in context["objects"][:100]:
+        context["utils"].set_attribute_id(object_name, context["id_sets"][0],
+                                          "Blue")
+
+
+def set_attribute_ids(context):
+    context["utils"].set_attribute_ids(context["objects"],
+                                       context["id_sets"][-1],
+                                       "Green")
+
+
+# Name, function and whether the case edits the scene
+CASES = [("get_layers_aovs", get_layers_aovs, False),
+         ("get_render_layer_objects", get_render_layer_objects, False),
+         ("id_objects_dict", id_objects_dict, False),
+         ("tree_build", tree_build, False),
+         ("set_attribute_id", set_attribute_id, True),
+         ("set_attribute_ids", set_attribute_ids, True)]
+
+
+def measure(function, context, trace_memory=False):
+    """
+
+    :param function: the case function
+    :param context: the case context dictionary
+    :param trace_memory: bool to trace the memory allocations
+    :return: the wall time in seconds and the peak memory in bytes, None
+             if the memory is not traced
+    """
+
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.time()
+    function(context)
+    elapsed = time.time() - start
+
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def run_scene(object_count, id_set_count, case_names=None):
+    """
+    Run the cases on a scene
+
+    Cases are run twice, the memory tracing slowing the code down: once
+    for the wall time and the calls, once for the peak memory. The scene is
+    restored from a snapshot before each run of the cases editing it
+
+    :param object_count: number of meshes in the scene
+    :param id_set_count: number of id sets in the scene
+    :param case_names: list of the case names to run, all if None
+    :return: dictionary where keys are the case names and values their
+             result dictionary
+    """
+
+    id_sets = ["id%s" % x for x in range(id_set_count)]
+
+    scene = fake_cmds.install(build_scene(object_count, id_sets))
+    snapshot = scene.to_snapshot()
+
+    import utils
+
+    context = {"utils": utils,
+               "id_sets": id_sets,
+               "objects": list(scene.layer_members["layer1"])}
+
+    results = dict()
+
+    for name, function, edits_scene in CASES:
+        if case_names and name not in case_names:
+            continue
+
+        if name == "tree_build":
+            try:
+                import id_set_tree
+            except ImportError as error:
+                results[name] = {"skipped": str(error)}
+                continue
+
+            context["id_set_tree"] = id_set_tree
+            context["id_dict"] = utils.id_objects_dict(id_sets)
+
+        if edits_scene:
+            scene.load_snapshot(snapshot)
+
+        scene.calls.clear()
+        elapsed, _ = measure(function, context)
+        calls = dict(scene.calls)
+
+        peak = None
+        if tracemalloc is not None:
+            if edits_scene:
+                scene.load_snapshot(snapshot)
+
+            _, peak = measure(function, context, trace_memory=True)
+
+        results[name] = {"seconds": elapsed,
+                         "peak_memory": peak,
+                         "calls": calls}
+
+    return results
+
+
+def compare(result, baseline):
+    """
+
+    :param result: the result dictionary of a case
+    :param baseline: the baseline dictionary of the case
+    :return: list of the regressions and list of the improvements found
+             as strings
+    """
+
+    regressions = []
+    improvements = []
+
+    for command in sorted(set(result["calls"]) | set(baseline["calls"])):
+        count = result["calls"].get(command, 0)
+        baseline_count = baseline["calls"].get(command, 0)
+
+        if count > baseline_count:
+            regressions.append("%s calls %s > %s"
+                               % (command, count, baseline_count))
+        elif count < baseline_count:
+            improvements.append("%s calls %s < %s"
+                                % (command, count, baseline_count))
+
+    if result["seconds"] > baseline["seconds"] * TIME_TOLERANCE + TIME_MARGIN:
+        regressions.append("%.3fs > %.3fs" % (result["seconds"],
+                                              baseline["seconds"]))
+
+    if result["peak_memory"] is not None and \
+            baseline.get("peak_memory") is not None and \
+            result["peak_memory"] > baseline["peak_memory"] * \
+            MEMORY_TOLERANCE + MEMORY_MARGIN:
+        regressions.append("peak memory %.1fMB > %.1fMB"
+                           % (result["peak_memory"] / 1048576.0,
+                              baseline["peak_memory"] / 1048576.0))
+
+    return regressions, improvements
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description="id manager benchmarks")
+    parser.add_argument("--objects", type=int, nargs="+",
+                        default=OBJECT_COUNTS)
+    parser.add_argument("--id-sets", type=int, nargs="+",
+                        default=ID_SET_COUNTS)
+    parser.add_argument("--case", action="append", dest="cases",
+                        choices=[x[0] for x in CASES],
+                        help="case to run, all if not given")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--update", action="store_true",
+                        help="store the results as the new baselines")
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_args(sys.argv[1:] if args is None else args)
+
+    baselines = dict()
+    if os.path.exists(options.baselines):
+        with open(options.baselines) as json_file:
+            baselines = json.load(json_file)
+
+    print("%-26s %8s %8s %9s %10s %8s  %s" % ("case", "objects", "id sets",
+                                              "seconds", "peak MB",
+                                              "calls", "status"))
+
+    failed = []
+
+    for object_count in options.objects:
+        for id_set_count in options.id_sets:
+            results = run_scene(object_count, id_set_count, options.cases)
+
+            for name, result in sorted(results.items()):
+                key = "%s:%s:%s" % (name, object_count, id_set_count)
+
+                if "skipped" in result:
+                    print("%-26s %8s %8s  skipped: %s"
+                          % (name, object_count, id_set_count,
+                             result["skipped"]))
+                    continue
+
+                status = "new"
+                if key in baselines and not options.update:
+                    regressions, improvements = compare(result,
+                                                        baselines[key])
+                    if regressions:
+                        status = "REGRESSION " + ", ".join(regressions)
+                        failed.append(key)
+                    elif improvements:
+                        status = "improved " + ", ".join(improvements)
+                    else:
+                        status = "ok"
+
+                if options.update:
+                    baselines[key] = result
+
+                peak = result["peak_memory"]
+
+                print("%-26s %8s %8s %9.3f %10s %8s  %s"
+                      % (name, object_count, id_set_count,
+                         result["seconds"],
+                         "-" if peak is None else "%.1f" % (peak / 1048576.0),
+                         sum(result["calls"].values()),
+                         status))
+
+    if options.update:
+        with open(options.baselines, "w") as json_file:
+            json.dump(baselines, json_file, indent=4, sort_keys=True)
+
+    if failed:
+        print("\n%s regression(s): %s" % (len(failed), ", ".join(failed)))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env mayapy
+"""
+Headless id manager command line tool
+
+Run with mayapy. Each scene file is processed in a worker process with its
+own Maya standalone session
+
+    id_manager-admin.py list shot_*.ma --json ids.json
+    id_manager-admin.py assign --id-set id_face --color Red
+                               --pattern "*_eye_GEO" --layer chars
+                               --save shot_*.ma
+    id_manager-admin.py copy --source ids.json --save shot_*.ma
+    id_manager-admin.py rules --rules rules.json --layer chars --dry-run
+                              shot_*.ma
+    id_manager-admin.py validate shot_*.ma
+    id_manager-admin.py snapshot shot_*.ma
+
+The snapshot operation writes a .snapshot.json.gz file next to each scene.
+With --offline the scene arguments are snapshot files and the operations
+run without Maya
+
+    id_manager-admin.py validate --offline shot_*.snapshot.json.gz
+
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description="Headless id manager")
+
+    sub_parsers = parser.add_subparsers(dest="operation")
+
+    list_parser = sub_parsers.add_parser("list",
+                                         help="list the id sets of scenes")
+    list_parser.add_argument("--id-set", action="append", dest="id_sets",
+                             help="id set to list, all if not given")
+    list_parser.add_argument("--layer", action="append", dest="layers",
+                             help="render layer to list, all if not given")
+
+    assign_parser = sub_parsers.add_parser("assign",
+                                           help="assign an id color to the "
+                                                "objects matching patterns")
+    assign_parser.add_argument("--id-set", required=True)
+    assign_parser.add_argument("--color", required=True,
+                               choices=["Red", "Green", "Blue", "Alpha",
+                                        "Holdout"])
+    assign_parser.add_argument("--pattern", action="append", required=True,
+                               dest="patterns",
+                               help="glob pattern of object short names")
+    assign_parser.add_argument("--layer", required=True)
+
+    copy_parser = sub_parsers.add_parser("copy",
+                                         help="copy the ids of a list "
+                                              "json file to scenes")
+    copy_parser.add_argument("--source", required=True,
+                             help="json file written by the list operation")
+    copy_parser.add_argument("--source-scene",
+                             help="scene of the source file to copy, the "
+                                  "first one if not given")
+
+    rules_parser = sub_parsers.add_parser("rules",
+                                          help="apply an id rules file")
+    rules_parser.add_argument("--rules", required=True,
+                              help="json id rules file")
+    rules_parser.add_argument("--layer", required=True)
+    rules_parser.add_argument("--dry-run", action="store_true",
+                              help="only report the id color changes")
+
+    sub_parsers.add_parser("validate", help="check the id setup of scenes")
+
+    sub_parsers.add_parser("snapshot", help="write the snapshot of scenes")
+
+    for sub_parser in sub_parsers.choices.values():
+        sub_parser.add_argument("scenes", nargs="+", help="scene files")
+        sub_parser.add_argument("--workers", type=int, default=None,
+                                help="number of Maya sessions")
+        sub_parser.add_argument("--json", dest="json_path",
+                                help="write the results to a json file")
+        sub_parser.add_argument("--offline", action="store_true",
+                                help="run on snapshot files without Maya")
+
+    for sub_parser in (assign_parser, copy_parser, rules_parser):
+        sub_parser.add_argument("--save", action="store_true",
+                                help="save the scenes")
+
+    return parser.parse_args(args)
+
+
+def get_operation_kwargs(options):
+    """
+
+    :param options: the parsed command line options
+    :return: dictionary of the operation keyword arguments
+    """
+
+    if options.operation == "list":
+        return {"id_sets": options.id_sets,
+                "render_layers": options.layers}
+
+    if options.operation == "assign":
+        return {"id_set": options.id_set,
+                "id_color": options.color,
+                "patterns": options.patterns,
+                "render_layer": options.layer}
+
+    if options.operation == "copy":
+        with open(options.source) as json_file:
+            results = json.load(json_file)
+
+        source = [x for x in results if "result" in x and
+                  options.source_scene in (None, x["scene"])]
+
+        if not source:
+            raise ValueError("No scene to copy found in %s" % options.source)
+
+        return {"layers_dict": source[0]["result"]}
+
+    if options.operation == "rules":
+        with open(options.rules) as json_file:
+            rules = json.load(json_file)
+
+        return {"rules": rules,
+                "render_layer": options.layer,
+                "dry_run": options.dry_run}
+
+    return dict()
+
+
+def main(args=None):
+    options = parse_args(sys.argv[1:] if args is None else args)
+
+    # Serve maya.cmds from the snapshots before the id manager imports it
+    if options.offline:
+        from id_manager import snapshot
+        snapshot.install()
+
+    # mtoa is imported lazily, only the worker Maya sessions load it
+    from id_manager import batch
+
+    results = batch.process_scenes(options.scenes,
+                                   options.operation,
+                                   get_operation_kwargs(options),
+                                   save=getattr(options, "save", False),
+                                   workers=options.workers,
+                                   offline=options.offline)
+
+    if options.json_path:
+        with open(options.json_path, "w") as json_file:
+            json.dump(results, json_file, indent=4, sort_keys=True)
+
+    failed = [x for x in results if "error" in x]
+
+    for result in results:
+        if "error" in result:
+            print("FAILED %s\n%s" % (result["scene"], result["error"]))
+        elif options.operation == "validate":
+            for issue in result["result"]:
+                print("%s: %s" % (result["scene"], issue))
+        elif options.operation == "rules":
+            for change in result["result"]:
+                print("%s: %s %s %s -> %s" % tuple([result["scene"]] +
+                                                   change))
+        else:
+            print("OK %s" % result["scene"])
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,447 @@
+import collections
+
+import maya.cmds as cmds
+
+
+class AovRegistry(object):
+    """
+    Index of the aiAOV nodes of the scene and of the id aovs among them
+
+    While the node added, removed and renamed callbacks are registered the
+    index is kept up to date and the aov checks are set lookups. Without
+    callbacks, in batch sessions, every query goes to the scene. The aovs
+    are listed in ls order
+
+    Nodes are added with a default name and renamed afterwards so added aovs
+    are kept as MObjectHandles and named on the next query. The attr_id
+    attribute of an aov is checked again when it is added or removed
+
+    """
+
+    def __init__(self):
+        self.tracking = False
+
+        self.scans = 0
+
+        self._aovs = None
+        self._id_aovs = set()
+        self._pending_nodes = []
+        self._pending_aovs = set()
+        self._callbacks = []
+        self._aov_callbacks = dict()
+
+    def rebuild(self):
+        """
+        Scan the scene aovs and their attr_id attribute
+
+        :return:
+        """
+
+        # Ordered set of the aovs, in ls order
+        self._aovs = collections.OrderedDict.fromkeys(
+            cmds.ls(type="aiAOV") or [])
+        self._id_aovs = set()
+        self._pending_nodes = []
+        self._pending_aovs = set(self._aovs)
+
+        self._remove_aov_callbacks(list(self._aov_callbacks))
+        self._register_aov_callbacks(list(self._aovs))
+
+        self._resolve_pending()
+
+        self.scans += 1
+
+        return
+
+    def invalidate(self):
+        """
+        Rescan the scene on the next query
+
+        :return:
+        """
+
+        self._aovs = None
+
+        return
+
+    def _update(self):
+        """
+        Bring the index up to date before a query
+
+        :return:
+        """
+
+        if not self.tracking or self._aovs is None:
+            self.rebuild()
+        elif self._pending_nodes or self._pending_aovs:
+            self._resolve_pending()
+
+        return
+
+    def _resolve_pending(self):
+        """
+        Name the aov nodes added and check their attr_id attribute with
+        a single query
+
+        :return:
+        """
+
+        if self._pending_nodes:
+            import maya.OpenMaya as api
+
+            node_names = []
+            for handle in self._pending_nodes:
+                if handle.isValid():
+                    node_name = api.MFnDependencyNode(handle.object()).name()
+                    self._aovs[node_name] = None
+                    self._pending_aovs.add(node_name)
+                    node_names.append(node_name)
+
+            self._pending_nodes = []
+
+            self._register_aov_callbacks(node_names)
+
+        if self._pending_aovs:
+            id_plugs = cmds.ls(["%s.attr_id" % x for x in self._pending_aovs])
+
+            self._id_aovs.difference_update(self._pending_aovs)
+            self._id_aovs.update(x.split(".")[0] for x in id_plugs or [])
+            self._pending_aovs = set()
+
+        return
+
+    def get_aovs(self):
+        """
+
+        :return: list of the aiAOV nodes of the scene in ls order
+        """
+
+        self._update()
+
+        return list(self._aovs)
+
+    def get_id_aovs(self):
+        """
+
+        :return: list of the aiAOV nodes tagged with attr_id in ls order
+        """
+
+        self._update()
+
+        return [x for x in self._aovs if x in self._id_aovs]
+
+    def exists(self, ai_aov):
+        """
+
+        :param ai_aov: the aiAOV node name as a string
+        :return: True if the aov node exists
+        """
+
+        if not self.tracking:
+            return bool(cmds.ls(ai_aov, type="aiAOV"))
+
+        self._update()
+
+        return ai_aov in self._aovs
+
+    def is_id_aov(self, ai_aov):
+        """
+
+        :param ai_aov: the aiAOV node name as a string
+        :return: True if the aov node has the attr_id attribute
+        """
+
+        if not self.tracking:
+            return cmds.objExists("%s.attr_id" % ai_aov)
+
+        self._update()
+
+        return ai_aov in self._id_aovs
+
+    def aovs_status(self, ai_aovs):
+        """
+        Check several aovs at once
+
+        :param ai_aovs: list of aiAOV node names
+        :return: dictionary where keys are the aovs and values None if the
+                 aov does not exist, True if it is an id aov else False
+        """
+
+        self._update()
+
+        status = dict()
+        for ai_aov in ai_aovs:
+            if ai_aov not in self._aovs:
+                status[ai_aov] = None
+            else:
+                status[ai_aov] = ai_aov in self._id_aovs
+
+        return status
+
+    def add(self, ai_aov, id_aov=False):
+        """
+        Record an aov created by the id manager
+
+        :param ai_aov: the aiAOV node name as a string
+        :param id_aov: bool if the aov has the attr_id attribute
+        :return:
+        """
+
+        if self._aovs is None:
+            return
+
+        self._aovs[ai_aov] = None
+
+        if id_aov:
+            self._id_aovs.add(ai_aov)
+        else:
+            self._pending_aovs.add(ai_aov)
+
+        return
+
+    def remove(self, ai_aov):
+        """
+
+        :param ai_aov: the aiAOV node name as a string
+        :return:
+        """
+
+        if self._aovs is None:
+            return
+
+        self._aovs.pop(ai_aov, None)
+        self._id_aovs.discard(ai_aov)
+        self._pending_aovs.discard(ai_aov)
+
+        self._remove_aov_callbacks([ai_aov])
+
+        return
+
+    def rename(self, ai_aov, new_name):
+        """
+        Record the new name of an aov, keeping its ls order
+
+        :param ai_aov: the previous aiAOV node name as a string
+        :param new_name: the new aiAOV node name as a string
+        :return:
+        """
+
+        if self._aovs is None or ai_aov not in self._aovs:
+            return
+
+        self._aovs = collections.OrderedDict(
+            (new_name if x == ai_aov else x, None) for x in self._aovs)
+
+        for aovs in (self._id_aovs, self._pending_aovs):
+            if ai_aov in aovs:
+                aovs.discard(ai_aov)
+                aovs.add(new_name)
+
+        if ai_aov in self._aov_callbacks:
+            self._aov_callbacks[new_name] = self._aov_callbacks.pop(ai_aov)
+
+        return
+
+    def check_id_attribute(self, ai_aov):
+        """
+        Check the attr_id attribute of an aov again on the next query
+
+        :param ai_aov: the aiAOV node name as a string
+        :return:
+        """
+
+        if self._aovs is None or ai_aov not in self._aovs:
+            return
+
+        self._pending_aovs.add(ai_aov)
+
+        return
+
+    def _node_added_callback(self, node, *args):
+        """
+
+        :param node: the MObject of the aiAOV added
+        :param args:
+        :return:
+        """
+
+        import maya.OpenMaya as api
+
+        self._pending_nodes.append(api.MObjectHandle(node))
+
+        return
+
+    def _node_removed_callback(self, node, *args):
+        """
+
+        :param node: the MObject of the aiAOV removed
+        :param args:
+        :return:
+        """
+
+        import maya.OpenMaya as api
+
+        self.remove(api.MFnDependencyNode(node).name())
+
+        return
+
+    def _name_changed_callback(self, node, previous_name, *args):
+        """
+
+        :param node: the MObject renamed
+        :param previous_name: the node name before the change
+        :param args:
+        :return:
+        """
+
+        import maya.OpenMaya as api
+
+        node_fn = api.MFnDependencyNode(node)
+
+        if node_fn.typeName() == "aiAOV":
+            self.rename(previous_name, node_fn.name())
+
+        return
+
+    def _attribute_changed_callback(self, msg, plug, other_plug, *args):
+        """
+        Check the attr_id attribute again when it is added or removed
+
+        :param msg: the attribute message type
+        :param plug: the MPlug changed
+        :param other_plug: the other MPlug of a connection message
+        :param args:
+        :return:
+        """
+
+        import maya.OpenMaya as api
+
+        if not msg & (api.MNodeMessage.kAttributeAdded |
+                      api.MNodeMessage.kAttributeRemoved):
+            return
+
+        if plug.partialName(False, False, False, False, False,
+                            True) != "attr_id":
+            return
+
+        self.check_id_attribute(api.MFnDependencyNode(plug.node()).name())
+
+        return
+
+    def _register_aov_callbacks(self, ai_aovs):
+        """
+        Watch the attributes of aovs while the callbacks are registered
+
+        :param ai_aovs: list of aiAOV node names
+        :return:
+        """
+
+        if not self._callbacks:
+            return
+
+        import maya.OpenMaya as api
+
+        for ai_aov in ai_aovs:
+            if ai_aov in self._aov_callbacks:
+                continue
+
+            selection_list = api.MSelectionList()
+            node = api.MObject()
+
+            try:
+                selection_list.add(ai_aov)
+                selection_list.getDependNode(0, node)
+            except RuntimeError:
+                continue
+
+            self._aov_callbacks[ai_aov] = api.MNodeMessage.\
+                addAttributeChangedCallback(node,
+                                            self._attribute_changed_callback)
+
+        return
+
+    def _remove_aov_callbacks(self, ai_aovs):
+        """
+
+        :param ai_aovs: list of aiAOV node names
+        :return:
+        """
+
+        callbacks = [self._aov_callbacks.pop(x) for x in ai_aovs
+                     if x in self._aov_callbacks]
+
+        if not callbacks:
+            return
+
+        import maya.OpenMaya as api
+
+        for callback in callbacks:
+            api.MMessage.removeCallback(callback)
+
+        return
+
+    def _scene_changed_callback(self, *args):
+        """
+        Rescan the aovs of a new or opened scene on the next query
+
+        :param args:
+        :return:
+        """
+
+        self.invalidate()
+
+        return
+
+    def register_callbacks(self):
+        """
+        Register the maya callbacks keeping the index up to date
+
+        :return:
+        """
+
+        if self.tracking:
+            return
+
+        import maya.OpenMaya as api
+
+        self._callbacks = [
+            api.MDGMessage.addNodeAddedCallback(self._node_added_callback,
+                                                "aiAOV"),
+            api.MDGMessage.addNodeRemovedCallback(self._node_removed_callback,
+                                                  "aiAOV"),
+            api.MNodeMessage.addNameChangedCallback(
+                api.MObject(), self._name_changed_callback),
+            api.MSceneMessage.addCallback(api.MSceneMessage.kAfterOpen,
+                                          self._scene_changed_callback),
+            api.MSceneMessage.addCallback(api.MSceneMessage.kAfterNew,
+                                          self._scene_changed_callback)]
+
+        self.invalidate()
+        self.tracking = True
+
+        return
+
+    def deregister_callbacks(self):
+        """
+
+        :return:
+        """
+
+        if not self.tracking:
+            return
+
+        import maya.OpenMaya as api
+
+        self._remove_aov_callbacks(list(self._aov_callbacks))
+
+        for callback in self._callbacks:
+            api.MMessage.removeCallback(callback)
+
+        self._callbacks = []
+        self.tracking = False
+
+        return
+
+
+# Registry shared by the id manager modules
+registry = AovRegistry()
@@ -0,0 +1,284 @@
+"""
+Headless id operations over scene files
+
+Every operation runs on the scene currently open and returns a json
+friendly result. process_scenes opens each scene file in a pool of worker
+processes, each worker running its own Maya standalone session
+
+"""
+
+import collections
+import fnmatch
+import multiprocessing
+import os
+import traceback
+
+import maya.cmds as cmds
+
+import utils
+import id_report
+import id_rules
+import id_membership
+import snapshot
+
+
+# Valid id values of the color and alpha id attributes
+ID_VALUES = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1),
+             (-1, 0, 0), (0, -1, 0), (0, 0, -1),
+             (1, 1, 1), (-1, -1, -1)]
+
+
+def list_ids(id_sets=None, render_layers=None):
+    """
+
+    :param id_sets: a list of aov names, all the id aovs if None
+    :param render_layers: a list of render layer names, all if None
+    :return: dictionary where keys are the render layers and values the
+             id_objects_dict result for the layer, as plain dictionaries
+    """
+
+    layers_dict = id_report.layers_id_dict(id_sets, render_layers)
+
+    return dict((x, id_membership.to_dict(y))
+                for x, y in layers_dict.items())
+
+
+def assign_ids(id_set, id_color, patterns, render_layer):
+    """
+    Assign an id color to the render layer members matching name patterns
+
+    :param id_set: the name of an aov as a string
+    :param id_color: the name of an aov's rgb color as a string
+    :param patterns: list of glob patterns matched against the object
+                     short names
+    :param render_layer: the render layer name as a string
+    :return: dictionary of the objects and their set_attribute_ids result
+    """
+
+    with utils.keep_render_layer():
+        cmds.editRenderLayerGlobals(currentRenderLayer=render_layer)
+
+        utils.create_id_aov(id_set, render_layer)
+
+        layer_objects = utils.get_render_layer_objects(render_layer) or []
+
+        objects = [x for x in layer_objects
+                   if any(fnmatch.fnmatchcase(utils.get_object_short_name(x),
+                                              y)
+                          for y in patterns)]
+
+        return utils.set_attribute_ids(objects, id_set, id_color)
+
+
+def copy_ids(layers_dict):
+    """
+    Apply the id colors of a list_ids result to the open scene
+    Render layers and objects missing from the scene are skipped
+
+    :param layers_dict: the list_ids result to copy
+    :return: dictionary where keys are the render layers and values the
+             number of objects assigned per id set
+    """
+
+    scene_layers = set(cmds.ls(type="renderLayer"))
+
+    copied = dict()
+
+    with utils.keep_render_layer():
+        for render_layer, id_dict in sorted(layers_dict.items()):
+            if render_layer not in scene_layers:
+                continue
+
+            cmds.editRenderLayerGlobals(currentRenderLayer=render_layer)
+
+            copied[render_layer] = _copy_layer_ids(id_dict, render_layer)
+
+    return copied
+
+
+def _copy_layer_ids(id_dict, render_layer):
+    """
+    Apply the id colors of a render layer on the current layer
+
+    An object can be listed under an rgb color and an alpha color, the
+    color and alpha values of each object are written at once
+
+    :param id_dict: the id sets of the render layer in the list_ids result
+    :param render_layer: the render layer name as a string
+    :return: dictionary of the number of objects assigned per id set
+    """
+
+    copied = dict()
+
+    utils.create_id_aovs(sorted(id_dict), render_layer)
+
+    for id_set, id_colors in sorted(id_dict.items()):
+        copied[id_set] = 0
+
+        object_colors = collections.OrderedDict()
+        for id_color, objects in sorted(id_colors.items()):
+            for object_name in objects:
+                object_colors.setdefault(object_name, []).append(id_color)
+
+        # The objects sharing their id values are written together
+        value_objects = collections.OrderedDict()
+        for object_name, object_id_colors in object_colors.items():
+            if not utils.object_exists(object_name):
+                continue
+
+            value_objects.setdefault(utils.get_id_values(object_id_colors),
+                                     []).append(object_name)
+
+        for (color_value, alpha_value), objects in value_objects.items():
+            report = utils.set_attribute_values(objects, id_set, color_value,
+                                                alpha_value)
+
+            copied[id_set] += len([x for x in report.values()
+                                   if x != "skipped"])
+
+    return copied
+
+
+def apply_rules(rules, render_layer, dry_run=False):
+    """
+
+    :param rules: the list of id rules
+    :param render_layer: the render layer name as a string
+    :param dry_run: bool to only report the changes
+    :return: list of the id color changes of the rules
+    """
+
+    changes = id_rules.apply_rules(id_rules.IdRules(rules),
+                                   render_layer,
+                                   dry_run=dry_run)
+
+    return [list(x) for x in changes]
+
+
+def validate_ids():
+    """
+    Check the id setup of the open scene
+
+    :return: list of the issues found as strings
+    """
+
+    issues = []
+
+    id_aovs = utils.get_id_aovs()
+    id_sets = [x.split("aiAOV_")[-1] for x in id_aovs]
+
+    for ai_aov in id_aovs:
+        if not cmds.listConnections("%s.defaultValue" % ai_aov):
+            issues.append("%s has no id shader connected" % ai_aov)
+
+    render_layers = [x for x in cmds.ls(type="renderLayer")
+                     if "defaultRenderLayer" not in x]
+
+    scene_objects = []
+    for render_layer in render_layers:
+        scene_objects.extend(utils.get_render_layer_objects(render_layer)
+                             or [])
+
+    id_scan = utils.scan_id_objects(list(set(scene_objects)), id_sets)
+
+    for object_name, attribute_values in sorted(id_scan.items()):
+        for attribute, value in sorted(attribute_values.items()):
+            if tuple(value) not in ID_VALUES:
+                issues.append("%s.%s has an invalid id value %s"
+                              % (object_name, attribute, tuple(value)))
+
+    return issues
+
+
+def write_snapshot():
+    """
+    Write the snapshot of the open scene next to the scene file
+
+    :return: the snapshot file path
+    """
+
+    scene_path = cmds.file(q=True, sceneName=True)
+    file_path = "%s.snapshot.json.gz" % os.path.splitext(scene_path)[0]
+
+    snapshot.write_snapshot(snapshot.capture_snapshot(), file_path)
+
+    return file_path
+
+
+OPERATIONS = {"list": list_ids,
+              "assign": assign_ids,
+              "copy": copy_ids,
+              "rules": apply_rules,
+              "snapshot": write_snapshot,
+              "validate": validate_ids}
+
+
+def initialize_maya():
+    """
+    Start the Maya standalone session of a worker process
+
+    :return:
+    """
+
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+    cmds.loadPlugin("mtoa", quiet=True)
+
+    return
+
+
+def run_operation(job):
+    """
+    Open a scene and run an operation on it
+
+    :param job: tuple of the scene path, the operation name, the operation
+                keyword arguments and a bool to save the scene
+    :return: dictionary with the scene path and the operation result or
+             the error raised
+    """
+
+    scene_path, operation, kwargs, save = job
+
+    try:
+        cmds.file(scene_path, open=True, force=True)
+
+        result = OPERATIONS[operation](**kwargs)
+
+        if save:
+            cmds.file(save=True, force=True)
+
+        return {"scene": scene_path, "result": result}
+
+    except Exception:
+        return {"scene": scene_path, "error": traceback.format_exc()}
+
+
+def process_scenes(scene_paths, operation, kwargs=None, save=False,
+                   workers=None, offline=False):
+    """
+    Run an operation on several scene files with a pool of Maya sessions
+
+    :param scene_paths: list of scene file paths
+    :param operation: the operation name as a string
+    :param kwargs: dictionary of the operation keyword arguments
+    :param save: bool to save the scenes after the operation
+    :param workers: number of worker processes, the cpu count if None
+    :param offline: bool to run on snapshot files in this process, the
+                    snapshot backend must be installed as maya.cmds
+    :return: list of the run_operation results in scene order
+    """
+
+    jobs = [(x, operation, kwargs or dict(), save) for x in scene_paths]
+
+    if offline:
+        return [run_operation(x) for x in jobs]
+
+    pool = multiprocessing.Pool(processes=workers,
+                                initializer=initialize_maya)
+
+    try:
+        return pool.map(run_operation, jobs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,274 @@
+"""
+Opt-in profiling of the maya.cmds calls of the id manager
+
+enable swaps the cmds global of the given modules for a CmdsProfiler which
+times every command and records it per command and per call site, along
+with the arguments of the slowest calls. disable puts the real cmds module
+back so profiling costs nothing when it is off
+
+    cmds_profiler.enable([utils, main_ui_content])
+    ...
+    cmds_profiler.get_profiler().dump("/tmp/id_manager_profile.txt")
+    cmds_profiler.disable()
+
+"""
+
+import json
+import os
+import sys
+import time
+
+# Highest resolution clock available
+timer = getattr(time, "perf_counter", time.time)
+
+# Number of slowest calls kept per command and call site
+SLOWEST_COUNT = 5
+
+# Longest argument description kept for a slow call
+ARGS_MAX_LENGTH = 200
+
+_profiler = None
+_original_cmds = dict()
+
+
+class CmdsProfiler(object):
+    """
+    Proxy of the maya.cmds module recording the latency of every call
+
+    """
+
+    def __init__(self, cmds_module):
+        self._cmds = cmds_module
+
+        self.commands = dict()
+        self.call_sites = dict()
+
+    def __getattr__(self, name):
+        command = getattr(self._cmds, name)
+
+        if not callable(command):
+            return command
+
+        def profiled_command(*args, **kwargs):
+            frame = sys._getframe(1)
+            code = frame.f_code
+            call_site = "%s:%s %s" % (os.path.basename(code.co_filename),
+                                      frame.f_lineno,
+                                      code.co_name)
+
+            start = timer()
+            try:
+                return command(*args, **kwargs)
+            finally:
+                self._record(name, call_site, timer() - start, args, kwargs)
+
+        # Cache the wrapper so the next lookups skip __getattr__
+        setattr(self, name, profiled_command)
+
+        return profiled_command
+
+    def _record(self, name, call_site, duration, args, kwargs):
+        """
+
+        :param name: the command name as a string
+        :param call_site: the file, line and function of the call
+        :param duration: the call duration in seconds
+        :param args: the positional arguments of the call
+        :param kwargs: the keyword arguments of the call
+        :return:
+        """
+
+        for stats_dict, key in ((self.commands, name),
+                                (self.call_sites, (name, call_site))):
+            stats = stats_dict.get(key)
+            if stats is None:
+                stats = {"count": 0, "total": 0.0, "max": 0.0, "slowest": []}
+                stats_dict[key] = stats
+
+            stats["count"] += 1
+            stats["total"] += duration
+
+            if duration > stats["max"]:
+                stats["max"] = duration
+
+            # Only describe the arguments of the calls kept
+            slowest = stats["slowest"]
+            if len(slowest) < SLOWEST_COUNT or duration > slowest[-1][0]:
+                slowest.append((duration, format_args(args, kwargs)))
+                slowest.sort(key=lambda x: x[0], reverse=True)
+                del slowest[SLOWEST_COUNT:]
+
+        return
+
+    def reset(self):
+        """
+        Clear the recorded calls
+
+        :return:
+        """
+
+        self.commands = dict()
+        self.call_sites = dict()
+
+        return
+
+    def report(self):
+        """
+
+        :return: dictionary with the list of the command and call site
+                 stats, sorted by total time
+        """
+
+        commands = []
+        for name, stats in self.commands.items():
+            commands.append(dict(stats, command=name))
+
+        call_sites = []
+        for (name, call_site), stats in self.call_sites.items():
+            call_sites.append(dict(stats, command=name, call_site=call_site))
+
+        return {"commands": sorted(commands, key=lambda x: x["total"],
+                                   reverse=True),
+                "call_sites": sorted(call_sites, key=lambda x: x["total"],
+                                     reverse=True)}
+
+    def format_report(self):
+        """
+
+        :return: the report as a text table
+        """
+
+        report = self.report()
+
+        lines = ["%-28s %8s %10s %10s" % ("command", "count", "total ms",
+                                          "max ms")]
+
+        for stats in report["commands"]:
+            lines.append("%-28s %8s %10.2f %10.2f" % (stats["command"],
+                                                      stats["count"],
+                                                      stats["total"] * 1000,
+                                                      stats["max"] * 1000))
+
+        lines.extend(["", "%-28s %-40s %8s %10s %10s" % ("command",
+                                                         "call site",
+                                                         "count",
+                                                         "total ms",
+                                                         "max ms")])
+
+        for stats in report["call_sites"]:
+            lines.append("%-28s %-40s %8s %10.2f %10.2f"
+                         % (stats["command"], stats["call_site"],
+                            stats["count"], stats["total"] * 1000,
+                            stats["max"] * 1000))
+
+        lines.extend(["", "slowest calls"])
+
+        for stats in report["commands"]:
+            for duration, args in stats["slowest"]:
+                lines.append("%10.2f ms %s(%s)" % (duration * 1000,
+                                                   stats["command"],
+                                                   args))
+
+        return "\n".join(lines)
+
+    def dump(self, file_path):
+        """
+        Write the report to a file, as json if the path ends with .json
+
+        :param file_path: the report file path as a string
+        :return:
+        """
+
+        with open(file_path, "w") as report_file:
+            if file_path.endswith(".json"):
+                json.dump(self.report(), report_file, indent=4)
+            else:
+                report_file.write(self.format_report())
+
+        return
+
+
+def format_args(args, kwargs):
+    """
+    Describe the arguments of a call, long lists being shortened
+
+    :param args: the positional arguments of the call
+    :param kwargs: the keyword arguments of the call
+    :return: the arguments as a string
+    """
+
+    values = []
+
+    for value in list(args) + [kwargs[x] for x in sorted(kwargs)]:
+        if isinstance(value, (list, tuple)) and len(value) > 3:
+            values.append("[%s, ... %s items]"
+                          % (", ".join(repr(x) for x in value[:3]),
+                             len(value)))
+        else:
+            values.append(repr(value))
+
+    names = [""] * len(args) + ["%s=" % x for x in sorted(kwargs)]
+
+    description = ", ".join("%s%s" % x for x in zip(names, values))
+
+    if len(description) > ARGS_MAX_LENGTH:
+        description = description[:ARGS_MAX_LENGTH - 3] + "..."
+
+    return description
+
+
+def enable(modules):
+    """
+    Profile the cmds calls of modules, a new profiler is started if no
+    modules are profiled yet
+
+    :param modules: list of modules importing maya.cmds as cmds
+    :return: the CmdsProfiler recording the calls
+    """
+
+    global _profiler
+
+    for module in modules:
+        if module.__name__ in _original_cmds:
+            continue
+
+        if not _original_cmds:
+            _profiler = CmdsProfiler(module.cmds)
+
+        _original_cmds[module.__name__] = (module, module.cmds)
+        module.cmds = _profiler
+
+    return _profiler
+
+
+def disable():
+    """
+    Restore the cmds module of the profiled modules
+
+    :return:
+    """
+
+    for module, cmds_module in _original_cmds.values():
+        module.cmds = cmds_module
+
+    _original_cmds.clear()
+
+    return
+
+
+def is_enabled():
+    """
+
+    :return: True if some modules are profiled
+    """
+
+    return bool(_original_cmds)
+
+
+def get_profiler():
+    """
+
+    :return: the CmdsProfiler, None if profiling was never enabled
+    """
+
+    return _profiler
@@ -0,0 +1,352 @@
+import collections
+
+import maya.cmds as cmds
+
+import utils
+import id_membership
+
+
+class IdCache(object):
+    """
+    Per render layer cache of the id sets membership
+
+    Keeps the id scan of the most recently used render layers so rebuilding
+    the id sets tree does not rescan the scene. Nodes reported as dirty are
+    rescanned on the next lookup, every other object is served from memory
+
+    """
+
+    def __init__(self, max_layers=4):
+        self.max_layers = max_layers
+
+        self.hits = 0
+        self.misses = 0
+        self.dirty_refreshes = 0
+
+        self._layers = collections.OrderedDict()
+
+    def id_objects_dict(self, id_sets, render_layer=None):
+        """
+        Cached version of utils.id_objects_dict
+
+        :param id_sets: a list of aov names
+        :param render_layer: the render layer name, the current layer if None
+        :return: dictionary for each aov, their id rgba entries, and the
+                 objects added to each rgb entry
+        """
+
+        if render_layer is None:
+            render_layer = cmds.editRenderLayerGlobals(currentRenderLayer=True,
+                                                       query=True)
+
+        layer_cache = self._get_layer_cache(render_layer)
+
+        if layer_cache["dirty"]:
+            self._refresh_dirty_objects(layer_cache)
+
+        missing_id_sets = [x for x in id_sets
+                           if x not in layer_cache["id_sets"]]
+
+        if missing_id_sets:
+            self._scan_id_sets(layer_cache, missing_id_sets)
+
+        id_dict = dict()
+        for id_set in id_sets:
+            if id_set in layer_cache["id_dicts"]:
+                self.hits += 1
+            else:
+                self.misses += 1
+                layer_cache["id_dicts"].update(
+                    utils.build_id_dict(layer_cache["scan"], [id_set],
+                                        layer_cache["table"]))
+
+            id_dict[id_set] = layer_cache["id_dicts"][id_set]
+
+        return id_dict
+
+    def iter_id_objects_dict(self, id_sets, render_layer=None,
+                             chunk_size=utils.ID_SCAN_CHUNK_SIZE):
+        """
+        Cooperative version of id_objects_dict, the id sets missing from
+        the cache are scanned in chunks, see utils.iter_id_scan
+
+        :param id_sets: a list of aov names
+        :param render_layer: the render layer name, the current layer if None
+        :param chunk_size: number of objects read per step
+        :return: generator of the utils.iter_id_scan steps, the cached id
+                 sets being given first
+        """
+
+        if render_layer is None:
+            render_layer = cmds.editRenderLayerGlobals(currentRenderLayer=True,
+                                                       query=True)
+
+        layer_cache = self._layers.get(render_layer)
+
+        # Resolve the members of a new layer in chunks
+        if layer_cache is None:
+            members = []
+            for step in utils.iter_render_layer_objects(render_layer,
+                                                        members,
+                                                        chunk_size):
+                yield step
+
+            objects = []
+            for step in utils.iter_visible_objects(members, objects,
+                                                   chunk_size):
+                yield step
+
+            layer_cache = new_layer_cache(members, objects)
+
+        self._add_layer_cache(render_layer, layer_cache)
+
+        if layer_cache["dirty"]:
+            self._refresh_dirty_objects(layer_cache)
+
+        yield 0, 0, None, None
+
+        missing_id_sets = []
+
+        for id_set in id_sets:
+            if id_set in layer_cache["id_dicts"]:
+                self.hits += 1
+            elif id_set in layer_cache["id_sets"]:
+                # Rebuild the id colors from the cached values in chunks
+                self.misses += 1
+
+                id_colors = id_membership.IdSetMembership(
+                    layer_cache["table"])
+                objects = list(layer_cache["scan"])
+
+                for start in range(0, len(objects), chunk_size):
+                    utils.add_id_colors(id_colors, id_set,
+                                        objects[start:start + chunk_size],
+                                        layer_cache["scan"])
+                    yield 0, 0, None, None
+
+                layer_cache["id_dicts"][id_set] = id_colors
+            else:
+                missing_id_sets.append(id_set)
+                continue
+
+            yield 0, 0, id_set, layer_cache["id_dicts"][id_set]
+
+        if not missing_id_sets:
+            return
+
+        id_shape_nodes = collections.OrderedDict()
+        for step in utils.iter_id_shape_nodes(layer_cache["objects"],
+                                              id_shape_nodes, chunk_size):
+            yield step
+
+        # The values are read straight into the layer scan, the id sets are
+        # only flagged as cached once complete
+        for scanned, total, id_set, id_colors in utils.iter_id_scan(
+                layer_cache["scan"], id_shape_nodes, missing_id_sets,
+                chunk_size, layer_cache["table"]):
+            if id_set is not None:
+                self.misses += 1
+
+                layer_cache["id_sets"].add(id_set)
+                layer_cache["id_dicts"][id_set] = id_colors
+
+            yield scanned, total, id_set, id_colors
+
+    def mark_dirty(self, nodes):
+        """
+        Flag nodes to be rescanned on every cached render layer
+
+        :param nodes: list of node long names, transforms or shapes
+        :return:
+        """
+
+        for layer_cache in self._layers.values():
+            members = layer_cache["members"]
+
+            for node in nodes:
+                # Walk up the dag path until we find a layer member
+                while node and node not in members:
+                    if "|" not in node:
+                        node = None
+                        break
+
+                    node = node.rsplit("|", 1)[0]
+
+                if node:
+                    layer_cache["dirty"].add(node)
+
+        return
+
+    def invalidate_nodes(self, nodes):
+        """
+        Drop the cache of the render layers whose members dag paths change
+        when nodes are renamed or reparented. Nodes below a member are only
+        flagged as dirty
+
+        :param nodes: list of the node long names before the change
+        :return:
+        """
+
+        for render_layer, layer_cache in list(self._layers.items()):
+            # Members and the dag parents of members
+            paths = layer_cache["paths"]
+
+            if any(x in paths for x in nodes):
+                del self._layers[render_layer]
+
+        self.mark_dirty(nodes)
+
+        return
+
+    def members(self):
+        """
+
+        :return: set of the members of every cached render layer
+        """
+
+        members = set()
+        for layer_cache in self._layers.values():
+            members.update(layer_cache["members"])
+
+        return members
+
+    def invalidate(self, render_layer=None):
+        """
+        Drop the cache of a render layer, or of all layers if None
+
+        :param render_layer: the render layer name as a string
+        :return:
+        """
+
+        if render_layer is None:
+            self._layers.clear()
+        else:
+            self._layers.pop(render_layer, None)
+
+        return
+
+    def stats(self):
+        """
+
+        :return: dictionary with the cache counters
+        """
+
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "dirty_refreshes": self.dirty_refreshes,
+                "layers": list(self._layers)}
+
+    def _get_layer_cache(self, render_layer):
+        """
+        Get the cache of a render layer, scanning its members if not cached
+
+        :param render_layer: the render layer name as a string
+        :return: the render layer cache dictionary
+        """
+
+        layer_cache = self._layers.get(render_layer)
+
+        if layer_cache is None:
+            members = utils.get_render_layer_objects(render_layer) or []
+
+            layer_cache = new_layer_cache(members,
+                                          utils.get_visible_objects(members))
+
+        self._add_layer_cache(render_layer, layer_cache)
+
+        return layer_cache
+
+    def _add_layer_cache(self, render_layer, layer_cache):
+        """
+        Store a render layer cache as the most recently used
+
+        :param render_layer: the render layer name as a string
+        :param layer_cache: the render layer cache dictionary
+        :return:
+        """
+
+        self._layers.pop(render_layer, None)
+
+        # Keep the most recently used layers at the end
+        self._layers[render_layer] = layer_cache
+
+        while len(self._layers) > self.max_layers:
+            self._layers.popitem(last=False)
+
+        return
+
+    def _scan_id_sets(self, layer_cache, id_sets):
+        """
+        Add the values of new id sets to a render layer cache
+
+        :param layer_cache: the render layer cache dictionary
+        :param id_sets: a list of aov names
+        :return:
+        """
+
+        id_scan = utils.scan_id_objects(layer_cache["objects"], id_sets)
+
+        for object_name, attribute_values in id_scan.items():
+            layer_cache["scan"].setdefault(object_name,
+                                           dict()).update(attribute_values)
+
+        layer_cache["id_sets"].update(id_sets)
+
+        return
+
+    def _refresh_dirty_objects(self, layer_cache):
+        """
+        Rescan the dirty objects of a render layer cache
+
+        :param layer_cache: the render layer cache dictionary
+        :return:
+        """
+
+        dirty_objects = utils.get_visible_objects(
+            [x for x in layer_cache["dirty"] if utils.object_exists(x)])
+
+        id_scan = utils.scan_id_objects(dirty_objects,
+                                        list(layer_cache["id_sets"]))
+
+        for object_name in layer_cache["dirty"]:
+            if object_name in id_scan:
+                layer_cache["scan"][object_name] = id_scan[object_name]
+            else:
+                layer_cache["scan"].pop(object_name, None)
+
+        layer_cache["objects"] = [x for x in layer_cache["objects"]
+                                  if x not in layer_cache["dirty"]]
+        layer_cache["objects"].extend(dirty_objects)
+
+        layer_cache["dirty"] = set()
+        layer_cache["id_dicts"] = dict()
+        layer_cache["table"] = id_membership.ObjectTable()
+
+        self.dirty_refreshes += 1
+
+        return
+
+
+def new_layer_cache(members, objects):
+    """
+
+    :param members: list of the render layer transform nodes
+    :param objects: list of the visible render layer transform nodes
+    :return: a render layer cache dictionary
+    """
+
+    # Every dag path whose rename or reparent changes a member long name
+    paths = set()
+    for member in members:
+        while member and member not in paths:
+            paths.add(member)
+            member = member.rsplit("|", 1)[0]
+
+    return {"members": set(members),
+            "paths": paths,
+            "objects": objects,
+            "scan": collections.OrderedDict(),
+            "id_sets": set(),
+            "id_dicts": dict(),
+            "table": id_membership.ObjectTable(),
+            "dirty": set()}
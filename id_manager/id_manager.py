@@ -1,4 +1,6 @@
+import contextlib
 import os
+import sys
 
 from PySide import QtGui, QtCore
 
@@ -6,20 +8,45 @@ import maya.cmds as cmds
 import maya.OpenMaya as api
 
 import utils
+import id_cache
+import aov_registry
 import pyside_util
+import resources
 
 import main_ui
 import main_ui_content
 import id_set_tree
+import cmds_profiler
+import profiler_panel
 
 
 class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
+
+    selection_debounce_window = 50
+
+    # Number of attribute changed callbacks registered per step
+    attribute_callbacks_chunk_size = 200
+
     def __init__(self, parent=None):
         super(IdDialog, self).__init__(parent)
         self.setupUi(self)
 
         self.aov_tree_list = None
 
+        self.id_cache = id_cache.IdCache()
+        self._attribute_callbacks = dict()
+        self._attribute_callbacks_task = None
+        self._cache_callbacks_suspended = False
+
+        # Report file written on close when profiling the cmds calls
+        self.profile_report_path = None
+
+        # Debounce the scene selection changes - window in milliseconds
+        self.selection_debouncer = pyside_util.EventDebouncer(
+            self._selection_update,
+            window=self.selection_debounce_window,
+            parent=self)
+
         # Set Window Flags
         pyside_util.set_linux_window_flags(self)
 
@@ -35,26 +62,49 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
         # Add the render layers drop down combo
         self.layer_options = main_ui_content.LayersOptions(self)
 
+        # Id sets scan progress, shown while the tree is populated
+        self.pb_scan = QtGui.QProgressBar(self)
+        self.btn_cancelScan = QtGui.QPushButton("Cancel", self)
+
+        self.ly_scan = QtGui.QHBoxLayout()
+        self.ly_scan.addWidget(self.pb_scan)
+        self.ly_scan.addWidget(self.btn_cancelScan)
+        self.verticalLayout_3.insertLayout(2, self.ly_scan)
+
+        self.btn_cancelScan.clicked.connect(self._cancel_scan)
+
+        # Object short name filter of the id sets tree
+        self.le_filter = QtGui.QLineEdit(self)
+        self.le_filter.setPlaceholderText("Filter objects")
+        self.le_filter.setToolTip("Object short names containing the text, "
+                                  "glob patterns like *_GEO match the whole "
+                                  "short name")
+        self.lyAovList.insertWidget(0, self.le_filter)
+
+        self.le_filter.textChanged.connect(self._filter_content)
+
         # Add the aov ui content
         self._aov_content()
 
         # Ui signals
         self.btn_newId.clicked.connect(self._create_aov)
 
-        self.cb_layers.currentIndexChanged.connect(self._aov_content)
+        self.le_idName.setToolTip("AOV names separated by commas, "
+                                  "id_prop[1-30] creates id_prop1 to "
+                                  "id_prop30")
 
-        self.aov_tree_list.itemExpanded.connect(self._selection_update)
+        self.cb_layers.currentIndexChanged.connect(self._aov_content)
 
-        self.btn_refresh.clicked.connect(self._refresh_content)
+        self.btn_refresh.clicked.connect(self._force_refresh_content)
 
         # Maya selection changed callback
         self._register_selection_callback()
 
-        # Refresh button Icons
-        icon_folder = os.path.dirname(os.path.abspath(__file__))
-        icon_path = os.path.join(icon_folder, "icons", "refresh.png")
+        # Maya callbacks to flag the cached id objects as dirty
+        self._register_cache_callbacks()
 
-        self.btn_refresh.setIcon(QtGui.QIcon(icon_path))
+        # Refresh button Icons
+        self.btn_refresh.setIcon(resources.get_icon("refresh.png"))
 
         return
 
@@ -65,17 +115,122 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
         :return:
         """
 
-        # Remove the widget if it has been added before
-        if self.aov_tree_list is not None:
-            self.lyAovList.removeWidget(self.aov_tree_list)
-
         # Gather the aov list - exclude the beauty aov
         aov_list = [self.cb_AOV.itemText(i) for i in range(self.cb_AOV.count())
                     if self.cb_AOV.itemText(i) != "beauty"] or None
 
-        # Add the aov id sets content
-        self.aov_tree_list = id_set_tree.IdSetTreeView(aov_list, parent=self)
-        self.lyAovList.addWidget(self.aov_tree_list)
+        render_layer = cmds.editRenderLayerGlobals(query=True,
+                                                   currentRenderLayer=True)
+
+        # Update the tree if it has been added before
+        if self.aov_tree_list is not None:
+            self.aov_tree_list.update_content(aov_list, render_layer)
+        else:
+            # Add the aov id sets content
+            self.aov_tree_list = id_set_tree.IdSetTreeView(aov_list,
+                                                           parent=self,
+                                                           id_cache=self.id_cache,
+                                                           render_layer=render_layer)
+            self.lyAovList.addWidget(self.aov_tree_list)
+
+            self.aov_tree_list.expanded.connect(self._selection_update)
+
+            # The id sets are scanned once control returns to the event loop
+            self.aov_tree_list.population_progress.connect(
+                self._scan_progress)
+            self.aov_tree_list.population_finished.connect(
+                self._scan_finished)
+
+        self._show_scan_progress(self.aov_tree_list.is_populating())
+
+        return
+
+    def _show_scan_progress(self, visible):
+        """
+
+        :param visible: bool to show the id sets scan progress
+        :return:
+        """
+
+        self.pb_scan.setRange(0, 0)
+        self.pb_scan.setVisible(visible)
+        self.btn_cancelScan.setVisible(visible)
+
+        return
+
+    def _scan_progress(self, scanned, total):
+        """
+        Id sets scan progress callback
+
+        :param scanned: number of objects scanned
+        :param total: number of objects to scan, 0 while it is not known
+        :return:
+        """
+
+        self.pb_scan.setRange(0, total)
+        self.pb_scan.setValue(scanned)
+
+        return
+
+    def _scan_finished(self):
+        """
+        Id sets scan finished callback
+
+        :return:
+        """
+
+        self._show_scan_progress(False)
+
+        self._register_attribute_callbacks()
+
+        self._selection_update()
+
+        return
+
+    def _cancel_scan(self):
+        """
+        Cancel button callback - stop the id sets scan, the id sets already
+        scanned are kept
+
+        :return:
+        """
+
+        self.aov_tree_list.cancel_population()
+
+        self._show_scan_progress(False)
+
+        self._register_attribute_callbacks()
+
+        return
+
+    def _filter_content(self, text):
+        """
+        Filter text changed callback - narrow the id sets tree objects
+
+        :param text: the filter text
+        :return:
+        """
+
+        self.aov_tree_list.set_filter(text)
+
+        # Select the scene selection rows shown by the filter
+        self.selection_debouncer.trigger()
+
+        return
+
+    def _force_refresh_content(self):
+        """
+        Refresh button callback - rescan the current layer ignoring the cache
+
+        :return:
+        """
+
+        render_layer = cmds.editRenderLayerGlobals(query=True,
+                                                   currentRenderLayer=True)
+        self.id_cache.invalidate(render_layer)
+        aov_registry.registry.invalidate()
+
+        self._refresh_content()
 
         return
 
@@ -88,15 +243,9 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
 
         self.cb_layers.blockSignals(True)
 
-        # FIXME: Maya does not recognize new AOVS until render layer switch
-        # Switch to master layer and back to force refresh
-        # Need tp fix this
-        user_layer = cmds.editRenderLayerGlobals(query=True,
-                                                 currentRenderLayer=True)
-
-        cmds.editRenderLayerGlobals(currentRenderLayer="defaultRenderLayer")
-        cmds.editRenderLayerGlobals(currentRenderLayer=user_layer)
-
+        # New aovs are picked up by the aov registry callbacks and the
+        # current layer values are read from the aovs, no render layer
+        # switch is needed to list them
         self.layer_options.ui_content()
 
         self.cb_layers.blockSignals(False)
@@ -107,25 +256,25 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
 
     def _create_aov(self):
         """
-        Create a new aov callback
+        Create new aovs callback
 
         :return:
         """
 
-        aov_name = self.le_idName.text()
+        try:
+            aov_names = utils.expand_aov_names(self.le_idName.text())
+        except ValueError as error:
+            pyside_util.display_message_box("ID Tree Manager", str(error),
+                                            parent=self)
+            return
 
-        if not ("aiAOV_%s" % aov_name) in cmds.ls(type="aiAOV"):
-            utils.create_new_aov(aov_name)
+        if not aov_names:
+            return
 
-        # Enable AOV on current layer as override
+        # Enable AOVs on current layer as override
         render_layer = cmds.editRenderLayerGlobals(query=True, crl=True)
 
-        cmds.editRenderLayerAdjustment("aiAOV_%s.enabled" % aov_name,
-                                       layer=render_layer)
-
-        cmds.setAttr("aiAOV_%s.enabled" % aov_name, 1)
-
-        utils.create_connect_aov_shader(aov_name)
+        utils.create_id_aovs(aov_names, render_layer)
 
         self._refresh_content()
 
@@ -138,13 +287,11 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
         :return:
         """
 
-        # Get the ui selected items if the exist in the maya scene
-        selected_items = [x.data(1, QtCore.Qt.UserRole)
-                          for x in self.aov_tree_list.selectedItems()
-                          if cmds.objExists(str(x.text(0)))] or []
+        # Get the ui selected items
+        selected_items = self.aov_tree_list.selected_object_names()
 
         # Get all tree items
-        tree_items = set(self.aov_tree_list.items_dict.keys())
+        tree_items = self.aov_tree_list.id_model.object_names
 
         # Get the current scene selection
         scene_selection = cmds.ls(sl=True, long=True) or []
@@ -166,15 +313,8 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
         # Block the selection update signal
         self.aov_tree_list.selectSignalBlocked = True
 
-        # Clear the tree selection
-        self.aov_tree_list.clearSelection()
-
-        # Select all tree items in the valid selection list
-        for item in valid_selection:
-            items_dict = self.aov_tree_list.items_dict[item].iteritems()
-            for parent, treeItem in items_dict:
-                if parent is not None and parent.isExpanded():
-                    treeItem.setSelected(True)
+        # Select all tree items in the valid selection list at once
+        self.aov_tree_list.select_objects(valid_selection)
 
         # Unblock the selection update signals
         self.aov_tree_list.selectSignalBlocked = False
@@ -184,12 +324,14 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
     def _update_selection_callback(self, *args):
         """
         Callback for updating the ui contents on scene selection changed
+        Bursts of selection changes run a single debounced update
 
         :param args:
         :return:
         """
 
-        self._selection_update()
+        self.selection_debouncer.trigger()
+
         return
 
     def _register_selection_callback(self):
@@ -219,6 +361,290 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
 
         return
 
+    @contextlib.contextmanager
+    def suspend_cache_callbacks(self):
+        """
+        Context manager ignoring the id cache callbacks while maya changes
+        values cached per render layer, like a render layer switch applying
+        the layer adjustments
+
+        :return:
+        """
+
+        suspended = self._cache_callbacks_suspended
+        self._cache_callbacks_suspended = True
+
+        try:
+            yield
+        finally:
+            self._cache_callbacks_suspended = suspended
+
+    def _attribute_changed_callback(self, msg, plug, other_plug, object_name):
+        """
+        Flag an object as dirty when its id or visibility attributes are set,
+        added or removed
+
+        :param msg: the attribute message type
+        :param plug: the MPlug changed
+        :param other_plug: the other MPlug of a connection message
+        :param object_name: the long name of the object watched
+        :return:
+        """
+
+        if self._cache_callbacks_suspended:
+            return
+
+        if not msg & (api.MNodeMessage.kAttributeSet |
+                      api.MNodeMessage.kAttributeAdded |
+                      api.MNodeMessage.kAttributeRemoved):
+            return
+
+        if plug.isChild():
+            plug = plug.parent()
+
+        attribute = plug.partialName(False, False, False, False, False, True)
+
+        if attribute.startswith("mtoa_constant_") or \
+                attribute == "primaryVisibility":
+            self.id_cache.mark_dirty([object_name])
+
+        return
+
+    def _node_removed_callback(self, node, *args):
+        """
+        Flag a removed dag node as dirty
+
+        :param node: the MObject removed
+        :param args:
+        :return:
+        """
+
+        if self._cache_callbacks_suspended:
+            return
+
+        dag_path = api.MDagPath()
+        api.MDagPath.getAPathTo(node, dag_path)
+
+        self.id_cache.mark_dirty([dag_path.fullPathName()])
+
+        return
+
+    def _connection_callback(self, src_plug, dest_plug, made, *args):
+        """
+        Drop the cache of a render layer when its members change
+
+        :param src_plug: the source MPlug of the connection
+        :param dest_plug: the destination MPlug of the connection
+        :param made: True if the connection is made, False if broken
+        :param args:
+        :return:
+        """
+
+        if self._cache_callbacks_suspended:
+            return
+
+        # Members are connected from the renderInfo plug of their layer
+        attribute = src_plug.partialName(False, False, False, False, False,
+                                         True)
+
+        if attribute != "renderInfo" or \
+                not src_plug.node().hasFn(api.MFn.kRenderLayer):
+            return
+
+        self.id_cache.invalidate(
+            api.MFnDependencyNode(src_plug.node()).name())
+
+        return
+
+    def _name_changed_callback(self, node, previous_name, *args):
+        """
+        Update the id cache when a dag node is renamed
+
+        :param node: the MObject renamed
+        :param previous_name: the node name before the change
+        :param args:
+        :return:
+        """
+
+        if self._cache_callbacks_suspended or not previous_name or \
+                not node.hasFn(api.MFn.kDagNode):
+            return
+
+        dag_path = api.MDagPath()
+        api.MDagPath.getAPathTo(node, dag_path)
+
+        parent_path = dag_path.fullPathName().rsplit("|", 1)[0]
+
+        self.id_cache.invalidate_nodes(["%s|%s" % (parent_path,
+                                                   previous_name)])
+
+        return
+
+    def _parent_removed_callback(self, child, parent, *args):
+        """
+        Update the id cache when a dag node is reparented
+
+        :param child: the MDagPath of the child node
+        :param parent: the MDagPath of the parent it is removed from
+        :param args:
+        :return:
+        """
+
+        if self._cache_callbacks_suspended:
+            return
+
+        child_name = api.MFnDagNode(child).name()
+
+        self.id_cache.invalidate_nodes(["%s|%s" % (parent.fullPathName(),
+                                                   child_name)])
+
+        return
+
+    def _register_attribute_callbacks(self):
+        """
+        Register an attribute changed callback on the shape of the members
+        of the cached render layers. The callbacks are registered in chunks
+        from the event loop and the callbacks of the nodes no longer cached
+        are removed
+
+        :return:
+        """
+
+        if self._attribute_callbacks_task is not None:
+            self._attribute_callbacks_task.cancel()
+
+        members = self.id_cache.members()
+
+        stale_objects = [x for x in self._attribute_callbacks
+                         if x not in members]
+
+        for object_name in stale_objects:
+            api.MMessage.removeCallback(
+                self._attribute_callbacks.pop(object_name))
+
+        objects = [x for x in members if x not in self._attribute_callbacks]
+
+        chunk_size = self.attribute_callbacks_chunk_size
+        chunks = (objects[x:x + chunk_size]
+                  for x in range(0, len(objects), chunk_size))
+
+        self._attribute_callbacks_task = id_set_tree.CooperativeTask(
+            chunks,
+            self._register_objects_attribute_callbacks,
+            budget=self.aov_tree_list.tick_budget,
+            parent=self)
+        self._attribute_callbacks_task.start()
+
+        return
+
+    def _register_objects_attribute_callbacks(self, objects):
+        """
+        Register an attribute changed callback on the shape of each object
+
+        :param objects: list of object long names
+        :return:
+        """
+
+        for object_name in objects:
+            if object_name in self._attribute_callbacks:
+                continue
+
+            selection_list = api.MSelectionList()
+            dag_path = api.MDagPath()
+
+            try:
+                selection_list.add(object_name)
+                selection_list.getDagPath(0, dag_path)
+                dag_path.extendToShape()
+            except RuntimeError:
+                continue
+
+            self._attribute_callbacks[object_name] = api.\
+                MNodeMessage.\
+                addAttributeChangedCallback(dag_path.node(),
+                                            self._attribute_changed_callback,
+                                            object_name)
+
+        return
+
+    def _register_cache_callbacks(self):
+        """
+        Register the maya callbacks that keep the id cache up to date
+
+        :return:
+        """
+
+        self._node_removed_callback_id = api.\
+                                         MDGMessage.\
+                                         addNodeRemovedCallback(self._node_removed_callback,
+                                                                "dagNode")
+
+        # Scene level callbacks, filtered in the callbacks
+        self._cache_callback_ids = [
+            self._node_removed_callback_id,
+            api.MDGMessage.addConnectionCallback(self._connection_callback),
+            api.MNodeMessage.addNameChangedCallback(
+                api.MObject(), self._name_changed_callback),
+            api.MDagMessage.addParentRemovedCallback(
+                self._parent_removed_callback),
+            api.MSceneMessage.addCallback(api.MSceneMessage.kAfterOpen,
+                                          self._scene_changed_callback),
+            api.MSceneMessage.addCallback(api.MSceneMessage.kAfterNew,
+                                          self._scene_changed_callback)]
+
+        # Keep the aov registry up to date while the ui is open
+        aov_registry.registry.register_callbacks()
+
+        return
+
+    def _scene_changed_callback(self, *args):
+        """
+        Drop the id cache of the previous scene when a scene is opened or
+        created, render layers of the same name would get its ids
+
+        :param args:
+        :return:
+        """
+
+        self._remove_attribute_callbacks()
+        self.id_cache.invalidate()
+
+        return
+
+    def _remove_attribute_callbacks(self):
+        """
+        Remove the attribute changed callbacks of the cached members
+
+        :return:
+        """
+
+        if self._attribute_callbacks_task is not None:
+            self._attribute_callbacks_task.cancel()
+            self._attribute_callbacks_task = None
+
+        for callback in self._attribute_callbacks.values():
+            api.MMessage.removeCallback(callback)
+
+        self._attribute_callbacks = dict()
+
+        return
+
+    def _deregister_cache_callbacks(self):
+        """
+        Deregister the id cache callbacks
+
+        :return:
+        """
+
+        self._remove_attribute_callbacks()
+
+        for callback in self._cache_callback_ids:
+            api.MMessage.removeCallback(callback)
+
+        aov_registry.registry.deregister_callbacks()
+
+        return
+
     def closeEvent(self, event):
         """
         PySide close event used to deregister the selection
@@ -228,7 +654,16 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
         :return:
         """
 
+        self.aov_tree_list.cancel_population()
+
         self._deregister_selection_callback()
+        self._deregister_cache_callbacks()
+
+        if cmds_profiler.is_enabled():
+            if self.profile_report_path:
+                cmds_profiler.get_profiler().dump(self.profile_report_path)
+
+            cmds_profiler.disable()
 
         return
 
@@ -251,13 +686,19 @@ class IdDialog(QtGui.QDialog, main_ui.Ui_Form):
         return None
 
 
-def main():
+def main(profile=None):
     """
     Main entry point for the script
 
+    :param profile: True to profile the cmds calls of the ui, or the path of
+                    a report file written when the ui closes. Read from the
+                    ID_MANAGER_PROFILE environment variable if None
     :return:
     """
 
+    if profile is None:
+        profile = os.environ.get("ID_MANAGER_PROFILE")
+
     # Get the current layer
     current_layer = cmds.editRenderLayerGlobals(query=True, crl=True)
 
@@ -273,12 +714,22 @@ def main():
         pyside_util.display_message_box("ID Tree Manager", warning)
         return False
 
+    # Profiling swaps the cmds module of the ui modules, off by default
+    if profile:
+        cmds_profiler.enable([utils, main_ui_content, aov_registry,
+                              sys.modules[__name__]])
+        profiler_panel.show_profiler_panel()
+
     # Create arnold options before loading the UI
     utils.create_arnold_options()
 
     # Launch the Id Manager Dialog
     parent = pyside_util.get_maya_window_by_name("idManagerTree_ui")
     ui = IdDialog(parent=parent)
+
+    if profile and profile not in (True, "1"):
+        ui.profile_report_path = profile
+
     ui.show()
 
     return
@@ -0,0 +1,273 @@
+"""
+Compact id sets membership
+
+Every object long name is stored once in an ObjectTable and the id sets
+refer to the objects by their table index. An IdSetMembership keeps the
+objects of each id color as a bitset of these indexes, one bit per object
+of the table, and the Holdout color, the objects without any id color, is
+the complement of the colored objects
+
+IdSetMembership is a read only mapping of the id colors to the lists of
+their object long names, so it reads like the id colors dictionaries
+returned before. Lists are built when a color is read, see to_dict
+
+"""
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+# Id colors always listed, even without objects
+DEFAULT_ID_COLORS = ("Red", "Green", "Blue", "Holdout")
+
+# Bit positions set in each byte value
+_BYTE_BITS = [tuple(x for x in range(8) if byte & (1 << x))
+              for byte in range(256)]
+
+
+class ObjectTable(object):
+    """
+    Interned object names addressed by integer indexes
+
+    The name lookup dictionary is only built once names are looked up, the
+    names added to an empty table are indexed by their position
+
+    """
+
+    __slots__ = ("names", "_indexes")
+
+    def __init__(self, names=()):
+        self.names = []
+        self._indexes = None
+
+        self.indexes(list(names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.index(name) is not None
+
+    def _lookup(self):
+        """
+
+        :return: the dictionary of the names and their index
+        """
+
+        if self._indexes is None:
+            self._indexes = dict((x, i) for i, x in enumerate(self.names))
+
+        return self._indexes
+
+    def add(self, name):
+        """
+
+        :param name: the object long name as a string
+        :return: the index of the object, added if not in the table yet
+        """
+
+        indexes = self._lookup()
+
+        index = indexes.get(name)
+
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            indexes[name] = index
+
+        return index
+
+    def indexes(self, names):
+        """
+
+        :param names: list of unique object long names
+        :return: list of the indexes of the objects, the objects not in the
+                 table yet are added
+        """
+
+        if not self.names:
+            self.names.extend(names)
+
+            # A lookup built while the table was empty is rebuilt lazily
+            self._indexes = None
+
+            return list(range(len(self.names)))
+
+        return [self.add(x) for x in names]
+
+    def index(self, name):
+        """
+
+        :param name: the object long name as a string
+        :return: the index of the object, None if not in the table
+        """
+
+        return self._lookup().get(name)
+
+
+class IdSetMembership(Mapping):
+    """
+    Id colors of the objects of an id set, stored as bitsets over an
+    ObjectTable
+
+    """
+
+    __slots__ = ("table", "_members", "_colored", "_colors")
+
+    def __init__(self, table):
+        self.table = table
+
+        self._members = bytearray()
+        self._colored = bytearray()
+        self._colors = dict()
+
+    def add(self, indexes, color_indexes):
+        """
+        Add objects to the id set
+
+        :param indexes: list of the ObjectTable indexes of the objects
+        :param color_indexes: dictionary of the id colors and the indexes of
+                              their objects, the objects without any id
+                              color are Holdouts
+        :return:
+        """
+
+        set_bits(self._members, indexes)
+
+        for id_color, id_color_indexes in color_indexes.items():
+            bits = self._colors.get(id_color)
+            if bits is None:
+                bits = self._colors[id_color] = bytearray()
+
+            set_bits(bits, id_color_indexes)
+            set_bits(self._colored, id_color_indexes)
+
+        return
+
+    def _color_bits(self, id_color):
+        """
+
+        :param id_color: the name of an id color
+        :return: the bitset of the id color, None if it is not listed
+        """
+
+        if id_color == "Holdout":
+            colored = self._colored
+            colored_count = len(colored)
+
+            # Members not colored, the bitsets may differ in length
+            return bytearray(x & ~colored[i] & 0xFF if i < colored_count
+                             else x
+                             for i, x in enumerate(self._members))
+
+        bits = self._colors.get(id_color)
+
+        if bits is None and id_color in DEFAULT_ID_COLORS:
+            return bytearray()
+
+        return bits
+
+    def indexes(self, id_color):
+        """
+
+        :param id_color: the name of an id color
+        :return: list of the table indexes of the id color objects
+        """
+
+        bits = self._color_bits(id_color)
+
+        if bits is None:
+            raise KeyError(id_color)
+
+        return get_bit_indexes(bits)
+
+    def count(self, id_color):
+        """
+
+        :param id_color: the name of an id color
+        :return: the number of objects of the id color
+        """
+
+        bits = self._color_bits(id_color) or bytearray()
+
+        return sum(len(_BYTE_BITS[x]) for x in bits if x)
+
+    def __getitem__(self, id_color):
+        names = self.table.names
+
+        return [names[x] for x in self.indexes(id_color)]
+
+    def __iter__(self):
+        for id_color in DEFAULT_ID_COLORS:
+            yield id_color
+
+        for id_color in sorted(self._colors):
+            if id_color not in DEFAULT_ID_COLORS and \
+                    any(self._colors[id_color]):
+                yield id_color
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def __repr__(self):
+        return "IdSetMembership(%r)" % self.to_dict()
+
+    def to_dict(self):
+        """
+
+        :return: dictionary of the id colors and their object long names
+        """
+
+        return dict(self.items())
+
+
+def set_bits(bits, indexes):
+    """
+    Set bits of a bitset, growing the bitset if needed
+
+    :param bits: the bitset as a bytearray
+    :param indexes: list of the bit indexes
+    :return:
+    """
+
+    if not indexes:
+        return
+
+    byte_count = (max(indexes) >> 3) + 1
+
+    if byte_count > len(bits):
+        bits.extend(bytearray(byte_count - len(bits)))
+
+    for index in indexes:
+        bits[index >> 3] |= 1 << (index & 7)
+
+    return
+
+
+def get_bit_indexes(bits):
+    """
+
+    :param bits: the bitset as a bytearray
+    :return: sorted list of the indexes of the bits set
+    """
+
+    indexes = []
+
+    for byte_index, byte in enumerate(bits):
+        if byte:
+            offset = byte_index << 3
+            indexes.extend(offset + x for x in _BYTE_BITS[byte])
+
+    return indexes
+
+
+def to_dict(id_dict):
+    """
+
+    :param id_dict: dictionary of the id sets and their IdSetMembership
+    :return: the id dictionary with plain dictionaries of lists, for json
+    """
+
+    return dict((x, dict(y)) for x, y in id_dict.items())
@@ -0,0 +1,130 @@
+import collections
+import json
+
+import maya.cmds as cmds
+
+import utils
+import id_membership
+
+
+def layers_id_dict(id_sets=None, render_layers=None):
+    """
+    Build the id sets dictionary of several render layers in one traversal
+
+    The id attributes are scanned once on the current layer and the values
+    of the other layers are read from the render layer adjustments, so no
+    render layer switch is needed. The current layer keeps the scanned
+    values, the adjustment values of a layer being only stored when
+    switching away from it. The primary visibility filter uses the current
+    layer state
+
+    :param id_sets: a list of aov names, all the id aovs if None
+    :param render_layers: a list of render layer names, all if None
+    :return: dictionary where keys are the render layers and values the
+             id_objects_dict result for the layer
+    """
+
+    if id_sets is None:
+        id_sets = [x.split("aiAOV_")[-1] for x in utils.get_id_aovs()]
+
+    if render_layers is None:
+        render_layers = [x for x in cmds.ls(type="renderLayer")
+                         if "defaultRenderLayer" not in x]
+
+    layers_objects = dict()
+    scene_objects = collections.OrderedDict()
+
+    for render_layer in render_layers:
+        layer_objects = utils.get_render_layer_objects(render_layer) or []
+        layers_objects[render_layer] = layer_objects
+
+        scene_objects.update((x, None) for x in layer_objects)
+
+    # Scan the objects of all layers at once
+    visible_objects = utils.get_visible_objects(list(scene_objects))
+    id_scan = utils.scan_id_objects(visible_objects, id_sets)
+
+    # Gather the layer adjustments of all the id plugs at once
+    shape_nodes = utils.get_objects_shape_nodes(list(id_scan))
+
+    object_plugs = dict()
+    for object_name, attribute_values in id_scan.items():
+        object_plugs[object_name] = [(x, "%s.%s" % (shape_nodes[object_name],
+                                                    x))
+                                     for x in attribute_values]
+
+    layer_overrides = utils.get_layer_overrides(
+        [y for x in object_plugs.values() for _, y in x])
+
+    current_layer = cmds.editRenderLayerGlobals(currentRenderLayer=True,
+                                                query=True)
+
+    layers_dict = dict()
+
+    # The layers share the object names
+    table = id_membership.ObjectTable()
+
+    for render_layer in render_layers:
+        layer_scan = collections.OrderedDict()
+
+        for object_name in layers_objects[render_layer]:
+            if object_name not in id_scan:
+                continue
+
+            attribute_values = dict(id_scan[object_name])
+
+            if render_layer == current_layer:
+                layer_scan[object_name] = attribute_values
+                continue
+
+            for attribute, plug in object_plugs[object_name]:
+                overrides = layer_overrides.get(plug)
+                if overrides is None:
+                    continue
+
+                value = overrides.get(render_layer,
+                                      overrides.get("defaultRenderLayer"))
+
+                if value is not None:
+                    attribute_values[attribute] = get_override_value(value)
+
+            layer_scan[object_name] = attribute_values
+
+        layers_dict[render_layer] = utils.build_id_dict(layer_scan, id_sets,
+                                                        table)
+
+    return layers_dict
+
+
+def get_override_value(value):
+    """
+
+    :param value: the value of a float3 render layer adjustment
+    :return: the value as a tuple
+    """
+
+    if isinstance(value, list):
+        value = value[0]
+
+    return tuple(value)
+
+
+def export_layers_id_json(file_path, id_sets=None, render_layers=None):
+    """
+    Export the id sets of several render layers to a json file
+
+    :param file_path: the json file path as a string
+    :param id_sets: a list of aov names, all the id aovs if None
+    :param render_layers: a list of render layer names, all if None
+    :return: the dictionary exported
+    """
+
+    layers_dict = layers_id_dict(id_sets, render_layers)
+
+    layers_dict = dict((x, id_membership.to_dict(y))
+                       for x, y in layers_dict.items())
+
+    with open(file_path, "w") as json_file:
+        json.dump(layers_dict, json_file, indent=4, sort_keys=True)
+
+    return layers_dict
@@ -0,0 +1,222 @@
+"""
+Declarative id assignment rules
+
+A rules file is a json list of rules, each mapping a glob or regex pattern
+of the object short names, or an object set membership, to an id set color
+
+    [{"glob": "*_eye_GEO", "id_set": "id_face", "color": "Red"},
+     {"regex": "teeth_(upper|lower)_GEO", "id_set": "id_face", "color": "Blue"},
+     {"set": "hair_SET", "id_set": "id_chars", "color": "Green"}]
+
+The first rule matching an object wins. Each name pattern is compiled once
+and the rules are tested in order, up to the first object set rule the
+object belongs to
+
+"""
+
+import collections
+import fnmatch
+import json
+import re
+
+import maya.cmds as cmds
+
+import utils
+
+
+class IdRules(object):
+    """
+    Compiled id assignment rules
+
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+        for rule in self.rules:
+            kinds = [x for x in ("glob", "regex", "set") if x in rule]
+            if len(kinds) != 1 or "id_set" not in rule or "color" not in rule:
+                raise ValueError("Invalid id rule %s" % rule)
+
+        self.id_sets = sorted(set(x["id_set"] for x in self.rules))
+
+        self._patterns = self._compile_patterns()
+        self._set_members = None
+
+    def _compile_patterns(self):
+        """
+        Compile the name pattern of each rule on its own, so the groups,
+        backreferences and flags of a regex are kept as written
+
+        :return: list of the rule indexes and the function matching a whole
+                 short name, in the rules order
+        """
+
+        patterns = []
+
+        for index, rule in enumerate(self.rules):
+            try:
+                if "glob" in rule:
+                    name_match = re.compile(fnmatch.translate(rule["glob"]),
+                                            re.DOTALL).match
+                elif "regex" in rule:
+                    name_match = get_full_match(rule["regex"])
+                else:
+                    continue
+            except re.error as error:
+                raise ValueError("Invalid id rule %s: %s" % (rule, error))
+
+            patterns.append((index, name_match))
+
+        return patterns
+
+    def _get_set_members(self):
+        """
+        Resolve the object set rules members once
+
+        :return: dictionary where keys are the object long names and values
+                 the index of the first set rule they belong to
+        """
+
+        if self._set_members is not None:
+            return self._set_members
+
+        self._set_members = dict()
+
+        for index, rule in enumerate(self.rules):
+            if "set" not in rule or not cmds.objExists(rule["set"]):
+                continue
+
+            set_members = cmds.sets(rule["set"], q=True) or []
+
+            # Maya lists the whole scene for an empty list
+            if not set_members:
+                continue
+
+            for member in cmds.ls(set_members, long=True) or []:
+                self._set_members.setdefault(member, index)
+
+        return self._set_members
+
+    def match(self, object_name):
+        """
+
+        :param object_name: the object long name as a string
+        :return: the first rule matching the object or None
+        """
+
+        short_name = utils.get_object_short_name(object_name)
+
+        set_index = self._get_set_members().get(object_name)
+
+        for index, name_match in self._patterns:
+            # A set rule listed before the name rules wins
+            if set_index is not None and set_index < index:
+                break
+
+            if name_match(short_name) is not None:
+                return self.rules[index]
+
+        if set_index is not None:
+            return self.rules[set_index]
+
+        return None
+
+
+def get_full_match(regex):
+    """
+
+    :param regex: a regular expression as a string
+    :return: function matching the whole of a string, returning the match
+             object or None
+    """
+
+    pattern = re.compile(regex, re.DOTALL)
+
+    if hasattr(pattern, "fullmatch"):
+        return pattern.fullmatch
+
+    # Python 2 has no fullmatch, its inline flags are accepted anywhere
+    return re.compile(r"(?:%s)\Z" % regex, re.DOTALL).match
+
+
+def load_rules(file_path):
+    """
+
+    :param file_path: the json rules file path as a string
+    :return: the IdRules compiled from the file
+    """
+
+    with open(file_path) as json_file:
+        return IdRules(json.load(json_file))
+
+
+def apply_rules(id_rules, render_layer=None, dry_run=False):
+    """
+    Assign the id colors of the rules to the render layer members
+
+    :param id_rules: an IdRules instance
+    :param render_layer: the render layer name, the current layer if None
+    :param dry_run: bool to only report the changes
+    :return: list of (object, id set, current colors, rule color) tuples
+             for the objects whose id colors change, the current colors
+             being the sorted list of the object colors in the id set
+    """
+
+    # The id values are read and set on the current layer
+    with utils.keep_render_layer():
+        if render_layer is None:
+            render_layer = cmds.editRenderLayerGlobals(
+                currentRenderLayer=True, query=True)
+        else:
+            cmds.editRenderLayerGlobals(currentRenderLayer=render_layer)
+
+        layer_objects = utils.get_render_layer_objects(render_layer) or []
+
+        matches = [(x, id_rules.match(x)) for x in layer_objects]
+        matches = [(x, y) for x, y in matches if y is not None]
+
+        # Get the current id color of the matched objects
+        # Objects which are not accepted as id objects are left out
+        id_scan = utils.scan_id_objects([x for x, _ in matches],
+                                        id_rules.id_sets)
+        id_dict = utils.build_id_dict(id_scan, id_rules.id_sets)
+
+        matches = [(x, y) for x, y in matches if x in id_scan]
+
+        # An object can have an rgb color and an alpha color
+        current_colors = dict()
+        for id_set, id_colors in id_dict.items():
+            for id_color, objects in id_colors.items():
+                for object_name in objects:
+                    current_colors.setdefault((object_name, id_set),
+                                              set()).add(id_color)
+
+        changes = []
+        assignments = collections.OrderedDict()
+
+        for object_name, rule in matches:
+            object_colors = current_colors.get((object_name, rule["id_set"]),
+                                               set())
+
+            # Assigning a color resets the other colors of the id set
+            if object_colors == set([rule["color"]]):
+                continue
+
+            changes.append((object_name, rule["id_set"],
+                            sorted(object_colors), rule["color"]))
+
+            assignments.setdefault((rule["id_set"], rule["color"]),
+                                   []).append(object_name)
+
+        if dry_run:
+            return changes
+
+        with utils.id_edit_transaction("idManagerRules"):
+            utils.create_id_aovs(sorted(set(x for x, _ in assignments)),
+                                 render_layer)
+
+            for (id_set, id_color), objects in assignments.items():
+                utils.set_attribute_ids(objects, id_set, id_color)
+
+        return changes
@@ -1,161 +1,1341 @@
-import os
+import bisect
+import time
 
 from PySide import QtGui, QtCore
 
 import utils
+import resources
+import name_index
 
 
-class ElementItem(QtGui.QTreeWidgetItem):
+# Item data roles for the node type and the node name
+TYPE_ROLE = QtCore.Qt.UserRole
+NAME_ROLE = QtCore.Qt.UserRole + 1
+
+# Number of object rows added each time a color group fetches more rows
+FETCH_SIZE = 500
+
+# Number of object rows found again for the populated color groups when the
+# filter changes, more rows are fetched as the view scrolls
+FILTER_FETCH_SIZE = 100
+
+# Highest resolution clock available
+timer = getattr(time, "perf_counter", time.time)
+
+ID_COLORS = {"Alpha": "#666666",
+             "Red": "#ff0000",
+             "Green": "#097709",
+             "Blue": "#0000ff",
+             "Holdout": "#000000",
+             "Alpha_Neg": "#888888",
+             "Red_Neg": "#ff2222",
+             "Green_Neg": "#099909",
+             "Blue_Neg": "#3333ff"
+             }
+
+
+class TreeNode(object):
+    """
+    Light weight node used for the id sets and id colors of the model
+    Object rows have no node, they are read from their id color shown list,
+    the objects list itself or the objects matching the model filter
+
+    """
+
+    __slots__ = ("kind", "name", "row", "parent", "children", "objects",
+                 "shown", "scanned", "fetched")
+
+    def __init__(self, kind, name, row=0, parent=None, objects=None):
+        self.kind = kind
+        self.name = name
+        self.row = row
+        self.parent = parent
+        self.children = []
+        self.objects = objects
+        self.fetched = 0
+
+        # Objects of the rows and the position of the next object to filter,
+        # None if not filtered
+        self.shown = objects
+        self.scanned = None
+
+
+def get_id_colors(id_dict):
+    """
+
+    :param id_dict: dictionary of the id colors of an id set
+    :return: list of the id colors in the tree order, holdout last
+    """
+
+    id_colors = sorted(x for x in id_dict if x != "Holdout")
+    id_colors.append("Holdout")
+
+    return id_colors
+
+
+def get_row_ranges(rows):
+    """
+
+    :param rows: sorted list of row numbers
+    :return: list of (first, last) tuples of the contiguous row ranges
+    """
+
+    row_ranges = []
+
+    for row in rows:
+        if row_ranges and row_ranges[-1][1] == row - 1:
+            row_ranges[-1] = (row_ranges[-1][0], row)
+        else:
+            row_ranges.append((row, row))
+
+    return row_ranges
+
+
+class IdColorDelegate(QtGui.QStyledItemDelegate):
+    """
+    Item delegate painting the id color swatches
+    Clicking a swatch emits color_clicked with the id color model index
+
+    """
+
+    color_clicked = QtCore.Signal(QtCore.QModelIndex)
+
+    swatch_size = QtCore.QSize(70, 20)
+
+    def swatch_rect(self, rect):
+        """
+
+        :param rect: the QRect of the item
+        :return: the QRect of the id color swatch
+        """
+
+        return QtCore.QRect(rect.left(),
+                            rect.center().y() - self.swatch_size.height() // 2,
+                            self.swatch_size.width(),
+                            self.swatch_size.height())
+
+    def paint(self, painter, option, index):
+        if index.data(TYPE_ROLE) != "color":
+            super(IdColorDelegate, self).paint(painter, option, index)
+            return
+
+        # Draw the item background so the selection is still displayed
+        style = QtGui.QApplication.style()
+        style.drawPrimitive(QtGui.QStyle.PE_PanelItemViewItem,
+                            option,
+                            painter,
+                            option.widget)
+
+        id_color = index.data(NAME_ROLE)
+        rect = self.swatch_rect(option.rect)
+
+        painter.save()
+
+        painter.fillRect(rect, QtGui.QColor(ID_COLORS.get(id_color,
+                                                          "#52869e")))
+        painter.setPen(QtGui.QColor("#ffffff"))
+        painter.drawText(rect, QtCore.Qt.AlignCenter, id_color)
+
+        painter.restore()
+
+        return
+
+    def sizeHint(self, option, index):
+        size_hint = super(IdColorDelegate, self).sizeHint(option, index)
+
+        # The tree uses uniform row heights so every row fits a swatch
+        size_hint.setHeight(max(size_hint.height(),
+                                self.swatch_size.height() + 2))
+
+        return size_hint
+
+    def editorEvent(self, event, model, option, index):
+        mouse_events = (QtCore.QEvent.MouseButtonPress,
+                        QtCore.QEvent.MouseButtonRelease,
+                        QtCore.QEvent.MouseButtonDblClick)
+
+        if index.data(TYPE_ROLE) != "color" or \
+                event.type() not in mouse_events or \
+                event.button() != QtCore.Qt.LeftButton or \
+                not self.swatch_rect(option.rect).contains(event.pos()):
+            return super(IdColorDelegate, self).editorEvent(event,
+                                                            model,
+                                                            option,
+                                                            index)
+
+        # Consume the press so the tree selection is kept
+        if event.type() == QtCore.QEvent.MouseButtonRelease:
+            self.color_clicked.emit(index)
+
+        return True
+
+
+class IdSetTreeModel(QtCore.QAbstractItemModel):
+    """
+    Item model for the id sets, their id colors and the objects added to
+    each color. Object rows are only populated when a color is expanded
+
     """
-    Tree Widget Item class used for objects added to the id colors
 
-    """
+    def __init__(self, parent=None):
+        super(IdSetTreeModel, self).__init__(parent)
+
+        self._root = TreeNode("root", None)
+
+        self.object_names = set()
+
+        # Reverse index of the object rows, built on first lookup
+        self._object_index = None
+
+        # Short name index of the objects, built once per scan
+        self.name_index = None
+
+        self.filter_text = ""
+        self._filter_match = None
+
+    def set_id_data(self, id_data):
+        """
+        Set the model content from an id_objects_dict result
+
+        :param id_data: dictionary for each aov, their id rgba entries, and
+                        the objects added to each rgb entry
+        :return:
+        """
+
+        self.beginResetModel()
+
+        self._root = TreeNode("root", None)
+        self.object_names = set()
+
+        for id_set, id_dict in sorted(id_data.items()):
+            set_node = TreeNode("set", id_set, len(self._root.children),
+                                self._root)
+            self._root.children.append(set_node)
+
+            for id_color in get_id_colors(id_dict):
+                id_objects = list(id_dict.get(id_color, []))
+
+                color_node = TreeNode("color", id_color,
+                                      len(set_node.children),
+                                      set_node,
+                                      id_objects)
+                set_node.children.append(color_node)
+
+                self.object_names.update(id_objects)
+
+        self._object_index = None
+
+        # The index of the replaced data is built again from the new objects
+        self.name_index = None
+
+        if self._filter_match is not None:
+            self._match_filter(self.object_names)
+
+            for set_node in self._root.children:
+                for color_node in set_node.children:
+                    self._find_shown_objects(color_node, 1)
+
+        self.endResetModel()
+
+        return
+
+    def update_id_data(self, id_data):
+        """
+        Apply the differences between an id_objects_dict result and the
+        model content. Only the rows added or removed are changed so the
+        view keeps its expanded rows, selection and scroll position
+
+        :param id_data: dictionary for each aov, their id rgba entries, and
+                        the objects added to each rgb entry
+        :return:
+        """
+
+        self.remove_id_sets([x.name for x in self._root.children
+                             if x.name not in id_data])
+
+        for id_set, id_dict in sorted(id_data.items()):
+            self.update_id_set(id_set, id_dict)
+
+        self.update_object_names()
+
+        return
+
+    def update_id_set(self, id_set, id_dict):
+        """
+        Add an id set or apply the differences with its current content
+        The object_names are only extended, see update_object_names
+
+        :param id_set: the name of an aov as a string
+        :param id_dict: dictionary of the id colors of the id set and their
+                        objects
+        :return:
+        """
+
+        root_index = QtCore.QModelIndex()
+
+        set_names = [x.name for x in self._root.children]
+
+        if id_set not in set_names:
+            row = bisect.bisect(set_names, id_set)
+
+            self.beginInsertRows(root_index, row, row)
+            self._root.children.insert(row, TreeNode("set", id_set, row,
+                                                     self._root))
+            self._update_rows(self._root)
+            self.endInsertRows()
+
+            set_names.insert(row, id_set)
+
+        set_node = self._root.children[set_names.index(id_set)]
+        set_index = self.createIndex(set_node.row, 0, self._root)
+
+        self._sync_children(set_node, set_index, get_id_colors(id_dict),
+                            "color")
+
+        for color_node in set_node.children:
+            color_index = self.createIndex(color_node.row, 0, set_node)
+            objects = id_dict.get(color_node.name, [])
+
+            self._sync_objects(color_node, color_index, objects)
+
+            self.object_names.update(objects)
+
+            if self.name_index is not None:
+                self.name_index.add(objects)
+
+        self._object_index = None
+
+        if self._filter_match is not None:
+            self._match_filter()
+
+            for color_node in set_node.children:
+                self._filter_objects(
+                    color_node, self.createIndex(color_node.row, 0, set_node))
+
+        return
+
+    def remove_id_sets(self, id_sets):
+        """
+
+        :param id_sets: list of the names of the id sets to remove
+        :return:
+        """
+
+        id_sets = set(id_sets)
+
+        for set_node in reversed(list(self._root.children)):
+            if set_node.name not in id_sets:
+                continue
+
+            self.beginRemoveRows(QtCore.QModelIndex(), set_node.row,
+                                 set_node.row)
+            del self._root.children[set_node.row]
+            self._update_rows(self._root)
+            self.endRemoveRows()
+
+        self._object_index = None
+
+        return
+
+    def id_sets(self):
+        """
+
+        :return: list of the id set names in the tree order
+        """
+
+        return [x.name for x in self._root.children]
+
+    def update_object_names(self):
+        """
+        Rebuild the object_names from the id colors content
+
+        :return:
+        """
+
+        self.object_names = set()
+        for set_node in self._root.children:
+            for color_node in set_node.children:
+                self.object_names.update(color_node.objects)
+
+        return
+
+    def set_name_index(self, index):
+        """
+        Set the short name index used by the filter, see iter_name_index
+
+        :param index: a name_index.NameIndex of the model objects
+        :return:
+        """
+
+        self.name_index = index
+
+        # The objects shown are the same, only further rows use the index
+        if self._filter_match is not None:
+            self._match_filter()
+
+        return
+
+    def iter_name_index(self, chunk_size=utils.ID_SCAN_CHUNK_SIZE):
+        """
+        Build the short name index of the model objects in chunks, the index
+        is set once complete
+
+        :param chunk_size: number of objects indexed per step
+        :return: generator yielding after each chunk
+        """
+
+        index = name_index.NameIndex()
+
+        object_names = list(self.object_names)
+
+        for start in range(0, len(object_names), chunk_size):
+            index.add(object_names[start:start + chunk_size])
+            yield
+
+        index.join_names()
+        yield
+
+        self.set_name_index(index)
+
+    def set_filter(self, text):
+        """
+        Show only the objects whose short name contains a text, or matches
+        it as a glob pattern, see name_index.NameIndex.match. The id sets
+        and id colors rows are kept, the objects of an id color are only
+        filtered as its rows are populated
+
+        :param text: the filter text, every object is shown if empty
+        :return:
+        """
+
+        self.filter_text = text
+
+        if text:
+            self._match_filter()
+        else:
+            self._filter_match = None
+
+        self._object_index = None
+
+        for set_node in self._root.children:
+            for color_node in set_node.children:
+                self._filter_objects(
+                    color_node, self.createIndex(color_node.row, 0, set_node))
+
+        return
+
+    def _match_filter(self, object_names=None):
+        """
+        Find the objects matching the filter text, the index is built from
+        the model objects if missing
+
+        :param object_names: list of object long names to index first
+        :return:
+        """
+
+        if self.name_index is None:
+            self.name_index = name_index.NameIndex(self.object_names)
+        elif object_names is not None:
+            self.name_index.add(object_names)
+
+        self._filter_match = self.name_index.match(self.filter_text)
+
+        return
+
+    def _filter_objects(self, color_node, color_index, count=0):
+        """
+        Find the rows of an id color again after a filter change, the rows
+        populated before are populated again
+
+        :param color_node: the id color TreeNode
+        :param color_index: the model index of the id color
+        :param count: number of rows to populate at least
+        :return:
+        """
+
+        if self._filter_match is None and color_node.scanned is None:
+            return
+
+        fetched = color_node.fetched
+
+        if fetched:
+            count = max(count, FILTER_FETCH_SIZE)
+
+            self.beginRemoveRows(color_index, 0, fetched - 1)
+            color_node.fetched = 0
+            self.endRemoveRows()
+
+        self._find_shown_objects(color_node, max(count, 1))
+
+        count = min(count, len(color_node.shown))
+
+        if count:
+            self.beginInsertRows(color_index, 0, count - 1)
+            color_node.fetched = count
+            self.endInsertRows()
+        else:
+            self.dataChanged.emit(color_index, color_index)
+
+        return
+
+    def _find_shown_objects(self, color_node, count):
+        """
+        Reset the shown objects of an id color to the filter matches
+
+        :param color_node: the id color TreeNode
+        :param count: number of objects to find at least, if any
+        :return:
+        """
+
+        # The rows of the previous shown objects are indexed no more
+        self._object_index = None
+
+        if self._filter_match is None:
+            color_node.shown = color_node.objects
+            color_node.scanned = None
+        else:
+            color_node.shown = []
+            color_node.scanned = 0
+
+            self._find_more_objects(color_node, count)
+
+        return
+
+    def _find_more_objects(self, color_node, count):
+        """
+        Extend the shown objects of a filtered id color, the rows added are
+        added to the reverse index if built
+
+        :param color_node: the id color TreeNode
+        :param count: number of shown objects to reach, if any
+        :return:
+        """
+
+        if color_node.scanned is None:
+            return
+
+        found, color_node.scanned = self._filter_match.filter(
+            color_node.objects, color_node.scanned,
+            count - len(color_node.shown))
+
+        if self._object_index is not None:
+            for row, object_name in enumerate(found, len(color_node.shown)):
+                self._object_index.setdefault(object_name, []).append(
+                    (color_node, row))
+
+        color_node.shown.extend(found)
+
+        return
+
+    def _sync_children(self, node, index, names, kind):
+        """
+        Remove and insert the set or color child nodes to match a name list
+
+        :param node: the parent TreeNode
+        :param index: the model index of the parent node
+        :param names: the ordered list of child names
+        :param kind: the child nodes kind, set or color
+        :return:
+        """
+
+        names_set = set(names)
+
+        for child in reversed(list(node.children)):
+            if child.name in names_set:
+                continue
+
+            self.beginRemoveRows(index, child.row, child.row)
+            del node.children[child.row]
+            self._update_rows(node)
+            self.endRemoveRows()
+
+        current_names = set(x.name for x in node.children)
+
+        for row, name in enumerate(names):
+            if name in current_names:
+                continue
+
+            objects = [] if kind == "color" else None
+
+            self.beginInsertRows(index, row, row)
+            node.children.insert(row, TreeNode(kind, name, row, node,
+                                               objects))
+            self._update_rows(node)
+            self.endInsertRows()
+
+        return
+
+    def _sync_objects(self, color_node, color_index, objects):
+        """
+        Remove and append object rows of an id color to match a list
+
+        :param color_node: the id color TreeNode
+        :param color_index: the model index of the id color
+        :param objects: the list of object long names of the id color
+        :return:
+        """
+
+        objects_set = set(objects)
+
+        # Filtered rows are found again once synced, see _filter_objects
+        if color_node.scanned is not None:
+            current_objects = set(color_node.objects)
+
+            color_node.objects[:] = \
+                [x for x in color_node.objects if x in objects_set] + \
+                [x for x in objects if x not in current_objects]
+
+            return
+
+        removed_rows = [i for i, x in enumerate(color_node.objects)
+                        if x not in objects_set]
+
+        # Remove the rows in contiguous ranges from the bottom up
+        for first, last in reversed(get_row_ranges(removed_rows)):
+            if first < color_node.fetched:
+                last_fetched = min(last, color_node.fetched - 1)
+
+                self.beginRemoveRows(color_index, first, last_fetched)
+                del color_node.objects[first:last + 1]
+                color_node.fetched -= last_fetched - first + 1
+                self.endRemoveRows()
+            else:
+                del color_node.objects[first:last + 1]
+
+        current_objects = set(color_node.objects)
+
+        added_objects = [x for x in objects if x not in current_objects]
+
+        if not added_objects:
+            return
+
+        # Populate the new rows only if the color is already populated
+        if color_node.fetched and \
+                color_node.fetched == len(color_node.objects):
+            first = color_node.fetched
+
+            self.beginInsertRows(color_index, first,
+                                 first + len(added_objects) - 1)
+            color_node.objects.extend(added_objects)
+            color_node.fetched += len(added_objects)
+            self.endInsertRows()
+        else:
+            color_node.objects.extend(added_objects)
+            self.dataChanged.emit(color_index, color_index)
+
+        return
+
+    def _update_rows(self, node):
+        """
+        Update the row number of the child nodes of a node
+
+        :param node: the parent TreeNode
+        :return:
+        """
+
+        for row, child in enumerate(node.children):
+            child.row = row
+
+        return
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+
+        # Indexes point to their parent node
+        return self.createIndex(row, column, self._node(parent))
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+
+        parent_node = index.internalPointer()
+
+        if parent_node is self._root:
+            return QtCore.QModelIndex()
+
+        return self.createIndex(parent_node.row, 0, parent_node.parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+
+        node = self._node(parent)
+
+        if node is None:
+            return 0
+
+        if node.kind == "color":
+            return node.fetched
+
+        return len(node.children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+
+        if node is None:
+            return False
+
+        if node.kind == "color":
+            return bool(node.shown)
+
+        return bool(node.children)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+
+        if node is None or node.kind != "color":
+            return False
+
+        if node.scanned is not None and node.scanned < len(node.objects):
+            return True
+
+        return node.fetched < len(node.shown)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+
+        self._find_more_objects(node, node.fetched + FETCH_SIZE)
+
+        count = min(FETCH_SIZE, len(node.shown) - node.fetched)
+
+        # The objects left to filter did not match
+        if not count:
+            self.dataChanged.emit(parent, parent)
+            return
+
+        self.beginInsertRows(parent, node.fetched, node.fetched + count - 1)
+        node.fetched += count
+        self.endInsertRows()
+
+        return
+
+    def flags(self, index):
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+        kind = self.index_type(index)
+
+        if kind == "object":
+            flags |= QtCore.Qt.ItemIsDragEnabled
+        elif kind == "color":
+            flags |= QtCore.Qt.ItemIsDropEnabled
+
+        return flags
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and \
+                role == QtCore.Qt.DisplayRole:
+            return "ID SETS"
+
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        kind = self.index_type(index)
+        name = self.index_name(index)
+
+        if role == QtCore.Qt.DisplayRole:
+            if kind == "object":
+                return utils.get_object_short_name(name)
+            return name
+
+        if role == QtCore.Qt.FontRole:
+            if kind == "set":
+                return resources.get_font(11)
+            if kind == "object":
+                return resources.get_font(10)
+
+        if role == QtCore.Qt.DecorationRole and kind == "set":
+            return resources.get_icon("IdSet.png")
+
+        if role == TYPE_ROLE:
+            return kind
+
+        if role == NAME_ROLE:
+            return name
+
+        return None
+
+    def index_type(self, index):
+        """
+
+        :param index: a model index
+        :return: the index type as a string: set, color or object
+        """
+
+        if not index.isValid():
+            return None
+
+        return {"root": "set",
+                "set": "color",
+                "color": "object"}[index.internalPointer().kind]
+
+    def index_name(self, index):
+        """
+
+        :param index: a model index
+        :return: the id set or id color name, or object long name
+        """
+
+        parent_node = index.internalPointer()
+
+        if parent_node.kind == "color":
+            return parent_node.shown[index.row()]
+
+        return parent_node.children[index.row()].name
+
+    def color_index(self, id_set, id_color):
+        """
+
+        :param id_set: the id set name as a string
+        :param id_color: the id color name as a string
+        :return: the model index of the id color
+        """
+
+        for set_node in self._root.children:
+            if set_node.name != id_set:
+                continue
+
+            for color_node in set_node.children:
+                if color_node.name == id_color:
+                    return self.createIndex(color_node.row, 0, set_node)
+
+        return QtCore.QModelIndex()
+
+    def object_indexes(self, object_name):
+        """
+        Get the populated rows of an object
+
+        :param object_name: the object long name as a string
+        :return: list of model indexes
+        """
+
+        if self._object_index is None:
+            self._build_object_index()
+
+        return [self.createIndex(row, 0, color_node)
+                for color_node, row in self._object_index.get(object_name, [])
+                if row < color_node.fetched]
+
+    def _build_object_index(self):
+        """
+        Build the object name to id color rows reverse index
+
+        :return:
+        """
+
+        self._object_index = dict()
+
+        for set_node in self._root.children:
+            for color_node in set_node.children:
+                for row, object_name in enumerate(color_node.shown):
+                    self._object_index.setdefault(object_name, []).append(
+                        (color_node, row))
+
+        return
+
+    def move_objects(self, object_names, id_set, id_color):
+        """
+        Move objects to an id color of their id set
+
+        :param object_names: list of object long names
+        :param id_set: the id set name as a string
+        :param id_color: the name of the id color to move the objects to
+        :return: list of the object names moved
+        """
+
+        object_names = set(object_names)
+
+        self._object_index = None
+
+        drop_index = self.color_index(id_set, id_color)
+        if not drop_index.isValid():
+            return []
+
+        set_node = drop_index.internalPointer()
+
+        filtered = self._filter_match is not None
+
+        moved = []
+
+        for color_node in set_node.children:
+            color_index = self.createIndex(color_node.row, 0, set_node)
+
+            rows = [i for i, x in enumerate(color_node.objects)
+                    if x in object_names]
+
+            moved.extend(color_node.objects[x] for x in rows)
+
+            # Remove the populated rows from the bottom up
+            for row in reversed(rows):
+                if row < color_node.fetched and not filtered:
+                    self.beginRemoveRows(color_index, row, row)
+                    del color_node.objects[row]
+                    color_node.fetched -= 1
+                    self.endRemoveRows()
+                else:
+                    del color_node.objects[row]
+
+        color_node = set_node.children[drop_index.row()]
+
+        if filtered:
+            color_node.objects[0:0] = moved
 
-    def __init__(self, name, parent):
-        QtGui.QTreeWidgetItem.__init__(self, parent)
+            # Find the filtered rows again, the moved objects shown first
+            for node in set_node.children:
+                self._filter_objects(
+                    node, self.createIndex(node.row, 0, set_node),
+                    len(moved) if node is color_node else 0)
+        elif moved:
+            self.beginInsertRows(drop_index, 0, len(moved) - 1)
+            color_node.objects[0:0] = moved
+            color_node.fetched += len(moved)
+            self.endInsertRows()
 
-        short_name = utils.get_object_short_name(name)
-        self.setText(0, short_name)
+        return moved
 
-        font = QtGui.QFont()
-        font.setPointSize(10)
+    def _node(self, index):
+        """
+
+        :param index: a model index
+        :return: the TreeNode of the index, None for object indexes
+        """
+
+        if not index.isValid():
+            return self._root
 
-        self.setFont(0, font)
-        self.setData(0, QtCore.Qt.UserRole, "object")
-        self.setData(1, QtCore.Qt.UserRole, name)
+        parent_node = index.internalPointer()
 
+        if parent_node.kind == "color":
+            return None
 
-class ElementGroupItem(QtGui.QTreeWidgetItem):
+        return parent_node.children[index.row()]
+
+
+class CooperativeTask(QtCore.QObject):
     """
-    Tree Widget Item class used for the id color parents
+    Run the steps of a generator from the Qt event loop
+
+    Steps run on the main thread, as maya.cmds requires, in ticks of at most
+    the budget in milliseconds and the ui events are processed between the
+    ticks. A single step longer than the budget still runs to completion so
+    the steps should be kept short. The first tick runs once control
+    returns to the event loop so signals can be connected after start
 
     """
 
-    def __init__(self, name, parent, tree):
-        QtGui.QTreeWidgetItem.__init__(self, parent)
+    finished = QtCore.Signal()
+    canceled = QtCore.Signal()
+
+    def __init__(self, steps, function, budget=40, parent=None):
+        super(CooperativeTask, self).__init__(parent)
+
+        self.function = function
+        self.budget = budget
+
+        self.ticks = 0
+        self.steps_run = 0
+        self.longest_tick = 0.0
+
+        self._steps = iter(steps)
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._tick)
+
+    def set_budget(self, budget):
+        """
+
+        :param budget: the longest time of a tick in milliseconds
+        :return:
+        """
+
+        self.budget = budget
+
+        return
+
+    def start(self):
+        """
+        Run the steps from the event loop
+
+        :return:
+        """
+
+        self._timer.start()
+
+        return
+
+    def cancel(self):
+        """
+        Stop running the steps, the remaining steps are dropped
+
+        :return:
+        """
+
+        if not self._timer.isActive():
+            return
+
+        self._timer.stop()
+
+        if hasattr(self._steps, "close"):
+            self._steps.close()
+
+        self.canceled.emit()
+
+        return
+
+    def is_running(self):
+        """
+
+        :return: True if steps remain to run
+        """
+
+        return self._timer.isActive()
+
+    def stats(self):
+        """
+
+        :return: dictionary with the ticks and steps run and the longest
+                 tick in milliseconds
+        """
+
+        return {"ticks": self.ticks,
+                "steps_run": self.steps_run,
+                "longest_tick": self.longest_tick * 1000}
+
+    def _tick(self):
+        start = timer()
+        deadline = start + self.budget / 1000.0
+
+        try:
+            while True:
+                step = next(self._steps)
+                self.steps_run += 1
 
-        self.tree = tree
+                self.function(step)
 
-        self.color_button = QtGui.QPushButton(name, self.tree)
+                if timer() >= deadline or not self._timer.isActive():
+                    break
 
-        button_colors = {"Alpha": "#666666",
-                         "Red": "#ff0000",
-                         "Green": "#097709",
-                         "Blue": "#0000ff",
-                         "Holdout": "#000000",
-                         "Alpha_Neg": "#888888",
-                         "Red_Neg": "#ff2222",
-                         "Green_Neg": "#099909",
-                         "Blue_Neg": "#3333ff"
-                         }
+        except StopIteration:
+            self._timer.stop()
+            self.finished.emit()
 
-        self.color_button.setFixedSize(70, 20)
-        self.color_button.setStyleSheet("background-color: %s"
-                                        % button_colors.get(name, "#52869e"))
+        except Exception:
+            self._timer.stop()
+            raise
 
-        self.setData(0, QtCore.Qt.UserRole, "color")
-        self.setData(1, QtCore.Qt.UserRole, name)
+        finally:
+            self.ticks += 1
+            self.longest_tick = max(self.longest_tick, timer() - start)
 
-        self.tree.setItemWidget(self, 0, self.color_button)
+        return
 
 
-class IdSetTreeView(QtGui.QTreeWidget):
+class IdSetTreeView(QtGui.QTreeView):
     """
     Tree view for the id set found
     Includes the each id set colors and the objects added to each color
 
+    The id sets are scanned cooperatively from the Qt event loop, each id
+    set being shown once scanned, then the object short names are indexed
+    for the filter. population_progress reports the objects scanned and
+    population_finished is sent once every id set is shown
+
     """
 
-    def __init__(self, aov_list, parent=None):
+    population_progress = QtCore.Signal(int, int)
+    population_finished = QtCore.Signal()
+
+    # Longest time of a population tick in milliseconds
+    tick_budget = 40
+
+    # Number of objects read per population step
+    scan_chunk_size = utils.ID_SCAN_CHUNK_SIZE
+
+    def __init__(self, aov_list, parent=None, id_cache=None,
+                 render_layer=None):
         super(IdSetTreeView, self).__init__(parent)
 
         self.aov_list = aov_list
+        self.id_cache = id_cache
+        self.render_layer = render_layer
 
         self.ui = parent
-        self.items_dict = dict()
 
         self.selectSignalBlocked = False
 
+        self.scnData = dict()
+        self.population_task = None
+
+        self.id_model = IdSetTreeModel(self)
+        self.setModel(self.id_model)
+
         self.setDragDropMode(QtGui.QAbstractItemView.DragDrop)
         self.setDefaultDropAction(QtCore.Qt.IgnoreAction)
 
         self.setSelectionMode(QtGui.QAbstractItemView.ExtendedSelection)
+        self.setUniformRowHeights(True)
+
+        # Paint the id color swatches instead of a button widget per color
+        self.color_delegate = IdColorDelegate(self)
+        self.color_delegate.color_clicked.connect(self._add_items_to_color)
+        self.setItemDelegate(self.color_delegate)
 
-        self.headerItem().setText(0, "ID SETS")
+        selection_model = self.selectionModel()
+        selection_model.selectionChanged.connect(self._select_scene_objects)
 
         if self.aov_list is None:
             return
 
-        self.scnData = utils.id_objects_dict(self.aov_list)
-
         self._ui_content()
 
-        selection_model = self.selectionModel()
-        selection_model.selectionChanged.connect(self._select_scene_objects)
+    def _iter_id_data(self):
+        """
 
-    def _ui_content(self):
+        :return: generator of the id scan steps for the tree aov list
         """
-        Set the ui content
 
+        if not self.aov_list:
+            return iter([])
+
+        if self.id_cache is None:
+            return utils.iter_id_objects_dict(self.aov_list,
+                                              self.scan_chunk_size)
+
+        return self.id_cache.iter_id_objects_dict(
+            self.aov_list, render_layer=self.render_layer,
+            chunk_size=self.scan_chunk_size)
+
+    def _iter_population(self):
+        """
+
+        :return: generator of the id scan steps followed by the steps
+                 indexing the object short names
+        """
+
+        for step in self._iter_id_data():
+            yield step
+
+        for _ in self.id_model.iter_name_index(self.scan_chunk_size):
+            yield 0, 0, None, None
+
+    def _populate(self):
+        """
+        Scan the id sets of the tree aov list from the event loop, the
+        population running is canceled
+
+        :return:
+        """
+
+        self.cancel_population()
+
+        self.scnData = dict()
+
+        self._remove_stale_id_sets()
+
+        self.population_task = CooperativeTask(
+            self._iter_population(),
+            self._population_step,
+            budget=self.tick_budget,
+            parent=self)
+        self.population_task.finished.connect(self._population_finished)
+        self.population_task.start()
+
+        return
+
+    def _population_step(self, step):
+        """
+        Show an id set once scanned
+
+        :param step: the scanned, total, id set and id colors step tuple
         :return:
         """
 
-        # Cleat the tree
-        self.clear()
+        scanned, total, id_set, id_dict = step
+
+        if id_set is not None:
+            self.scnData[id_set] = id_dict
+
+            # Block the selection signals while rows are removed
+            self.selectSignalBlocked = True
 
-        # Set the font
-        font = QtGui.QFont()
-        font.setPointSize(11)
+            self.id_model.update_id_set(id_set, id_dict)
 
-        # Add the id sets and set items
-        for id_set, id_dict in sorted(self.scnData.items()):
-            tree_item = QtGui.QTreeWidgetItem(self)
+            self.selectSignalBlocked = False
 
-            tree_item.setText(0, id_set)
-            tree_item.setFont(0, font)
+        self.population_progress.emit(scanned, total)
+
+        return
+
+    def _population_finished(self):
+        """
+        Remove the id sets no longer listed once every id set is shown
 
-            icon_folder = os.path.dirname(os.path.abspath(__file__))
-            icon_path = os.path.join(icon_folder, "icons", "IdSet.png")
+        :return:
+        """
 
-            tree_item.setIcon(0, QtGui.QIcon(icon_path))
+        self.selectSignalBlocked = True
 
-            tree_item.setData(0, QtCore.Qt.UserRole, "set")
-            tree_item.setData(1, QtCore.Qt.UserRole, id_set)
+        self.id_model.remove_id_sets([x for x in self.id_model.id_sets()
+                                      if x not in self.scnData])
+        self.id_model.update_object_names()
 
-            for id_color, id_objects in sorted(id_dict.items()):
-                if id_color != "Holdout":
-                    self._add_id_color(id_objects,
-                                       id_color,
-                                       tree_item)
+        self.selectSignalBlocked = False
 
-            self._add_id_color(id_dict["Holdout"], "Holdout", tree_item)
+        self.population_finished.emit()
 
         return
 
-    def _add_id_color(self, id_objects, id_color, parent):
+    def is_populating(self):
         """
 
-        Add the id color and the objects items for this color
+        :return: True if id sets remain to be scanned
+        """
+
+        return self.population_task is not None and \
+            self.population_task.is_running()
+
+    def cancel_population(self):
+        """
+        Stop scanning the id sets, the id sets already shown are kept
 
-        :param id_objects: objects to be added to the id_color
-        :type id_objects: list
-        :param id_color: id_color name
-        :type id_color: string
-        :param parent: tree widget item parent
         :return:
         """
 
-        id_item = ElementGroupItem(id_color, parent, self)
-        id_item.color_button.clicked.connect(lambda:
-                                             self._add_items_to_color(id_item))
+        if self.population_task is None:
+            return
 
-        for obj in id_objects:
-            object_item = ElementItem(obj, id_item)
+        self.population_task.cancel()
+        self.population_task = None
 
-            if self.items_dict.get(obj, None) is None:
-                self.items_dict[obj] = {parent: object_item}
-            else:
-                self.items_dict[obj][parent] = object_item
+        self._remove_stale_id_sets()
+        self.id_model.update_object_names()
+
+        return
+
+    def _remove_stale_id_sets(self):
+        """
+        Remove the id sets which are not scanned for the tree aov list, so
+        they cannot be edited while the other id sets are scanned
+
+        :return:
+        """
+
+        aov_list = self.aov_list or []
+
+        # Block the selection signals while rows are removed
+        self.selectSignalBlocked = True
+
+        self.id_model.remove_id_sets([x for x in self.id_model.id_sets()
+                                      if x not in aov_list])
+
+        self.selectSignalBlocked = False
+
+        return
+
+    def set_filter(self, text):
+        """
+        Show only the objects whose short name matches a text, see
+        IdSetTreeModel.set_filter
+
+        :param text: a substring or glob pattern, every object is shown if
+                     empty
+        :return:
+        """
+
+        # Block the selection signals while rows are removed
+        self.selectSignalBlocked = True
+
+        self.id_model.set_filter(text)
+
+        self.selectSignalBlocked = False
+
+        return
+
+    def update_content(self, aov_list, render_layer=None):
+        """
+        Update the tree against a new scan applying only the differences
+        with the current content. The id sets of another render layer are
+        cleared first, their values would be edited on the new layer
+
+        :param aov_list: a list of aov names
+        :param render_layer: the render layer name, the current layer if None
+        :return:
+        """
+
+        if render_layer != self.render_layer:
+            self.cancel_population()
+
+            self.selectSignalBlocked = True
+            self.id_model.set_id_data(dict())
+            self.selectSignalBlocked = False
+
+        self.aov_list = aov_list
+        self.render_layer = render_layer
+
+        self._populate()
+
+        return
+
+    def _ui_content(self):
+        """
+        Set the ui content
+
+        :return:
+        """
+
+        self.id_model.set_id_data(dict())
+
+        self._populate()
+
+        return
+
+    def selected_object_names(self):
+        """
+
+        :return: list of the object long names selected in the tree
+        """
+
+        return [x.data(NAME_ROLE) for x in self.selectionModel().selectedIndexes()
+                if x.data(TYPE_ROLE) == "object"]
+
+    def select_objects(self, object_names):
+        """
+        Select the tree rows of a list of objects with a single selection
+        change. Only the rows of expanded id sets are selected
+
+        :param object_names: list of object long names
+        :return:
+        """
+
+        color_rows = dict()
+
+        for object_name in object_names:
+            for index in self.id_model.object_indexes(object_name):
+                color_index = index.parent()
+                color_rows.setdefault(QtCore.QPersistentModelIndex(color_index),
+                                      []).append(index.row())
+
+        selection = QtGui.QItemSelection()
+
+        for color_index, rows in color_rows.items():
+            color_index = QtCore.QModelIndex(color_index)
+
+            if not self.isExpanded(color_index.parent()):
+                continue
+
+            for first, last in get_row_ranges(sorted(rows)):
+                selection.select(self.id_model.index(first, 0, color_index),
+                                 self.id_model.index(last, 0, color_index))
+
+        self.selectionModel().select(selection,
+                                     QtGui.QItemSelectionModel.ClearAndSelect)
 
         return
 
@@ -167,10 +1347,23 @@ class IdSetTreeView(QtGui.QTreeWidget):
         :return:
         """
 
-        selected_items = [x for x in self.selectedItems() \
-                          if x.data(0, QtCore.Qt.UserRole) == "object"] or None
+        if not self.selected_object_names():
+            event.ignore()
+            return
 
-        if selected_items is None:
+        event.accept()
+
+    def dragMoveEvent(self, event):
+        """
+        PySide drag move event - only id colors accept drops
+
+        :param event:
+        :return:
+        """
+
+        drop_index = self.indexAt(event.pos())
+
+        if drop_index.data(TYPE_ROLE) != "color":
             event.ignore()
             return
 
@@ -185,71 +1378,67 @@ class IdSetTreeView(QtGui.QTreeWidget):
         """
 
         # Get the id color to drop the items into
-        drop_id_color = self.itemAt(event.pos())
-        drop_id_color = self.invisibleRootItem() \
-                        if drop_id_color is None else drop_id_color
-
-        # If the drop position is not valid we pass
-        if drop_id_color is None:
-            event.ignore()
-            return
+        drop_id_color = self.indexAt(event.pos())
 
         # If the drop position is not an id color item we pass
-        if drop_id_color.data(0, QtCore.Qt.UserRole) != "color":
+        if drop_id_color.data(TYPE_ROLE) != "color":
             event.ignore()
             return
 
-        # Get the drop items - the selected tree items
-        drop_items = [x for x in self.selectedItems()
-                      if x.data(0, QtCore.Qt.UserRole) == "object"] or None
+        # Get the drop items - the selected objects of the drop id set
+        drop_names = [x.data(NAME_ROLE)
+                      for x in self.selectionModel().selectedIndexes()
+                      if x.data(TYPE_ROLE) == "object"
+                      and x.parent().parent() == drop_id_color.parent()]
 
         # If not items selected we pass
-        if drop_items is None:
+        if not drop_names:
             event.ignore()
             return
 
         # Drop the items into the new tree parent
-        self._drop_tree_items(drop_items, drop_id_color)
+        self._drop_tree_items(drop_names, drop_id_color)
 
         event.accept()
 
         return None
 
-    def _drop_tree_items(self, drop_items, drop_id_color):
+    def _drop_tree_items(self, drop_names, drop_id_color):
         """
-        Drop tree widget items to a new parent
+        Move objects to a new id color
 
-        :param drop_items: list of tree items to drop
-        :param drop_id_color: tree widget item to drop into
+        :param drop_names: list of object long names to drop
+        :param drop_id_color: model index of the id color to drop into
         :return:
         """
 
         # Block the selection signals while we process the drop
         self.selectSignalBlocked = True
 
-        # Get the drop id color parent - the aov id tree widget item
-        drop_id_set = drop_id_color.parent()
+        id_set = drop_id_color.parent().data(NAME_ROLE)
+        id_color = drop_id_color.data(NAME_ROLE)
 
-        # Drop the items into the new parent
-        for item in drop_items:
-            if item.parent().parent().text(0) != drop_id_color.parent().text(0):
-                drop_items.remove(item)
-            else:
-                item.parent().removeChild(item)
+        # Run the whole drop as a single undoable edit
+        with utils.id_edit_transaction("idManagerDrop"):
+            # Drop the items into the new parent
+            moved = self.id_model.move_objects(drop_names, id_set, id_color)
+
+            # Set new idColor for all the dropped items at once
+            utils.set_attribute_ids(moved, id_set, id_color)
 
-                drop_id_color.insertChildren(0, drop_items)
+        # Set the dropped rows as selected
+        drop_id_color = self.id_model.color_index(id_set, id_color)
 
-        # Set the items as selected
-        for item in drop_items:
-            item.setSelected(True)
+        if moved:
+            selection = QtGui.QItemSelection(
+                self.id_model.index(0, 0, drop_id_color),
+                self.id_model.index(len(moved) - 1, 0, drop_id_color))
 
-            # Set new idColor - need to optimize!
-            utils.set_attribute_id(item.data(1, QtCore.Qt.UserRole),
-                                   drop_id_set.data(1, QtCore.Qt.UserRole),
-                                   drop_id_color.data(1, QtCore.Qt.UserRole))
+            self.selectionModel().select(selection,
+                                         QtGui.QItemSelectionModel.Select)
 
         # Set the new parent as expanded so we can see the dropped items
-        drop_id_color.setExpanded(True)
+        self.expand(drop_id_color)
 
         # Unblock the selection change signals
         self.selectSignalBlocked = False
@@ -258,28 +1447,21 @@ class IdSetTreeView(QtGui.QTreeWidget):
 
     def _add_items_to_color(self, drop_id_color):
         """
-        Update the drop id color tree item's list
+        Move the selected objects to an id color
 
-        :param drop_id_color: tree widget item for the drop id color
+        :param drop_id_color: model index of the id color to drop into
         :return:
         """
 
         # Get the drop item names
-        selected_items = self.selectedItems()
-
-        drop_names = [x.data(1, QtCore.Qt.UserRole) for x in selected_items
-                      if x.data(0, QtCore.Qt.UserRole) == "object"] or None
+        drop_names = list(set(self.selected_object_names()))
 
         # If no drop items return
-        if drop_names is None:
+        if not drop_names:
             return
 
-        # Get the tree widget items for the drop names
-        drop_list = [self.items_dict[drop_name][drop_id_color.parent()]
-                     for drop_name in list(set(drop_names))]
-
-        # Update the id color tree widget content list
-        self._drop_tree_items(drop_list, drop_id_color)
+        # Update the id color content list
+        self._drop_tree_items(drop_names, drop_id_color)
 
         return None
 
@@ -295,9 +1477,8 @@ class IdSetTreeView(QtGui.QTreeWidget):
             return
 
         # Get the tree selected items which exist inside the maya scene
-        selected_items = [x.data(1, QtCore.Qt.UserRole)
-                          for x in self.selectedItems()
-                          if utils.object_exists(str(x.text(0)))] or None
+        selected_items = [x for x in self.selected_object_names()
+                          if utils.object_exists(x)] or None
 
         # If not valid items selected we pass
         if selected_items is None:
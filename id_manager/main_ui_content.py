@@ -14,6 +14,15 @@ class LayersOptions(object):
         self.ui = ui
         self.ui_content()
 
+        # UI Signals - connected once, ui_content is called on every refresh
+        self.ui.connect(self.ui.cb_layers,
+                        QtCore.SIGNAL("currentIndexChanged(int)"),
+                        self._render_layer_switch_callback)
+
+        self.ui.connect(self.ui.cb_AOV,
+                        QtCore.SIGNAL("currentIndexChanged(int)"),
+                        self._aov_switch_callback)
+
     def ui_content(self):
         """
         Set the ui content
@@ -27,14 +36,7 @@ class LayersOptions(object):
         # Fill AOV Combo
         self._aov_combo()
 
-        # UI Signals
-        self.ui.connect(self.ui.cb_layers,
-                        QtCore.SIGNAL("currentIndexChanged(int)"),
-                        self._render_layer_switch_callback)
-
-        self.ui.connect(self.ui.cb_AOV,
-                        QtCore.SIGNAL("currentIndexChanged(int)"),
-                        self._aov_switch_callback)
+        return
 
     def _render_layers_combo(self):
         """
@@ -102,7 +104,10 @@ class LayersOptions(object):
 
         render_layer = str(self.ui.cb_layers.currentText())
 
-        cmds.editRenderLayerGlobals(currentRenderLayer=render_layer)
+        # The layer adjustments applied by the switch are cached per layer,
+        # they do not make the cached objects dirty
+        with self.ui.suspend_cache_callbacks():
+            cmds.editRenderLayerGlobals(currentRenderLayer=render_layer)
 
         self.idLayers = utils.get_layers_aovs()
         self._aov_combo()
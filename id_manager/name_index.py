@@ -0,0 +1,370 @@
+"""
+Object short name index for the id sets tree filter
+
+The lower case short names are indexed by their trigrams, the three
+character substrings. A filter text only checks the names listed under its
+rarest trigram instead of every object. Texts with glob characters are
+matched against the whole short name, fnmatch style, using the trigrams of
+their literal parts. Texts without trigrams are searched in the short names
+joined as one string
+
+Texts matching too many names to list on each keystroke, like a single
+character, give a NameMatch testing the objects on demand, so only the
+objects shown are tested, see NameMatch.filter
+
+"""
+
+import bisect
+import itertools
+import re
+
+import utils
+
+
+GLOB_CHARACTERS = "*?["
+
+# Most objects listed by a match, the objects of larger matches are tested
+# when shown
+MATCH_LIST_SIZE = 2000
+
+# Most names checked one by one when matching
+MATCH_CHECK_SIZE = 20000
+
+# Glob wildcards and character sets, splitting the literal parts of a pattern
+_GLOB_WILDCARDS = re.compile(r"\*|\?|\[[^\]]*\]?")
+
+
+class NameIndex(object):
+    """
+    Trigram index of the object short names, case insensitive
+    Objects can be added but not removed, the matches are only used to
+    narrow the objects listed somewhere else
+
+    """
+
+    __slots__ = ("short_names", "long_names", "object_ids", "_ids",
+                 "_trigrams", "_text", "_line_starts")
+
+    def __init__(self, object_names=()):
+        # Unique lower case short names, their objects and the short name id
+        # of each object
+        self.short_names = []
+        self.long_names = []
+        self.object_ids = dict()
+
+        self._ids = dict()
+        self._trigrams = dict()
+
+        # Short names joined by new lines, see join_names
+        self._text = None
+        self._line_starts = None
+
+        self.add(object_names)
+
+    def __len__(self):
+        return len(self.object_ids)
+
+    def add(self, object_names):
+        """
+        Add objects to the index, objects already indexed are skipped
+
+        :param object_names: list of object long names
+        :return:
+        """
+
+        for object_name in object_names:
+            if object_name in self.object_ids:
+                continue
+
+            short_name = utils.get_object_short_name(object_name).lower()
+
+            name_id = self._ids.get(short_name)
+
+            if name_id is None:
+                name_id = self._ids[short_name] = len(self.short_names)
+                self.short_names.append(short_name)
+                self.long_names.append([])
+
+                for trigram in get_trigrams(short_name):
+                    postings = self._trigrams.get(trigram)
+                    if postings is None:
+                        postings = self._trigrams[trigram] = []
+
+                    postings.append(name_id)
+
+                self._text = None
+
+            self.object_ids[object_name] = name_id
+            self.long_names[name_id].append(object_name)
+
+        return
+
+    def join_names(self):
+        """
+        Join the short names searched by the texts without trigrams, only
+        done again once new short names are added
+
+        :return:
+        """
+
+        if self._text is not None:
+            return
+
+        self._text = "\n%s\n" % "\n".join(self.short_names)
+
+        self._line_starts = []
+        position = 1
+        for short_name in self.short_names:
+            self._line_starts.append(position)
+            position += len(short_name) + 1
+
+        return
+
+    def match(self, text):
+        """
+
+        :param text: a substring of the short names, or a glob pattern of
+                     the whole short names if it has glob characters
+        :return: the NameMatch of the objects matching
+        """
+
+        text = text.lower()
+
+        if any(x in text for x in GLOB_CHARACTERS):
+            literals = _GLOB_WILDCARDS.split(text)
+
+            try:
+                regex = get_glob_regex(text)
+                line_regex = get_glob_regex(text, "\n", "(?=\n)")
+            except re.error:
+                # Reversed character ranges, like [z-a], match nothing
+                return NameMatch(self, objects=set())
+        else:
+            literals = [text]
+            regex = line_regex = re.compile(re.escape(text))
+
+        candidates = self._find_candidates(literals)
+
+        if candidates is None:
+            name_ids = self._search_names(line_regex)
+        else:
+            short_names = self.short_names
+            name_ids = [x for x in candidates
+                        if regex.search(short_names[x])]
+
+        if name_ids is None:
+            return NameMatch(self, regex=regex)
+
+        if len(name_ids) > MATCH_LIST_SIZE:
+            return NameMatch(self, name_ids=set(name_ids))
+
+        long_names = self.long_names
+
+        return NameMatch(self, objects=set(itertools.chain.from_iterable(
+            long_names[x] for x in name_ids)))
+
+    def _find_candidates(self, literals):
+        """
+
+        :param literals: list of lower case texts
+        :return: list of the ids of the short names listed under the rarest
+                 trigram of the texts, None if more than MATCH_CHECK_SIZE
+        """
+
+        trigrams = set()
+        for literal in literals:
+            trigrams.update(get_trigrams(literal))
+
+        if not trigrams:
+            return None
+
+        # Any name containing the texts is listed under each trigram
+        name_ids = min((self._trigrams.get(x, []) for x in trigrams),
+                       key=len)
+
+        if len(name_ids) > MATCH_CHECK_SIZE:
+            return None
+
+        return name_ids
+
+    def _search_names(self, regex):
+        """
+        Search the short names joined by new lines, with a new line before
+        the first name and after the last one
+
+        :param regex: a compiled regex, not matching across lines but the
+                      new lines around a name
+        :return: list of the ids of the short names matching, None if more
+                 than MATCH_LIST_SIZE
+        """
+
+        # A pattern matching everywhere, like *, lists every name
+        if not regex.pattern:
+            return None
+
+        self.join_names()
+
+        name_ids = []
+
+        for match in regex.finditer(self._text):
+            # The last character matched is in the name
+            name_id = bisect.bisect(self._line_starts, match.end() - 1) - 1
+
+            if not name_ids or name_ids[-1] != name_id:
+                if len(name_ids) == MATCH_LIST_SIZE:
+                    return None
+
+                name_ids.append(name_id)
+
+        return name_ids
+
+
+class NameMatch(object):
+    """
+    Objects matching a filter text, either listed, found from the ids of
+    the short names matching or tested with the text regex
+
+    """
+
+    __slots__ = ("objects", "name_ids", "regex", "_short_names",
+                 "_object_ids")
+
+    def __init__(self, index, objects=None, name_ids=None, regex=None):
+        # Set of the long names matching
+        self.objects = objects
+
+        # Set of the ids of the short names matching
+        self.name_ids = name_ids
+
+        # Regex searched in the short names if not listed
+        self.regex = regex
+
+        self._short_names = index.short_names
+        self._object_ids = index.object_ids
+
+    def __contains__(self, object_name):
+        if self.objects is not None:
+            return object_name in self.objects
+
+        name_id = self._object_ids.get(object_name)
+
+        if name_id is None:
+            return False
+
+        if self.name_ids is not None:
+            return name_id in self.name_ids
+
+        return self.regex.search(self._short_names[name_id]) is not None
+
+    def filter(self, objects, start=0, limit=None):
+        """
+        Find the objects matching in a list, from a position
+
+        :param objects: list of object long names
+        :param start: the position of the first object to check
+        :param limit: the most objects to find, all objects if None
+        :return: list of the objects matching and the position of the next
+                 object to check
+        """
+
+        if self.objects is not None:
+            matches = self.objects
+
+            if not matches:
+                return [], len(objects)
+
+            if start:
+                objects = objects[start:]
+
+            return [x for x in objects if x in matches], start + len(objects)
+
+        object_ids = self._object_ids
+        short_names = self._short_names
+
+        name_ids = self.name_ids
+        search = self.regex.search if self.regex is not None else None
+
+        found = []
+        position = start
+
+        # Only check the objects needed to reach the limit
+        while position < len(objects) and \
+                (limit is None or len(found) < limit):
+            name_id = object_ids.get(objects[position])
+
+            if name_id is None:
+                pass
+            elif name_ids is not None:
+                if name_id in name_ids:
+                    found.append(objects[position])
+            elif search(short_names[name_id]) is not None:
+                found.append(objects[position])
+
+            position += 1
+
+        return found, position
+
+
+def get_glob_regex(pattern, start="^", end="$"):
+    """
+    Translate a glob pattern to a regex searching whole names, fnmatch style
+    Leading and trailing * are left out of the regex instead of anchoring it
+
+    :param pattern: a glob pattern, * ? and [] sets
+    :param start: the regex anchoring the start of a name
+    :param end: the regex anchoring the end of a name
+    :return: the compiled regex
+    """
+
+    stripped = pattern.strip("*")
+
+    parts = ["" if pattern.startswith("*") else start]
+
+    position = 0
+    while position < len(stripped):
+        character = stripped[position]
+        position += 1
+
+        if character == "*":
+            parts.append("[^\n]*")
+        elif character == "?":
+            parts.append("[^\n]")
+        elif character == "[":
+            # A closing bracket first in the set is part of it
+            set_end = position
+            if set_end < len(stripped) and stripped[set_end] == "!":
+                set_end += 1
+            if set_end < len(stripped) and stripped[set_end] == "]":
+                set_end += 1
+            set_end = stripped.find("]", set_end)
+
+            if set_end == -1:
+                parts.append("\\[")
+                continue
+
+            characters = stripped[position:set_end].replace("\\", "\\\\")
+            characters = characters.replace("[", "\\[")
+            position = set_end + 1
+
+            if characters.startswith("!"):
+                parts.append("[^\n%s]" % characters[1:])
+            elif characters.startswith("^"):
+                parts.append("[\\%s]" % characters)
+            else:
+                parts.append("[%s]" % characters)
+        else:
+            parts.append(re.escape(character))
+
+    parts.append("" if pattern.endswith("*") else end)
+
+    return re.compile("".join(parts))
+
+
+def get_trigrams(text):
+    """
+
+    :param text: a string
+    :return: set of the three character substrings of the text
+    """
+
+    return set(text[i:i + 3] for i in range(len(text) - 2))
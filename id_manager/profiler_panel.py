@@ -0,0 +1,176 @@
+from PySide import QtGui, QtCore
+
+import cmds_profiler
+import pyside_util
+
+
+class ProfilerPanel(QtGui.QDockWidget):
+    """
+    Dockable panel showing the cmds profiler report
+
+    The report is refreshed every refresh_interval milliseconds while the
+    panel is visible
+
+    """
+
+    refresh_interval = 1000
+
+    columns = ["Command", "Count", "Total ms", "Max ms", "Slowest call"]
+
+    def __init__(self, parent=None):
+        super(ProfilerPanel, self).__init__("ID Manager Profiler", parent)
+
+        self.setObjectName("idManagerProfilerPanel")
+        self.setAllowedAreas(QtCore.Qt.AllDockWidgetAreas)
+
+        widget = QtGui.QWidget(self)
+        layout = QtGui.QVBoxLayout(widget)
+
+        self.report_tree = QtGui.QTreeWidget(widget)
+        self.report_tree.setHeaderLabels(self.columns)
+        self.report_tree.setSortingEnabled(True)
+        layout.addWidget(self.report_tree)
+
+        buttons_layout = QtGui.QHBoxLayout()
+
+        self.btn_reset = QtGui.QPushButton("Reset", widget)
+        self.btn_reset.clicked.connect(self._reset)
+        buttons_layout.addWidget(self.btn_reset)
+
+        self.btn_dump = QtGui.QPushButton("Save Report...", widget)
+        self.btn_dump.clicked.connect(self._dump)
+        buttons_layout.addWidget(self.btn_dump)
+
+        layout.addLayout(buttons_layout)
+
+        self.setWidget(widget)
+
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(self.refresh_interval)
+        self.refresh_timer.timeout.connect(self.update_report)
+
+    def showEvent(self, event):
+        self.update_report()
+        self.refresh_timer.start()
+
+        super(ProfilerPanel, self).showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+
+        super(ProfilerPanel, self).hideEvent(event)
+
+    def update_report(self):
+        """
+        Fill the tree with the commands, and their call sites as children
+
+        :return:
+        """
+
+        profiler = cmds_profiler.get_profiler()
+        if profiler is None:
+            return
+
+        report = profiler.report()
+
+        call_sites = dict()
+        for stats in report["call_sites"]:
+            call_sites.setdefault(stats["command"], []).append(stats)
+
+        self.report_tree.setUpdatesEnabled(False)
+        self.report_tree.clear()
+
+        for stats in report["commands"]:
+            command_item = self._stats_item(stats["command"], stats)
+            self.report_tree.addTopLevelItem(command_item)
+
+            for site_stats in call_sites.get(stats["command"], []):
+                command_item.addChild(self._stats_item(site_stats["call_site"],
+                                                       site_stats))
+
+        self.report_tree.setUpdatesEnabled(True)
+
+        return
+
+    def _stats_item(self, name, stats):
+        """
+
+        :param name: the command or call site name
+        :param stats: the stats dictionary of the report
+        :return: the QTreeWidgetItem of the stats
+        """
+
+        item = QtGui.QTreeWidgetItem()
+        item.setText(0, name)
+
+        # Numeric values so the columns sort by value
+        item.setData(1, QtCore.Qt.DisplayRole, stats["count"])
+        item.setData(2, QtCore.Qt.DisplayRole,
+                     round(stats["total"] * 1000, 2))
+        item.setData(3, QtCore.Qt.DisplayRole, round(stats["max"] * 1000, 2))
+
+        if stats["slowest"]:
+            item.setText(4, stats["slowest"][0][1])
+
+        item.setToolTip(4, "\n".join("%.2f ms: %s" % (x * 1000, y)
+                                     for x, y in stats["slowest"]))
+
+        return item
+
+    def _reset(self):
+        """
+        Clear the recorded calls
+
+        :return:
+        """
+
+        profiler = cmds_profiler.get_profiler()
+        if profiler is not None:
+            profiler.reset()
+
+        self.update_report()
+
+        return
+
+    def _dump(self):
+        """
+        Save the report to a text or json file
+
+        :return:
+        """
+
+        profiler = cmds_profiler.get_profiler()
+        if profiler is None:
+            return
+
+        file_path = QtGui.QFileDialog.getSaveFileName(
+            self,
+            "Save Profiler Report",
+            "id_manager_profile.txt",
+            "Text (*.txt);;Json (*.json)")[0]
+
+        if file_path:
+            profiler.dump(file_path)
+
+        return
+
+
+def show_profiler_panel():
+    """
+    Dock the profiler panel in the Maya main window
+
+    :return: the ProfilerPanel
+    """
+
+    main_window = pyside_util.get_maya_main_window()
+
+    panel = main_window.findChild(ProfilerPanel, "idManagerProfilerPanel")
+
+    if panel is None:
+        panel = ProfilerPanel(main_window)
+        main_window.addDockWidget(QtCore.Qt.RightDockWidgetArea, panel)
+
+    panel.show()
+    panel.raise_()
+
+    return panel
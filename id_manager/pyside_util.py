@@ -27,6 +27,17 @@ def get_maya_window_by_name(maya_dialog):
     return parent_win
 
 
+def get_maya_main_window():
+    """
+
+    :return: the Maya main window as a QMainWindow
+    """
+
+    main_win_pointer = apiUI.MQtUtil.mainWindow()
+
+    return wrapInstance(long(main_win_pointer), QtGui.QMainWindow)
+
+
 def display_message_box(window_title,
                         text,
                         info_text=None,
@@ -98,3 +109,76 @@ def set_linux_window_flags(dialog, modal=False):
     move_widget_screen_center(dialog)
 
     return
+
+
+class EventDebouncer(QtCore.QObject):
+    """
+    Collapse bursts of events into a single call of a function
+
+    Every trigger restarts a timer of the debounce window and the function
+    only runs once the window passes without new events. Triggers are
+    queued through the Qt event loop so they can be sent from any thread,
+    the function always runs on the main thread
+
+    """
+
+    _triggered = QtCore.Signal()
+
+    def __init__(self, function, window=50, parent=None):
+        super(EventDebouncer, self).__init__(parent)
+
+        self.function = function
+
+        self.events_received = 0
+        self.updates_run = 0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(window)
+        self._timer.timeout.connect(self._run)
+
+        self._triggered.connect(self._restart, QtCore.Qt.QueuedConnection)
+
+    def set_window(self, window):
+        """
+
+        :param window: the debounce window in milliseconds
+        :return:
+        """
+
+        self._timer.setInterval(window)
+
+        return
+
+    def trigger(self, *args):
+        """
+        Register a new event, superseding the pending one
+
+        :param args: the callback arguments, ignored
+        :return:
+        """
+
+        self.events_received += 1
+        self._triggered.emit()
+
+        return
+
+    def stats(self):
+        """
+
+        :return: dictionary with the events received and the updates run
+        """
+
+        return {"events_received": self.events_received,
+                "updates_run": self.updates_run}
+
+    def _restart(self):
+        self._timer.start()
+
+        return
+
+    def _run(self):
+        self.updates_run += 1
+        self.function()
+
+        return
@@ -0,0 +1,50 @@
+import os
+
+from PySide import QtGui
+
+
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "icons")
+
+# Icons and fonts loaded so far, shared by all the ui items
+_icons = dict()
+_fonts = dict()
+
+
+def get_icon(icon_name):
+    """
+    Get an icon from the id_manager icons folder, loaded on first use
+
+    :param icon_name: the icon file name as a string
+    :return: the QIcon
+    """
+
+    icon = _icons.get(icon_name)
+
+    if icon is None:
+        icon = QtGui.QIcon(os.path.join(ICON_FOLDER, icon_name))
+        _icons[icon_name] = icon
+
+    return icon
+
+
+def get_font(point_size, bold=False):
+    """
+    Get a font of the given size, created on first use
+
+    :param point_size: the font point size as an int
+    :param bold: bool for the bold option
+    :return: the QFont
+    """
+
+    font_key = (point_size, bold)
+
+    font = _fonts.get(font_key)
+
+    if font is None:
+        font = QtGui.QFont()
+        font.setPointSize(point_size)
+        font.setBold(bold)
+        _fonts[font_key] = font
+
+    return font
@@ -0,0 +1,986 @@
+"""
+Scene snapshots and an offline maya.cmds backend
+
+A snapshot holds what the id manager reads from a scene: the nodes and
+their types, the dag hierarchy, the render layer members and adjustments,
+the object sets and the id, visibility and aov attribute values. It is
+stored as json in a columnar layout where nodes are referenced by index
+and long names are rebuilt from the parent indexes on load. Attribute
+values are stored once in a value table, the id values of a scene only
+taking a handful of distinct values
+
+    {"version": 1,
+     "type_names": ["transform", "mesh", ...],
+     "names": ["|geo_GRP", "obj0_GEO", ...],
+     "parents": [-1, 0, ...],
+     "types": [0, 0, ...],
+     "values": [[[1, 0, 0]], true, ...],
+     "attributes": {"mtoa_constant_id_face": [[node indexes],
+                                              [value indexes]]},
+     "layers": {"chars": [node indexes]},
+     "adjustments": {"chars": [[node indexes], [attributes],
+                               [value indexes]]},
+     "sets": {"hair_SET": [node indexes]},
+     "current_layer": "chars"}
+
+SnapshotCmds serves the snapshot as a drop-in maya.cmds, see install
+
+"""
+
+import collections
+import fnmatch
+import gzip
+import json
+import os
+import sys
+import types
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+
+SNAPSHOT_VERSION = 1
+
+# Attributes captured on the shapes, object sets and aovs
+SHAPE_ATTRIBUTES = ["primaryVisibility"]
+SET_ATTRIBUTES = ["primaryVisibility"]
+AOV_ATTRIBUTES = ["enabled", "attr_id"]
+
+
+class SnapshotCmds(object):
+    """
+    Minimal maya.cmds replacement backed by an in memory scene
+
+    Serves the commands used by the id manager utils module so the id logic
+    can run and be profiled without a Maya session. The scene is loaded from
+    and saved to the snapshot format of this module
+
+    """
+
+    def __init__(self):
+        self.nodes = collections.OrderedDict()
+        self.children = collections.defaultdict(list)
+        self.attributes = collections.defaultdict(collections.OrderedDict)
+        self.layer_members = collections.OrderedDict()
+        self.adjustments = collections.defaultdict(collections.OrderedDict)
+        self.set_members = collections.defaultdict(list)
+        self.connections = collections.OrderedDict()
+        self.selection = []
+        self.current_layer = "defaultRenderLayer"
+        self.scene_path = None
+        self.calls = collections.Counter()
+
+        self._short_names = None
+        self._type_names = None
+
+        self.create_node("defaultRenderLayer", "renderLayer")
+        self.layer_members["defaultRenderLayer"] = []
+
+    # Scene building helpers
+
+    def create_node(self, name, node_type, parent=None):
+        """
+        Add a node to the scene
+
+        :param name: the short name of the node as a string
+        :param node_type: the maya node type as a string
+        :param parent: the long name of the parent dag node
+        :return: the node long name as a string
+        """
+
+        if parent is not None:
+            name = "%s|%s" % (parent, name)
+        elif node_type in ("transform",) or node_type in DAG_SHAPES:
+            name = "|%s" % name
+
+        self.nodes[name] = node_type
+        self._short_names = None
+        self._type_names = None
+
+        if parent is not None:
+            self.children[parent].append(name)
+
+        if node_type in DAG_SHAPES:
+            self.attributes[name]["primaryVisibility"] = True
+
+        return name
+
+    def create_mesh(self, name, parent=None, shape_type="mesh"):
+        """
+        Add a transform with a shape node to the scene
+
+        :param name: the short name of the transform as a string
+        :param parent: the long name of the parent dag node
+        :param shape_type: the node type of the shape
+        :return: the transform long name as a string
+        """
+
+        transform = self.create_node(name, "transform", parent)
+        self.create_node("%sShape" % name, shape_type, transform)
+
+        return transform
+
+    def create_render_layer(self, name, members=None):
+        """
+        Add a render layer to the scene
+
+        :param name: the render layer name as a string
+        :param members: list of node long names to add to the layer
+        :return: the render layer name
+        """
+
+        self.create_node(name, "renderLayer")
+        self.layer_members[name] = list(members or [])
+
+        return name
+
+    def add_attribute(self, node, attribute, value):
+        """
+        Set the base value of an attribute creating it if needed
+
+        :param node: the name of the node as a string
+        :param attribute: the attribute name as a string
+        :param value: the attribute value
+        :return:
+        """
+
+        self.attributes[node][attribute] = value
+
+    def create_set(self, name, members, primary_visibility=None):
+        """
+        Add an object set to the scene
+
+        :param name: the set name as a string
+        :param members: list of node long names
+        :param primary_visibility: bool for the set visibility override
+        :return: the set name
+        """
+
+        self.create_node(name, "objectSet")
+        self.set_members[name] = list(members)
+
+        if primary_visibility is not None:
+            self.attributes[name]["primaryVisibility"] = primary_visibility
+
+        return name
+
+    def add_override(self, layer, plug, value):
+        """
+        Add a render layer adjustment for a plug
+
+        :param layer: the render layer name as a string
+        :param plug: the node.attribute plug as a string
+        :param value: the override value
+        :return:
+        """
+
+        self.adjustments[layer][plug] = value
+
+    # Snapshot serialization
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        Build a scene from a snapshot
+
+        :param snapshot: the snapshot dictionary
+        :return: the SnapshotCmds instance
+        """
+
+        scene = cls()
+        scene.load_snapshot(snapshot)
+
+        return scene
+
+    def load_snapshot(self, snapshot):
+        """
+        Replace the scene with the content of a snapshot
+
+        :param snapshot: the snapshot dictionary
+        :return:
+        """
+
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot version %s"
+                             % snapshot.get("version"))
+
+        type_names = snapshot["type_names"]
+        parents = snapshot["parents"]
+
+        # Parents are stored before their children
+        long_names = []
+        for name, parent in zip(snapshot["names"], parents):
+            if parent < 0:
+                long_names.append(name)
+            else:
+                long_names.append("%s|%s" % (long_names[parent], name))
+
+        self.nodes = collections.OrderedDict(
+            zip(long_names, [type_names[x] for x in snapshot["types"]]))
+
+        self.children = collections.defaultdict(list)
+        for index, parent in enumerate(parents):
+            if parent >= 0:
+                self.children[long_names[parent]].append(long_names[index])
+
+        values = [_from_json_value(x) for x in snapshot["values"]]
+
+        # Fill the attributes by node index, the values table entries are
+        # shared between the plugs and copied by getAttr
+        node_attributes = [None] * len(long_names)
+        for attribute, columns in snapshot["attributes"].items():
+            for index, value_index in zip(*columns):
+                attributes = node_attributes[index]
+                if attributes is None:
+                    attributes = collections.OrderedDict()
+                    node_attributes[index] = attributes
+
+                attributes[attribute] = values[value_index]
+
+        self.attributes = collections.defaultdict(
+            collections.OrderedDict,
+            [(long_names[x], y) for x, y in enumerate(node_attributes)
+             if y is not None])
+
+        self.layer_members = collections.OrderedDict(
+            [("defaultRenderLayer", [])])
+        for layer, indexes in snapshot["layers"].items():
+            self.layer_members[layer] = [long_names[x] for x in indexes]
+
+        self.adjustments = collections.defaultdict(collections.OrderedDict)
+        for layer, columns in snapshot["adjustments"].items():
+            for index, attribute, value_index in zip(*columns):
+                plug = "%s.%s" % (long_names[index], attribute)
+                self.adjustments[layer][plug] = \
+                    _from_json_value(snapshot["values"][value_index])
+
+        self.set_members = collections.defaultdict(list)
+        for object_set, indexes in snapshot["sets"].items():
+            self.set_members[object_set] = [long_names[x] for x in indexes]
+
+        self.current_layer = snapshot.get("current_layer",
+                                          "defaultRenderLayer")
+        self.connections = collections.OrderedDict()
+        self.selection = []
+        self._short_names = None
+        self._type_names = None
+
+        return
+
+    def to_snapshot(self):
+        """
+
+        :return: the snapshot dictionary of the scene
+        """
+
+        # Store the parents before their children
+        long_names = sorted(self.nodes, key=lambda x: x.count("|"))
+        node_indexes = dict((x, i) for i, x in enumerate(long_names))
+
+        type_names = sorted(set(self.nodes.values()))
+        type_indexes = dict((x, i) for i, x in enumerate(type_names))
+
+        names = []
+        parents = []
+        for long_name in long_names:
+            parent, _, name = long_name.rpartition("|")
+
+            if parent:
+                names.append(name)
+                parents.append(node_indexes[parent])
+            else:
+                names.append(long_name)
+                parents.append(-1)
+
+        values = []
+        value_indexes = dict()
+
+        def value_index(value):
+            key = repr(value)
+            if key not in value_indexes:
+                value_indexes[key] = len(values)
+                values.append(_to_json_value(value))
+            return value_indexes[key]
+
+        attributes = dict()
+        for node, node_attributes in self.attributes.items():
+            if node not in node_indexes:
+                continue
+
+            for attribute, value in node_attributes.items():
+                columns = attributes.setdefault(attribute, [[], []])
+                columns[0].append(node_indexes[node])
+                columns[1].append(value_index(value))
+
+        adjustments = dict()
+        for layer, plugs in self.adjustments.items():
+            columns = adjustments.setdefault(layer, [[], [], []])
+
+            for plug, value in plugs.items():
+                node, attribute = self._split_plug(plug)
+                if node not in node_indexes:
+                    continue
+
+                columns[0].append(node_indexes[node])
+                columns[1].append(attribute)
+                columns[2].append(value_index(value))
+
+        return {"version": SNAPSHOT_VERSION,
+                "type_names": type_names,
+                "names": names,
+                "parents": parents,
+                "types": [type_indexes[self.nodes[x]] for x in long_names],
+                "values": values,
+                "attributes": attributes,
+                "layers": dict((layer, [node_indexes[x] for x in members
+                                        if x in node_indexes])
+                               for layer, members in self.layer_members.items()
+                               if layer != "defaultRenderLayer"),
+                "adjustments": adjustments,
+                "sets": dict((object_set, [node_indexes[x] for x in members
+                                           if x in node_indexes])
+                             for object_set, members in self.set_members.items()),
+                "current_layer": self.current_layer}
+
+    # maya.cmds interface
+
+    def _record(self, command):
+        self.calls[command] += 1
+
+    def _split_plug(self, plug):
+        node, attribute = plug.split(".", 1)
+        return self._long_name(node), attribute
+
+    def _short_names_index(self):
+        # Index the short names on the first lookup after a scene change,
+        # only nodes sharing a short name can share a partial dag path
+        if self._short_names is None:
+            self._short_names = collections.defaultdict(list)
+            for name in self.nodes:
+                self._short_names[name.rsplit("|", 1)[-1]].append(name)
+
+        return self._short_names
+
+    def _type_names_index(self):
+        # Index the node types on the first lookup after a scene change,
+        # listing a type then skips the other nodes
+        if self._type_names is None:
+            self._type_names = collections.defaultdict(list)
+            for name, node_type in self.nodes.items():
+                self._type_names[node_type].append(name)
+
+        return self._type_names
+
+    def _long_name(self, node):
+        if node in self.nodes or node.startswith("|"):
+            return node
+
+        partial_path = "|%s" % node
+        for name in self._short_names_index().get(node.rsplit("|", 1)[-1],
+                                                  []):
+            if name.endswith(partial_path):
+                return name
+
+        return node
+
+    def _shortest_name(self, node):
+        # Shortest unique partial dag path, the name Maya returns by default
+        if "|" not in node:
+            return node
+
+        parts = node.split("|")
+        names = self._short_names_index().get(parts[-1], [])
+
+        for index in range(len(parts) - 1, 0, -1):
+            partial_path = "|%s" % "|".join(parts[index:])
+            if sum(1 for x in names if x.endswith(partial_path)) == 1:
+                return partial_path[1:]
+
+        return node
+
+    def _shortest_plug(self, plug):
+        node, attribute = plug.split(".", 1)
+        return "%s.%s" % (self._shortest_name(node), attribute)
+
+    def _plug_value(self, plug):
+        node, attribute = self._split_plug(plug)
+
+        if attribute.startswith("adjustments["):
+            index = int(attribute.split("[")[1].split("]")[0])
+            layer_adjustments = self._layer_adjustments(node)
+            plug_name = list(layer_adjustments)[index]
+            if attribute.endswith(".plug"):
+                return plug_name
+            return layer_adjustments[plug_name]
+
+        plug = "%s.%s" % (node, attribute)
+        overrides = self.adjustments.get(self.current_layer, {})
+        if plug in overrides:
+            value = overrides[plug]
+        else:
+            value = self.attributes[node][attribute]
+
+        # Return a new list of compound values like Maya does
+        if type(value) is list:
+            return list(value)
+
+        return value
+
+    def _layer_adjustments(self, layer):
+        if layer != "defaultRenderLayer":
+            return self.adjustments[layer]
+
+        adjusted = collections.OrderedDict()
+        for layer_name, plugs in self.adjustments.items():
+            if layer_name == "defaultRenderLayer":
+                continue
+            for plug in plugs:
+                node, attribute = self._split_plug(plug)
+                adjusted[plug] = self.attributes[node][attribute]
+
+        return adjusted
+
+    def _descendants(self, node):
+        for child in self.children.get(node, []):
+            yield child
+            for descendant in self._descendants(child):
+                yield descendant
+
+    def ls(self, *args, **kwargs):
+        self._record("ls")
+
+        if kwargs.get("sl") or kwargs.get("selection"):
+            return list(self.selection)
+
+        node_type = kwargs.get("type")
+        show_type = kwargs.get("showType")
+
+        # Like Maya, an empty list of objects lists the whole scene
+        if args and args[0]:
+            objects = args[0]
+            if isinstance(objects, basestring):
+                objects = [objects]
+
+            result = []
+            seen = set()
+            for obj in objects:
+                if "." in obj:
+                    node, attribute = self._split_plug(obj)
+                    if attribute in self.attributes.get(node, {}):
+                        result.append("%s.%s" % (node, attribute))
+                    continue
+
+                obj = self._long_name(obj)
+                if obj not in self.nodes:
+                    continue
+
+                candidates = [obj]
+                if kwargs.get("dag"):
+                    candidates.extend(self._descendants(obj))
+
+                for candidate in candidates:
+                    if kwargs.get("shapes") and \
+                            self.nodes[candidate] not in DAG_SHAPES:
+                        continue
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        result.append(candidate)
+        elif node_type is not None:
+            result = list(self._type_names_index().get(node_type, []))
+        else:
+            result = list(self.nodes)
+
+        if node_type is not None and args:
+            result = [x for x in result if self.nodes.get(x) == node_type]
+
+        if show_type:
+            typed = []
+            for node in result:
+                typed.extend([node, self.nodes[node]])
+            return typed
+
+        return result
+
+    def nodeType(self, node):
+        self._record("nodeType")
+        return self.nodes[self._long_name(node)]
+
+    def objExists(self, node):
+        self._record("objExists")
+        if "." in node:
+            node, attribute = self._split_plug(node)
+            return attribute in self.attributes.get(node, {})
+        return self._long_name(node) in self.nodes
+
+    def listRelatives(self, nodes, **kwargs):
+        self._record("listRelatives")
+
+        if isinstance(nodes, basestring):
+            nodes = [nodes]
+
+        result = []
+        for node in nodes:
+            node = self._long_name(node)
+            if kwargs.get("parent"):
+                parent = node.rsplit("|", 1)[0]
+                if parent:
+                    result.append(parent)
+                continue
+
+            if kwargs.get("allDescendents"):
+                relatives = list(self._descendants(node))
+            else:
+                relatives = list(self.children.get(node, []))
+
+            if kwargs.get("shapes"):
+                relatives = [x for x in relatives
+                             if self.nodes[x] in DAG_SHAPES]
+
+            result.extend(relatives)
+
+        return result or None
+
+    def listAttr(self, node, **kwargs):
+        self._record("listAttr")
+        attributes = list(self.attributes.get(self._long_name(node), {}))
+
+        pattern = kwargs.get("string")
+        if pattern is not None:
+            attributes = fnmatch.filter(attributes, pattern)
+
+        return attributes or None
+
+    def attributeQuery(self, attribute, node=None, n=None, exists=False):
+        self._record("attributeQuery")
+        node = self._long_name(node or n)
+        return attribute in self.attributes.get(node, {})
+
+    def getAttr(self, plug):
+        self._record("getAttr")
+        return self._plug_value(plug)
+
+    def setAttr(self, plug, *values, **kwargs):
+        self._record("setAttr")
+        node, attribute = self._split_plug(plug)
+
+        value = values[0] if len(values) == 1 else [tuple(values)]
+        if kwargs.get("type") == "string":
+            value = values[0]
+
+        plug = "%s.%s" % (node, attribute)
+        overrides = self.adjustments.get(self.current_layer, {})
+        if plug in overrides:
+            overrides[plug] = value
+        else:
+            self.attributes[node][attribute] = value
+
+    def addAttr(self, nodes, **kwargs):
+        self._record("addAttr")
+
+        if isinstance(nodes, basestring):
+            nodes = [nodes]
+
+        attribute = kwargs.get("ln") or kwargs.get("longName")
+
+        # Child attributes of a compound are not listed as plugs
+        if kwargs.get("p") or kwargs.get("parent"):
+            return
+
+        if kwargs.get("at") == "float3":
+            default = [(0.0, 0.0, 0.0)]
+        elif kwargs.get("at") == "bool":
+            default = False
+        else:
+            default = 0.0
+
+        for node in nodes:
+            self.attributes[self._long_name(node)][attribute] = default
+
+    def listConnections(self, objects, connections=False, **kwargs):
+        self._record("listConnections")
+
+        if isinstance(objects, basestring):
+            objects = [objects]
+
+        # Index the render layer adjustments once per call
+        layer_plugs = collections.defaultdict(list)
+        for layer in self.layer_members:
+            for index, plug in enumerate(self._layer_adjustments(layer)):
+                layer_plugs[plug].append("%s.adjustments[%s].plug"
+                                         % (layer, index))
+
+        # Both ends of the attribute connections
+        connected_plugs = collections.defaultdict(list)
+        for destination, source in self.connections.items():
+            connected_plugs[source].append(destination)
+            connected_plugs[destination].append(source)
+
+        result = []
+        for plug in objects:
+            node, attribute = self._split_plug(plug)
+            plug = "%s.%s" % (node, attribute)
+
+            # Nodes are named by their shortest unique path like Maya does
+            for connection in layer_plugs.get(plug, []):
+                if connections:
+                    result.append(self._shortest_plug(plug))
+                result.append(connection)
+
+            for connection in connected_plugs.get(plug, []):
+                if connections:
+                    result.append(self._shortest_plug(plug))
+                if kwargs.get("plugs") or kwargs.get("p"):
+                    result.append(self._shortest_plug(connection))
+                else:
+                    result.append(self._shortest_name(
+                        connection.split(".")[0]))
+
+        return result or None
+
+    def _create_unique_node(self, node_type, name):
+        name = name or "%s1" % node_type
+
+        # Number the clashing names like Maya does
+        base_name = name.rstrip("0123456789")
+        index = 1
+        while name in self.nodes:
+            name = "%s%s" % (base_name, index)
+            index += 1
+
+        return self.create_node(name, node_type)
+
+    def createNode(self, node_type, name=None, **kwargs):
+        self._record("createNode")
+        return self._create_unique_node(node_type, name)
+
+    def shadingNode(self, node_type, name=None, **kwargs):
+        self._record("shadingNode")
+        return self._create_unique_node(node_type, name)
+
+    def connectAttr(self, source, destination, force=False, **kwargs):
+        self._record("connectAttr")
+
+        source_node, source_attribute = self._split_plug(source)
+        node, attribute = self._split_plug(destination)
+
+        self.connections["%s.%s" % (node, attribute)] = \
+            "%s.%s" % (source_node, source_attribute)
+
+    def listSets(self, object=None, **kwargs):
+        self._record("listSets")
+        object_name = self._long_name(object)
+        sets = [x for x, members in self.set_members.items()
+                if object_name in members]
+        return sets or None
+
+    def sets(self, object_set, q=False, query=False):
+        self._record("sets")
+        return list(self.set_members.get(object_set, [])) or None
+
+    def editRenderLayerGlobals(self, currentRenderLayer=None, crl=None,
+                               query=False, q=False):
+        self._record("editRenderLayerGlobals")
+        if query or q:
+            return self.current_layer
+
+        self.current_layer = currentRenderLayer or crl
+
+    def editRenderLayerMembers(self, layer, q=False, query=False,
+                               fullNames=False):
+        self._record("editRenderLayerMembers")
+        return list(self.layer_members.get(layer, [])) or None
+
+    def editRenderLayerAdjustment(self, plugs, layer=None, **kwargs):
+        self._record("editRenderLayerAdjustment")
+        if isinstance(plugs, basestring):
+            plugs = [plugs]
+
+        layer = layer or self.current_layer
+        for plug in plugs:
+            node, attribute = self._split_plug(plug)
+            plug = "%s.%s" % (node, attribute)
+            if plug not in self.adjustments[layer]:
+                self.adjustments[layer][plug] = \
+                    self.attributes[node][attribute]
+
+    def file(self, file_path=None, **kwargs):
+        self._record("file")
+
+        if kwargs.get("query") or kwargs.get("q"):
+            return self.scene_path
+
+        if kwargs.get("open") or kwargs.get("o"):
+            self.load_snapshot(read_snapshot(file_path))
+            self.scene_path = file_path
+
+        elif kwargs.get("save") or kwargs.get("s"):
+            write_snapshot(self.to_snapshot(), self.scene_path)
+
+        return self.scene_path
+
+    def undoInfo(self, **kwargs):
+        self._record("undoInfo")
+
+    def refresh(self, **kwargs):
+        self._record("refresh")
+
+    def select(self, items, **kwargs):
+        self._record("select")
+        self.selection = [self._long_name(x) for x in items]
+
+
+DAG_SHAPES = ("mesh",
+              "xgmDescription",
+              "pgYetiMaya",
+              "aiStandIn",
+              "pgYetiGroom",
+              "aiVolume",
+              "nurbsCurve",
+              "camera")
+
+
+def _to_json_value(value):
+    """
+
+    :param value: an attribute value
+    :return: the value with the compound tuples turned into lists
+    """
+
+    if isinstance(value, (list, tuple)):
+        return [list(x) if isinstance(x, (list, tuple)) else x for x in value]
+
+    return value
+
+
+def _from_json_value(value):
+    """
+
+    :param value: an attribute value read from json
+    :return: the value with the compound lists turned back into the tuples
+             returned by getAttr
+    """
+
+    if isinstance(value, list):
+        return [tuple(x) if isinstance(x, list) else x for x in value]
+
+    return value
+
+
+def read_snapshot(file_path):
+    """
+
+    :param file_path: the snapshot json file path, gzip compressed if it
+                      ends with .gz
+    :return: the snapshot dictionary
+    """
+
+    if file_path.endswith(".gz"):
+        with gzip.open(file_path, "rb") as snapshot_file:
+            return json.loads(snapshot_file.read().decode("utf-8"))
+
+    with open(file_path) as snapshot_file:
+        return json.load(snapshot_file)
+
+
+def write_snapshot(snapshot, file_path):
+    """
+
+    :param snapshot: the snapshot dictionary
+    :param file_path: the snapshot json file path, gzip compressed if it
+                      ends with .gz
+    :return:
+    """
+
+    data = json.dumps(snapshot, separators=(",", ":"))
+
+    if file_path.endswith(".gz"):
+        with gzip.open(file_path, "wb") as snapshot_file:
+            snapshot_file.write(data.encode("utf-8"))
+    else:
+        with open(file_path, "w") as snapshot_file:
+            snapshot_file.write(data)
+
+    return
+
+
+def load_snapshot(file_path):
+    """
+
+    :param file_path: the snapshot json file path
+    :return: a SnapshotCmds serving the snapshot scene
+    """
+
+    scene = SnapshotCmds.from_snapshot(read_snapshot(file_path))
+    scene.scene_path = file_path
+
+    return scene
+
+
+def capture_snapshot():
+    """
+    Snapshot the scene open in the Maya session
+
+    Attribute values are read on the current render layer, the base value
+    of the plugs it overrides come from the default render layer adjustments
+
+    :return: the snapshot dictionary
+    """
+
+    import maya.cmds as cmds
+
+    scene = SnapshotCmds()
+
+    typed_nodes = cmds.ls(dag=True, long=True, showType=True) or []
+    typed_nodes.extend(cmds.ls(type=["renderLayer", "objectSet", "aiAOV"],
+                               showType=True) or [])
+
+    nodes = collections.OrderedDict(zip(typed_nodes[::2], typed_nodes[1::2]))
+
+    for node in sorted(nodes, key=lambda x: x.count("|")):
+        scene.nodes[node] = nodes[node]
+
+        parent = node.rpartition("|")[0]
+        if parent:
+            scene.children[parent].append(node)
+
+    shapes = [x for x, y in nodes.items() if y in DAG_SHAPES]
+    object_sets = [x for x, y in nodes.items() if y == "objectSet"]
+    ai_aovs = [x for x, y in nodes.items() if y == "aiAOV"]
+
+    # The id attribute names of all the shapes in one query
+    id_attributes = set(cmds.listAttr(shapes,
+                                      userDefined=True,
+                                      string="mtoa_constant_*") or []) \
+        if shapes else set()
+
+    plugs = []
+    for node_list, attributes in ((shapes, SHAPE_ATTRIBUTES +
+                                   sorted(id_attributes)),
+                                  (object_sets, SET_ATTRIBUTES),
+                                  (ai_aovs, AOV_ATTRIBUTES)):
+        for attribute in attributes:
+            plugs.extend(["%s.%s" % (x, attribute) for x in node_list])
+
+    # Maya lists the whole scene for an empty list
+    for plug in (cmds.ls(plugs, long=True) or []) if plugs else []:
+        node, attribute = plug.rsplit(".", 1)
+        scene.add_attribute(node, attribute, cmds.getAttr(plug))
+
+    render_layers = [x for x, y in nodes.items() if y == "renderLayer"]
+    current_layer = cmds.editRenderLayerGlobals(currentRenderLayer=True,
+                                                query=True)
+
+    for render_layer in render_layers:
+        if render_layer != "defaultRenderLayer":
+            members = cmds.editRenderLayerMembers(render_layer,
+                                                  q=True,
+                                                  fullNames=True) or []
+            scene.layer_members[render_layer] = [x for x in members
+                                                 if x in nodes]
+
+        indexes = cmds.getAttr("%s.adjustments" % render_layer,
+                               multiIndices=True) or []
+
+        for index in indexes:
+            adjustment = "%s.adjustments[%s]" % (render_layer, index)
+
+            plug = cmds.listConnections("%s.plug" % adjustment,
+                                        plugs=True) or []
+            if not plug:
+                continue
+
+            node, attribute = plug[0].split(".", 1)
+            node = (cmds.ls(node, long=True) or [node])[0]
+
+            if node not in nodes:
+                continue
+
+            value = cmds.getAttr("%s.value" % adjustment)
+
+            if render_layer == "defaultRenderLayer":
+                if current_layer != render_layer and \
+                        attribute in scene.attributes[node]:
+                    scene.attributes[node][attribute] = value
+                continue
+
+            scene.add_override(render_layer, "%s.%s" % (node, attribute),
+                               value)
+
+    for object_set in object_sets:
+        members = cmds.sets(object_set, q=True) or []
+        if not members:
+            scene.set_members[object_set] = []
+            continue
+
+        scene.set_members[object_set] = [x for x in cmds.ls(members,
+                                                            long=True) or []
+                                         if x in nodes]
+
+    scene.current_layer = current_layer
+
+    return scene.to_snapshot()
+
+
+class SnapshotAOVInterface(object):
+    """
+    Placeholder of mtoa.aovs.AOVInterface creating the aiAOV nodes in the
+    installed SnapshotCmds
+
+    """
+
+    def addAOV(self, aov_name, aovType="rgb"):
+        """
+
+        :param aov_name: the aov name as a string
+        :param aovType: the aov data type, ignored
+        :return: the aiAOV node name as a string
+        """
+
+        backend = sys.modules["maya.cmds"]
+
+        ai_aov = backend.create_node("aiAOV_%s" % aov_name, "aiAOV")
+        backend.add_attribute(ai_aov, "enabled", True)
+
+        return ai_aov
+
+
+def install(backend=None):
+    """
+    Serve a SnapshotCmds as maya.cmds, registering placeholder maya and mtoa
+    modules and putting the id_manager package folder on the python path so
+    its modules can be imported stand alone
+
+    :param backend: the SnapshotCmds instance to serve, an empty scene
+                    if None
+    :return: the SnapshotCmds instance installed
+    """
+
+    backend = backend or SnapshotCmds()
+
+    maya_module = sys.modules.get("maya") or types.ModuleType("maya")
+    maya_module.cmds = backend
+    sys.modules["maya"] = maya_module
+    sys.modules["maya.cmds"] = backend
+
+    for name in ("mtoa", "mtoa.core", "mtoa.aovs"):
+        sys.modules.setdefault(name, types.ModuleType(name))
+
+    sys.modules["mtoa"].core = sys.modules["mtoa.core"]
+    sys.modules["mtoa"].aovs = sys.modules["mtoa.aovs"]
+
+    if not hasattr(sys.modules["mtoa.aovs"], "AOVInterface"):
+        sys.modules["mtoa.aovs"].AOVInterface = SnapshotAOVInterface
+
+    package_folder = os.path.dirname(os.path.abspath(__file__))
+
+    if package_folder not in sys.path:
+        sys.path.insert(0, package_folder)
+
+    # Rebind the modules already imported to the new backend
+    for module in list(sys.modules.values()):
+        if isinstance(getattr(module, "cmds", None), SnapshotCmds):
+            module.cmds = backend
+
+    return backend
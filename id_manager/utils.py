@@ -1,6 +1,69 @@
+import collections
+import contextlib
+import re
+
 import maya.cmds as cmds
 
-from mtoa import core, aovs
+import aov_registry
+import id_membership
+
+
+# Nesting depth of the open id edit transactions
+_transaction_depth = 0
+
+# Number of objects read per step of the cooperative id scans
+ID_SCAN_CHUNK_SIZE = 500
+
+
+@contextlib.contextmanager
+def id_edit_transaction(chunk_name="idManagerEdit"):
+    """
+    Context manager running the id edits inside a single undo chunk with the
+    viewport refresh suspended. Nested transactions join the outer one
+
+    :param chunk_name: the name of the undo chunk as a string
+    :return:
+    """
+
+    global _transaction_depth
+
+    _transaction_depth += 1
+
+    if _transaction_depth == 1:
+        cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+        cmds.refresh(suspend=True)
+
+    try:
+        yield
+    finally:
+        _transaction_depth -= 1
+
+        if _transaction_depth == 0:
+            cmds.refresh(suspend=False)
+            cmds.undoInfo(closeChunk=True)
+
+            # Single refresh once all the edits are done
+            cmds.refresh()
+
+
+@contextlib.contextmanager
+def keep_render_layer():
+    """
+    Context manager restoring the current render layer on exit, for the
+    edits switching render layers
+
+    :return:
+    """
+
+    current_layer = cmds.editRenderLayerGlobals(currentRenderLayer=True,
+                                                query=True)
+
+    try:
+        yield
+    finally:
+        if cmds.editRenderLayerGlobals(currentRenderLayer=True,
+                                       query=True) != current_layer:
+            cmds.editRenderLayerGlobals(currentRenderLayer=current_layer)
 
 
 def get_layers_aovs():
@@ -15,48 +78,104 @@ def get_layers_aovs():
     render_layers = [x for x in cmds.ls(type="renderLayer") \
                      if "defaultRenderLayer" not in x]
 
-    scene_aovs = filter(lambda x:
-                        cmds.attributeQuery('attr_id', n=x, exists=True),
-                        cmds.ls(type="aiAOV"))
+    scene_aovs = get_id_aovs()
+
+    # Gather the enabled layer overrides of all the aovs at once
+    enabled_plugs = ["%s.enabled" % x for x in scene_aovs]
+    layer_overrides = get_layer_overrides(enabled_plugs)
+
+    current_layer = cmds.editRenderLayerGlobals(currentRenderLayer=True,
+                                                query=True)
+
+    # Layer value for every aov: None if the aov is not enabled on the layer
+    aovs_values = []
+    for aov, plug in zip(scene_aovs, enabled_plugs):
+        overrides = layer_overrides.get(plug)
+
+        # Use attribute value if attribute has no overrides on any layer
+        if overrides is None:
+            value = cmds.getAttr(plug) is True
+            aovs_values.append((aov, dict(), value))
+            continue
+
+        # The adjustment value of the current layer is only stored when
+        # switching layers, the attribute value is read instead
+        overrides[current_layer] = cmds.getAttr(plug)
+
+        # Use default Render Layer Value if attr is
+        # not overriden for a layer
+        default_value = overrides.get("defaultRenderLayer")
+        aovs_values.append((aov, overrides, default_value))
 
     for render_layer in render_layers:
         aov_dict[render_layer] = ["beauty"]
 
-        for aov in scene_aovs:
-            attr = "enabled"
-            layer_overrides = cmds.listConnections("%s.%s" % (aov, attr),
-                                                   plugs=1)
+        for aov, overrides, default_value in aovs_values:
+            value = overrides.get(render_layer, default_value)
+
+            if value:
+                aov_dict[render_layer].append(aov.split("aiAOV_")[-1])
+
+    return aov_dict
+
+
+def get_id_aovs():
+    """
+
+    :return: list of the aiAOV nodes tagged with the attr_id attribute
+    """
+
+    return aov_registry.registry.get_id_aovs()
 
-            # Use attribute value if attribute has no overrides on any layer
-            value = cmds.getAttr("%s.%s" % (aov, attr))
 
-            if layer_overrides:
-                attribute_plug = False
-                # Use default Render Layer Value if attr is
-                # not overriden for a layer
+def get_layer_overrides(plugs):
+    """
+    Get the render layer adjustments of a list of plugs in one query
 
-                for layerOver in layer_overrides:
-                    if "defaultRenderLayer" == layerOver.split(".")[0]:
-                        attribute_plug = layerOver
+    :param plugs: list of plugs as node.attribute strings, dag nodes being
+                  given by their long names
+    :return: dictionary where keys are the plugs with layer adjustments and
+             values a dictionary of render layer: override value
+    """
 
-                # Query attr Layer Override value
-                for layerOver in layer_overrides:
-                    if render_layer == layerOver.split(".")[0]:
-                        attribute_plug = layerOver
+    layer_overrides = dict()
 
-                if not attribute_plug:
-                    continue
+    if not plugs:
+        return layer_overrides
 
-                values = [False, True]
+    connections = cmds.listConnections(plugs,
+                                       plugs=True,
+                                       connections=True) or []
 
-                attribute_value = cmds.getAttr(attribute_plug.replace("plug",
-                                                                      "value"))
-                value = values[int(attribute_value)]
+    adjustments = [x for x in zip(connections[::2], connections[1::2])
+                   if ".adjustments[" in x[1] and x[1].endswith(".plug")]
 
-            if value is True:
-                aov_dict[render_layer].append(aov.split("aiAOV_")[-1])
+    if not adjustments:
+        return layer_overrides
 
-    return aov_dict
+    # The plugs are returned with the shortest unique node names, resolve
+    # them to the long names of the plugs queried in one query
+    nodes = []
+    seen = set()
+    for plug, _ in adjustments:
+        node = plug.split(".", 1)[0]
+        if node not in seen:
+            seen.add(node)
+            nodes.append(node)
+
+    long_names = dict(zip(nodes, cmds.ls(nodes, long=True) or []))
+
+    for plug, connection in adjustments:
+        node, attribute = plug.split(".", 1)
+        plug = "%s.%s" % (long_names.get(node, node), attribute)
+
+        render_layer = connection.split(".")[0]
+        value_plug = "%s.value" % connection.rsplit(".", 1)[0]
+
+        layer_overrides.setdefault(plug, dict())[render_layer] = \
+            cmds.getAttr(value_plug)
+
+    return layer_overrides
 
 
 def id_objects_dict(id_sets):
@@ -67,83 +186,348 @@ def id_objects_dict(id_sets):
             added to each rgb entry
     """
 
-    attribute_type = "mtoa_constant_"
-    id_dict = dict()
-
     current_layer = cmds.editRenderLayerGlobals(currentRenderLayer=True,
                                                 query=True)
 
     layer_objects = get_render_layer_objects(current_layer) or []
 
-    # Return False if render layer has no members
-    layer_objects = [x for x in layer_objects
-                     if get_object_primary_visibility(x)] or None
+    # Return empty id sets if render layer has no members
+    layer_objects = get_visible_objects(layer_objects)
 
-    for idSet in id_sets:
-        id_dict[idSet] = {"Red": [],
-                          "Green": [],
-                          "Blue": [],
-                          "Holdout": []
-                          }
+    id_scan = scan_id_objects(layer_objects, id_sets)
 
-        if not layer_objects:
-            continue
+    return build_id_dict(id_scan, id_sets)
 
-        objects_with_id = []
-        id_objects = []
 
-        for object_name in layer_objects:
-            shape_node = get_object_shape_node(object_name)
-            if shape_node is False:
-                continue
+def scan_id_objects(objects, id_sets):
+    """
+    Collect the id attribute values of a list of objects in a single pass
 
-            if cmds.nodeType(shape_node) not in render_layer_accepted_objects():
-                continue
+    Shape nodes, node types and the existing mtoa_constant_ plugs are
+    resolved with one query each so the query count does not grow with the
+    id sets count. The values are still read with one getAttr per existing
+    plug, cmds having no multi-plug read
 
-            else:
-                id_objects.append(object_name)
-
-            color_attribute = attribute_type + idSet
-            alpha_attribute = "%s_Alpha" % color_attribute
-
-            if cmds.attributeQuery(alpha_attribute,
-                                   node=shape_node,
-                                   exists=True):
-                attribute_value = cmds.getAttr("%s.%s" % (shape_node,
-                                                          alpha_attribute))[0]
-
-                if "_Alpha" in alpha_attribute and attribute_value == (1, 1, 1):
-                    id_dict[idSet]["Alpha"].append(object_name)
-                    objects_with_id.append(object_name)
-
-                elif "_Alpha" in alpha_attribute and attribute_value == (-1, -1, -1):
-                    id_dict[idSet]["Alpha_Neg"].append(object_name)
-                    objects_with_id.append(object_name)
-
-            if cmds.attributeQuery(color_attribute,
-                                   node=shape_node,
-                                   exists=True):
-                attribute_value = cmds.getAttr("%s.%s" % (shape_node,
-                                                          color_attribute))[0]
-
-                rbg_value = None
-                for v in attribute_value:
-                    id_colors = ["Red", "Green", "Blue"]
-                    if v == 1:
-                        rbg_value = id_colors[attribute_value.index(v)]
-                    elif v == -1:
-                        rbg_value = "%s_Neg" % id_colors[attribute_value.index(v)]
-
-                if rbg_value is not None:
-                    id_dict[idSet][rbg_value].append(object_name)
-                    objects_with_id.append(object_name)
-
-        id_dict[idSet]["Holdout"] = filter(lambda x:
-                                           x not in objects_with_id, id_objects)
+    :param objects: list of transform node long names
+    :param id_sets: a list of aov names
+    :return: ordered dictionary where keys are the objects accepted as id
+             objects and values a dictionary of id attribute values
+    """
+
+    id_scan = collections.OrderedDict()
+
+    if not objects:
+        return id_scan
+
+    id_shape_nodes = get_id_shape_nodes(objects)
+
+    for object_name in id_shape_nodes:
+        id_scan[object_name] = dict()
+
+    read_id_attributes(id_scan, id_shape_nodes, list(id_shape_nodes), id_sets)
+
+    return id_scan
+
+
+def get_id_shape_nodes(objects):
+    """
+
+    :param objects: list of transform node long names
+    :return: ordered dictionary where keys are the objects accepted as id
+             objects and values their shape node
+    """
+
+    shape_nodes = get_objects_shape_nodes(objects)
+    node_types = get_nodes_types(shape_nodes.values())
+    accepted_objects = set(render_layer_accepted_objects())
+
+    id_shape_nodes = collections.OrderedDict()
+
+    for object_name in objects:
+        shape_node = shape_nodes.get(object_name)
+        if node_types.get(shape_node) in accepted_objects:
+            id_shape_nodes[object_name] = shape_node
+
+    return id_shape_nodes
+
+
+def read_id_attributes(id_scan, id_shape_nodes, objects, id_sets):
+    """
+    Read the id attribute values of objects into an id scan, the existing
+    plugs being resolved with one query and read with one getAttr each
+
+    :param id_scan: dictionary of the objects id attribute values
+    :param id_shape_nodes: the get_id_shape_nodes result for the objects
+    :param objects: list of the object long names to read
+    :param id_sets: a list of aov names
+    :return:
+    """
+
+    id_attributes = []
+    for id_set in id_sets:
+        color_attribute = "mtoa_constant_%s" % id_set
+        id_attributes.extend([color_attribute, "%s_Alpha" % color_attribute])
+
+    plugs = []
+    plug_owners = dict()
+    for object_name in objects:
+        shape_node = id_shape_nodes[object_name]
+        plug_owners[shape_node] = object_name
+
+        plugs.extend(["%s.%s" % (shape_node, x) for x in id_attributes])
+
+    if not plugs:
+        return
+
+    # Query the existing id plugs at once
+    for plug in cmds.ls(plugs, long=True) or []:
+        shape_node, attribute = plug.rsplit(".", 1)
+        object_name = plug_owners[shape_node]
+
+        id_scan[object_name][attribute] = cmds.getAttr(plug)[0]
+
+    return
+
+
+def build_id_dict(id_scan, id_sets, table=None):
+    """
+    Build the id sets dictionary from the result of scan_id_objects
+
+    :param id_scan: the dictionary returned by scan_id_objects
+    :param id_sets: a list of aov names
+    :param table: the id_membership.ObjectTable shared by the id sets, a
+                  new table if None
+    :return: dictionary for each aov of its id_membership.IdSetMembership,
+             mapping the id rgba entries to the objects added to each entry
+    """
+
+    if table is None:
+        table = id_membership.ObjectTable()
+
+    objects = list(id_scan)
+    indexes = table.indexes(objects)
+
+    id_dict = dict()
+
+    for id_set in id_sets:
+        id_dict[id_set] = id_membership.IdSetMembership(table)
+
+        add_id_colors(id_dict[id_set], id_set, objects, id_scan, indexes)
 
     return id_dict
 
 
+def add_id_colors(id_colors, id_set, objects, id_scan, indexes=None):
+    """
+    Add objects to the id colors of an id set from their scanned values
+
+    :param id_colors: the id_membership.IdSetMembership of the id set
+    :param id_set: the name of an aov as a string
+    :param objects: list of the object long names to add
+    :param id_scan: dictionary of the objects id attribute values
+    :param indexes: list of the objects index in the id colors table,
+                    looked up if None
+    :return:
+    """
+
+    color_attribute = "mtoa_constant_%s" % id_set
+    alpha_attribute = "%s_Alpha" % color_attribute
+
+    if indexes is None:
+        indexes = id_colors.table.indexes(objects)
+
+    color_indexes = dict()
+
+    for object_name, index in zip(objects, indexes):
+        attribute_values = id_scan[object_name]
+
+        object_colors = [get_alpha_id_color(attribute_values.get(
+                             alpha_attribute)),
+                         get_rgb_id_color(attribute_values.get(
+                             color_attribute))]
+
+        for id_color in object_colors:
+            if id_color is not None:
+                color_indexes.setdefault(id_color, []).append(index)
+
+    id_colors.add(indexes, color_indexes)
+
+    return
+
+
+def iter_id_scan(id_scan, id_shape_nodes, id_sets,
+                 chunk_size=ID_SCAN_CHUNK_SIZE, table=None):
+    """
+    Cooperative scan_id_objects and build_id_dict
+
+    The id sets are read one at a time in chunks of objects and the
+    generator yields after each chunk, so the caller can process the ui
+    events between the steps
+
+    :param id_scan: dictionary filled with the id attribute values read
+    :param id_shape_nodes: the get_id_shape_nodes result of the objects
+    :param id_sets: a list of aov names
+    :param chunk_size: number of objects read per step
+    :param table: the id_membership.ObjectTable shared by the id sets, a
+                  new table if None
+    :return: generator of (scanned, total, id_set, id_colors) tuples where
+             scanned and total count the objects of every id set. id_set
+             and its IdSetMembership are given once the id set is complete,
+             they are None otherwise
+    """
+
+    if table is None:
+        table = id_membership.ObjectTable()
+
+    objects = list(id_shape_nodes)
+    indexes = []
+
+    # The objects are added to the table in chunks as well
+    for start in range(0, len(objects), chunk_size):
+        indexes.extend(table.indexes(objects[start:start + chunk_size]))
+
+        yield 0, 0, None, None
+
+    total = len(objects) * len(id_sets)
+    scanned = 0
+
+    for id_set in id_sets:
+        id_colors = id_membership.IdSetMembership(table)
+
+        for start in range(0, len(objects), chunk_size):
+            chunk = objects[start:start + chunk_size]
+
+            for object_name in chunk:
+                id_scan.setdefault(object_name, dict())
+
+            read_id_attributes(id_scan, id_shape_nodes, chunk, [id_set])
+            add_id_colors(id_colors, id_set, chunk, id_scan,
+                          indexes[start:start + chunk_size])
+
+            scanned += len(chunk)
+
+            yield scanned, total, None, None
+
+        yield scanned, total, id_set, id_colors
+
+
+def iter_visible_objects(objects, visible_objects,
+                         chunk_size=ID_SCAN_CHUNK_SIZE):
+    """
+    Cooperative get_visible_objects, the generator yields after each chunk
+    of objects
+
+    :param objects: list of transform node long names
+    :param visible_objects: list extended with the visible objects
+    :param chunk_size: number of objects resolved per step
+    :return: generator of empty iter_id_scan steps
+    """
+
+    if not objects:
+        return
+
+    # The object sets are read once for all the chunks
+    hidden_nodes = set()
+    for step in iter_hidden_set_members(hidden_nodes, chunk_size):
+        yield step
+
+    for start in range(0, len(objects), chunk_size):
+        visible_objects.extend(get_visible_objects(
+            objects[start:start + chunk_size], hidden_nodes))
+
+        yield 0, 0, None, None
+
+
+def iter_id_shape_nodes(objects, id_shape_nodes,
+                        chunk_size=ID_SCAN_CHUNK_SIZE):
+    """
+    Cooperative get_id_shape_nodes, the generator yields after each chunk
+    of objects
+
+    :param objects: list of transform node long names
+    :param id_shape_nodes: ordered dictionary updated with the objects
+                           accepted as id objects and their shape node
+    :param chunk_size: number of objects resolved per step
+    :return: generator of empty iter_id_scan steps
+    """
+
+    for start in range(0, len(objects), chunk_size):
+        id_shape_nodes.update(get_id_shape_nodes(
+            objects[start:start + chunk_size]))
+
+        yield 0, 0, None, None
+
+
+def iter_id_objects_dict(id_sets, chunk_size=ID_SCAN_CHUNK_SIZE):
+    """
+    Cooperative version of id_objects_dict, see iter_id_scan
+
+    :param id_sets: a list of aov names
+    :param chunk_size: number of objects read per step
+    :return: generator of the iter_id_scan steps
+    """
+
+    current_layer = cmds.editRenderLayerGlobals(currentRenderLayer=True,
+                                                query=True)
+
+    layer_objects = []
+    for step in iter_render_layer_objects(current_layer, layer_objects,
+                                          chunk_size):
+        yield step
+
+    visible_objects = []
+    for step in iter_visible_objects(layer_objects, visible_objects,
+                                     chunk_size):
+        yield step
+
+    id_shape_nodes = collections.OrderedDict()
+    for step in iter_id_shape_nodes(visible_objects, id_shape_nodes,
+                                    chunk_size):
+        yield step
+
+    for step in iter_id_scan(collections.OrderedDict(), id_shape_nodes,
+                             id_sets, chunk_size):
+        yield step
+
+
+def get_alpha_id_color(attribute_value):
+    """
+
+    :param attribute_value: the value of an id alpha attribute as a tuple
+    :return: the name of the alpha id color or None
+    """
+
+    if attribute_value == (1, 1, 1):
+        return "Alpha"
+
+    if attribute_value == (-1, -1, -1):
+        return "Alpha_Neg"
+
+    return None
+
+
+def get_rgb_id_color(attribute_value):
+    """
+
+    :param attribute_value: the value of an id color attribute as a tuple
+    :return: the name of the rgb id color or None
+    """
+
+    if attribute_value is None:
+        return None
+
+    id_colors = ["Red", "Green", "Blue"]
+
+    rgb_value = None
+    for v in attribute_value:
+        if v == 1:
+            rgb_value = id_colors[attribute_value.index(v)]
+        elif v == -1:
+            rgb_value = "%s_Neg" % id_colors[attribute_value.index(v)]
+
+    return rgb_value
+
+
 def set_attribute_id(object_name, id_set, id_color):
     """
 
@@ -153,55 +537,152 @@ def set_attribute_id(object_name, id_set, id_color):
     :return:
     """
 
-    shape_node = cmds.listRelatives(object_name,
-                                    allDescendents=True,
-                                    fullPath=True,
-                                    shapes=True)[0]
+    set_attribute_ids([object_name], id_set, id_color)
+
+    return
+
+
+def get_id_values(id_colors):
+    """
+    Inverse of get_rgb_id_color and get_alpha_id_color
+
+    :param id_colors: list of the id color names of an object in an id set
+    :return: tuple of the id color and id alpha attribute values, as tuples
+    """
+
+    id_channels = ["Red", "Green", "Blue"]
+
+    color_value = (0, 0, 0)
+    alpha_value = (0, 0, 0)
+
+    for id_color in id_colors:
+        sign = -1 if id_color.endswith("_Neg") else 1
+        id_color = id_color.split("_Neg")[0]
+
+        if id_color == "Alpha":
+            alpha_value = (sign,) * 3
+        elif id_color in id_channels:
+            color_value = tuple(sign * int(id_color == x)
+                                for x in id_channels)
+
+    return color_value, alpha_value
+
+
+def set_attribute_ids(objects, id_set, id_color):
+    """
+    Bulk version of set_attribute_id
+
+    Shapes, existing attributes and layer adjustments are resolved for all
+    the objects at once, attributes are only added to the shapes missing them.
+    The values are still written with one setAttr per shape and channel
+
+    :param objects: list of maya node long names
+    :param id_set: the name of an aov as a string
+    :param id_color: the name of an aov's rgb color as a string
+    :return: dictionary where keys are the objects and values the result
+             for each object: "assigned", "created" if the id attributes
+             had to be added or "skipped" if the object has no shape node
+    """
 
     id_color = id_color.split("_Neg")[0]
 
+    channel_values = ["Red_", "Green_", "Blue_"]
+
+    # Get the id values for the color and alpha attributes
+    color_value = [int(id_color in x) for x in channel_values]
+    alpha_value = [int(id_color == "Alpha")] * 3
+
+    return set_attribute_values(objects, id_set, color_value, alpha_value)
+
+
+def set_attribute_values(objects, id_set, color_value, alpha_value):
+    """
+    Set the id color and id alpha attribute values of objects, see
+    set_attribute_ids
+
+    :param objects: list of maya node long names
+    :param id_set: the name of an aov as a string
+    :param color_value: the value of the id color attribute
+    :param alpha_value: the value of the id alpha attribute
+    :return: dictionary where keys are the objects and values the result
+             for each object: "assigned", "created" if the id attributes
+             had to be added or "skipped" if the object has no shape node
+    """
+
+    report = dict((x, "skipped") for x in objects)
+
+    shape_objects = get_objects_shape_nodes(objects)
+    shape_nodes = [shape_objects[x] for x in objects if x in shape_objects]
+
+    if not shape_nodes:
+        return report
+
+    with id_edit_transaction():
+        created_shapes = _set_shapes_id(shape_nodes, id_set, color_value,
+                                        alpha_value)
+
+    for object_name, shape_node in shape_objects.items():
+        if shape_node in created_shapes:
+            report[object_name] = "created"
+        else:
+            report[object_name] = "assigned"
+
+    return report
+
+
+def _set_shapes_id(shape_nodes, id_set, color_value, alpha_value):
+    """
+    Set the id attributes of a list of shape nodes
+
+    :param shape_nodes: list of shape node long names
+    :param id_set: the name of an aov as a string
+    :param color_value: the value of the id color attribute
+    :param alpha_value: the value of the id alpha attribute
+    :return: set of the shape nodes the id attributes were added to
+    """
+
     channel_values = ["Red_", "Green_", "Blue_"]
     channels = ["", "_Alpha"]
 
-    for ch in channels:
-        myAttr = "mtoa_constant_%s%s" % (id_set, ch)
+    channel_attributes = ["mtoa_constant_%s%s" % (id_set, x) for x in channels]
 
-        # Add ID Attribute if not exist
-        if not cmds.attributeQuery(myAttr, node=shape_node, exists=True):
-            cmds.addAttr(shape_node,
+    # Query the existing attributes of all shapes at once
+    plugs = ["%s.%s" % (x, y) for x in shape_nodes for y in channel_attributes]
+    existing_plugs = set(cmds.ls(plugs, long=True) or [])
+
+    created_shapes = set()
+
+    for ch, myAttr in zip(channels, channel_attributes):
+        missing_shapes = [x for x in shape_nodes
+                          if "%s.%s" % (x, myAttr) not in existing_plugs]
+
+        # Add ID Attribute to the shapes missing it
+        if missing_shapes:
+            cmds.addAttr(missing_shapes,
                          ln=myAttr,
                          nn=id_set + ch,
                          uac=1,
                          at="float3")
             for c in channel_values:
-                cmds.addAttr(shape_node,
+                cmds.addAttr(missing_shapes,
                              ln=c + id_set + ch,
                              at="float",
                              p=myAttr)
 
-        # Create a layer Override for all attributes
-        cmds.editRenderLayerAdjustment("%s.%s" % (shape_node, myAttr))
+            created_shapes.update(missing_shapes)
 
-        # Set all values to 0:
-        cmds.setAttr("%s.%s" % (shape_node, myAttr), 0, 0, 0, type="double3")
-        if id_color == "Holdout":
-            continue
+    # Create a layer Override for all attributes
+    cmds.editRenderLayerAdjustment(plugs)
 
-        # Set Id Color as per user input
-        if id_color in ch and id_color == "Alpha":
+    # Set Id Color as per user input
+    for shape_node in shape_nodes:
+        for myAttr, value in zip(channel_attributes, [color_value,
+                                                      alpha_value]):
             cmds.setAttr("%s.%s" % (shape_node, myAttr),
-                         1,
-                         1,
-                         1,
+                         *value,
                          type="double3")
 
-        if id_color not in ch and ch != "_Alpha":
-            cmds.setAttr("%s.%s" % (shape_node, myAttr),
-                         int(id_color in channel_values[0]),
-                         id_color in channel_values[1],
-                         id_color in channel_values[2])
-
-    return
+    return created_shapes
 
 
 def create_new_aov(aov_name):
@@ -211,68 +692,211 @@ def create_new_aov(aov_name):
     :return: object name of the aov created as a string
     """
 
-    scene_aovs = [x for x in cmds.ls(type="aiAOV")]
     ai_aov = "aiAOV_%s" % aov_name
 
-    if ai_aov in scene_aovs:
-        print "%s already exists in the scene" % aov_name
+    if aov_registry.registry.exists(ai_aov):
+        print("%s already exists in the scene" % aov_name)
         return False
 
+    # mtoa is only importable once the plugin is loaded
+    from mtoa import aovs
+
     new_aov = aovs.AOVInterface()
 
     data_type = "rgb"
     new_aov.addAOV(aov_name, data_type)
 
+    aov_registry.registry.add(ai_aov)
+
     # Set AOV disabled
     cmds.setAttr("%s.enabled" % ai_aov, 0)
 
     return ai_aov
 
 
-def create_connect_aov_shader(aov_name):
+def expand_aov_names(text):
     """
+    Get the aov names of a text where names are separated by commas or
+    spaces and name[1-30] expands to the numbered names name1 to name30
 
-    :param aov_name: the name of an aov object as a string
-    :return: the name of the created surface shader as a string
+    :param text: the aov names text as a string
+    :return: list of the aov names, the invalid names raise a ValueError
+    """
+
+    aov_names = []
+
+    for name in re.split(r"[,\s]+", text.strip()):
+        if not name:
+            continue
+
+        name_range = re.match(r"^(\w+)\[(\d+)-(\d+)\]$", name)
+
+        if name_range is not None:
+            prefix, first, last = name_range.groups()
+            aov_names.extend(["%s%s" % (prefix, x)
+                              for x in range(int(first), int(last) + 1)])
+        elif re.match(r"^[A-Za-z_]\w*$", name):
+            aov_names.append(name)
+        else:
+            raise ValueError("Invalid AOV name %s" % name)
+
+    return aov_names
+
+
+def create_id_aov(aov_name, render_layer):
+    """
+    Create an id aov if needed and enable it on a render layer
+
+    :param aov_name: name of the aov as a string
+    :param render_layer: the render layer name to enable the aov on
+    :return: object name of the aov as a string
+    """
+
+    return create_id_aovs([aov_name], render_layer)[0]
+
+
+def create_id_aovs(aov_names, render_layer):
+    """
+    Bulk version of create_id_aov
+
+    The aovs existence is checked once, the missing aovs are created with a
+    single aov interface, the layer overrides are added in one batch and the
+    shader networks are built from ID_SHADER_TEMPLATE, all in one undo chunk
+    with a single refresh
+
+    :param aov_names: list of aov names
+    :param render_layer: the render layer name to enable the aovs on
+    :return: list of the aov object names
     """
 
-    surface_shader = cmds.shadingNode("surfaceShader",
-                                      name="AOV_%s_MAT" % aov_name,
-                                      asShader=True)
+    aov_names = list(collections.OrderedDict.fromkeys(aov_names))
+    ai_aovs = ["aiAOV_%s" % x for x in aov_names]
 
-    # Create a Shading Group so Miasma will publish this shader
-    shading_group = cmds.createNode("shadingEngine",
-                                    name="AOV_%s_SG" % aov_name)
+    if not ai_aovs:
+        return []
 
-    cmds.connectAttr("%s.outColor" % surface_shader,
-                     "%s.surfaceShader" % shading_group)
+    aovs_status = aov_registry.registry.aovs_status(ai_aovs)
 
-    rgb_data = cmds.shadingNode("aiUserDataColor",
-                                asShader=True,
-                                name="userData_%s" % aov_name)
+    with id_edit_transaction("idManagerCreateAovs"):
+        new_aovs = [x for x in aov_names
+                    if aovs_status["aiAOV_%s" % x] is None]
 
-    cmds.setAttr("%s.colorAttrName" % rgb_data,
-                 aov_name,
-                 type="string")
+        if new_aovs:
+            from mtoa import aovs
 
-    cmds.connectAttr("%s.outColor" % rgb_data,
-                     "%s.outColor" % surface_shader,
-                     force=True)
+            new_aov = aovs.AOVInterface()
 
-    cmds.connectAttr("%s.outColor" % surface_shader,
-                     "aiAOV_%s.defaultValue" % aov_name,
-                     force=True)
+            for aov_name in new_aovs:
+                new_aov.addAOV(aov_name, "rgb")
+
+                ai_aov = "aiAOV_%s" % aov_name
+                aov_registry.registry.add(ai_aov)
+
+                # Set AOV disabled
+                cmds.setAttr("%s.enabled" % ai_aov, 0)
+
+        # Enable the AOVs on the render layer as overrides
+        enabled_plugs = ["%s.enabled" % x for x in ai_aovs]
+
+        cmds.editRenderLayerAdjustment(enabled_plugs, layer=render_layer)
+
+        for plug in enabled_plugs:
+            cmds.setAttr(plug, 1)
+
+        # Connect the id shader of the aovs which are not id aovs yet
+        create_aov_shader_networks([x for x in aov_names
+                                    if not aovs_status["aiAOV_%s" % x]])
+
+    return ai_aovs
+
+
+# Shader network connected to the default value of each id aov.
+# Nodes are created in order, as shaders or as plain nodes, "{aov}" is
+# replaced with the aov name and the "aov" key is the aiAOV node
+ID_SHADER_TEMPLATE = {
+    "nodes": [("shader", "surfaceShader", "AOV_{aov}_MAT", True),
+              # Create a Shading Group so Miasma will publish this shader
+              ("shading_group", "shadingEngine", "AOV_{aov}_SG", False),
+              ("user_data", "aiUserDataColor", "userData_{aov}", True)],
+    "string_attributes": [("user_data.colorAttrName", "{aov}")],
+    "connections": [("shader.outColor", "shading_group.surfaceShader"),
+                    ("user_data.outColor", "shader.outColor"),
+                    ("shader.outColor", "aov.defaultValue")]}
+
+
+def create_aov_shader_networks(aov_names, template=None):
+    """
+    Build the id shader network of aovs from a template and tag the aovs
+    as id aovs
 
-    # Add the attr_id to be identified as an attr id aov type
-    cmds.addAttr('aiAOV_%s' % aov_name,
-                 ln='attr_id',
-                 at='bool',
-                 hidden=True)
+    :param aov_names: list of aov names
+    :param template: the network template, ID_SHADER_TEMPLATE if None
+    :return: dictionary where keys are the aov names and values a
+             dictionary of the template keys and the nodes created
+    """
+
+    template = template or ID_SHADER_TEMPLATE
+
+    networks = collections.OrderedDict()
+
+    for aov_name in aov_names:
+        nodes = {"aov": "aiAOV_%s" % aov_name}
+
+        for key, node_type, name, as_shader in template["nodes"]:
+            name = name.format(aov=aov_name)
+
+            if as_shader:
+                nodes[key] = cmds.shadingNode(node_type,
+                                              name=name,
+                                              asShader=True)
+            else:
+                nodes[key] = cmds.createNode(node_type, name=name)
+
+        for plug, value in template["string_attributes"]:
+            key, attribute = plug.split(".", 1)
+
+            cmds.setAttr("%s.%s" % (nodes[key], attribute),
+                         value.format(aov=aov_name),
+                         type="string")
+
+        for source, destination in template["connections"]:
+            source_key, source_attribute = source.split(".", 1)
+            key, attribute = destination.split(".", 1)
+
+            cmds.connectAttr("%s.%s" % (nodes[source_key], source_attribute),
+                             "%s.%s" % (nodes[key], attribute),
+                             force=True)
+
+        networks[aov_name] = nodes
+
+    ai_aovs = [x["aov"] for x in networks.values()]
+
+    if ai_aovs:
+        # Add the attr_id to be identified as an attr id aov type
+        cmds.addAttr(ai_aovs,
+                     ln='attr_id',
+                     at='bool',
+                     hidden=True)
+
+        for ai_aov in ai_aovs:
+            aov_registry.registry.add(ai_aov, id_aov=True)
+
+    return networks
+
+
+def create_connect_aov_shader(aov_name):
+    """
+
+    :param aov_name: the name of an aov object as a string
+    :return: the name of the created surface shader as a string
+    """
 
-    return surface_shader
+    return create_aov_shader_networks([aov_name])[aov_name]["shader"]
 
 
 def create_arnold_options():
+    from mtoa import core
+
     core.createOptions()
 
     return
@@ -314,6 +938,51 @@ def get_object_shape_node(node):
     return shape_node
 
 
+def get_objects_shape_nodes(nodes):
+    """
+    Bulk version of get_object_shape_node
+
+    :param nodes: list of dag node long names
+    :return: dictionary where keys are the nodes and values the first shape
+             node found under each node
+    """
+
+    nodes = set(nodes)
+    shape_nodes = dict()
+
+    # Maya lists the whole scene for an empty list
+    if not nodes:
+        return shape_nodes
+
+    for shape_node in cmds.ls(list(nodes), dag=True, shapes=True,
+                              long=True) or []:
+        parent = shape_node.rsplit("|", 1)[0]
+
+        # Assign the shape to every requested ancestor without a shape yet
+        while parent:
+            if parent in nodes and parent not in shape_nodes:
+                shape_nodes[parent] = shape_node
+            parent = parent.rsplit("|", 1)[0]
+
+    return shape_nodes
+
+
+def get_nodes_types(nodes):
+    """
+
+    :param nodes: list of node names
+    :return: dictionary where keys are the nodes and values their node type
+    """
+
+    nodes = list(nodes)
+    if not nodes:
+        return dict()
+
+    typed_nodes = cmds.ls(nodes, showType=True, long=True) or []
+
+    return dict(zip(typed_nodes[::2], typed_nodes[1::2]))
+
+
 def get_object_short_name(node):
     """
 
@@ -353,29 +1022,80 @@ def get_render_layer_objects(render_layer):
                                                q=True,
                                                fullNames=True) or []
 
-    layer_objects = list(set(objects_list)) or None
-
-    if layer_objects is None:
+    if not objects_list:
         return False
 
     layer_transform_nodes = []
 
-    for node in layer_objects:
-        if cmds.nodeType(node) != "transform":
-            transform_node = cmds.listRelatives(node,
-                                                parent=True,
-                                                fullPath=True)
-            transform_valid = transform_node[0] not in layer_transform_nodes
-
-            if transform_node and transform_valid:
-                layer_transform_nodes.append(transform_node[0])
-        else:
-            if node not in layer_transform_nodes:
-                layer_transform_nodes.append(node)
+    # Query the node types of all the members at once
+    add_layer_transform_nodes(objects_list, layer_transform_nodes, set())
 
     return layer_transform_nodes
 
 
+def add_layer_transform_nodes(members, layer_transform_nodes,
+                              transform_nodes):
+    """
+    Resolve render layer members to their transform nodes
+
+    :param members: list of render layer member long names
+    :param layer_transform_nodes: list extended with the transform nodes
+                                  not found yet, in member order
+    :param transform_nodes: set of the transform nodes found
+    :return:
+    """
+
+    node_types = get_nodes_types(members)
+
+    for node in members:
+        if node_types.get(node) != "transform":
+            # Get the parent transform from the member long name
+            if "|" not in node:
+                continue
+
+            node = node.rsplit("|", 1)[0]
+
+            if not node:
+                continue
+
+        if node not in transform_nodes:
+            transform_nodes.add(node)
+            layer_transform_nodes.append(node)
+
+    return
+
+
+def iter_render_layer_objects(render_layer, layer_objects,
+                              chunk_size=ID_SCAN_CHUNK_SIZE):
+    """
+    Cooperative get_render_layer_objects, the generator yields after each
+    chunk of members
+
+    The members are listed by a single editRenderLayerMembers command which
+    cannot be split, it is the longest step on the largest render layers
+
+    :param render_layer: the name a render layer as a string
+    :param layer_objects: list extended with the render layer transform
+                          nodes
+    :param chunk_size: number of members resolved per step
+    :return: generator of empty iter_id_scan steps
+    """
+
+    members = cmds.editRenderLayerMembers(render_layer,
+                                          q=True,
+                                          fullNames=True) or []
+
+    yield 0, 0, None, None
+
+    transform_nodes = set()
+
+    for start in range(0, len(members), chunk_size):
+        add_layer_transform_nodes(members[start:start + chunk_size],
+                                  layer_objects, transform_nodes)
+
+        yield 0, 0, None, None
+
+
 def get_object_primary_visibility(node):
     """
 
@@ -412,3 +1132,112 @@ def get_object_primary_visibility(node):
             return False
 
     return True
+
+
+def get_visible_objects(nodes, hidden_nodes=None):
+    """
+    Bulk version of get_object_primary_visibility
+
+    The existing primary visibility plugs are resolved for all nodes at
+    once, then read with one getAttr each, and the primary visibility
+    override of each object set is evaluated only once
+
+    :param nodes: list of transform or mesh node long names
+    :param hidden_nodes: the get_hidden_set_members result, queried if None
+    :return: list of the nodes with primary visibility on, in input order
+    """
+
+    override = "primaryVisibility"
+
+    if not nodes:
+        return []
+
+    node_types = get_nodes_types(nodes)
+    shape_nodes = get_objects_shape_nodes(nodes)
+
+    for node in nodes:
+        if node_types.get(node) == "mesh":
+            shape_nodes[node] = node
+
+    # Query the existing visibility plugs at once
+    plugs = ["%s.%s" % (shape_nodes[x], override) for x in nodes
+             if x in shape_nodes]
+
+    # Maya lists the whole scene for an empty list
+    if not plugs:
+        return []
+
+    existing_plugs = set(cmds.ls(plugs, long=True) or [])
+
+    visible_nodes = []
+    for node in nodes:
+        plug = "%s.%s" % (shape_nodes.get(node), override)
+
+        if plug not in existing_plugs:
+            continue
+
+        if cmds.getAttr(plug) is False:
+            continue
+
+        visible_nodes.append(node)
+
+    if hidden_nodes is None:
+        hidden_nodes = get_hidden_set_members()
+
+    return [x for x in visible_nodes if x not in hidden_nodes]
+
+
+def get_hidden_set_members():
+    """
+
+    :return: set of the long names of the objects added to an object set
+             with a primary visibility override turned off
+    """
+
+    hidden_nodes = set()
+
+    for _ in iter_hidden_set_members(hidden_nodes):
+        pass
+
+    return hidden_nodes
+
+
+def iter_hidden_set_members(hidden_nodes, chunk_size=ID_SCAN_CHUNK_SIZE):
+    """
+    Cooperative get_hidden_set_members, the generator yields after the
+    object sets query, after each members query and after each chunk of
+    members resolved
+
+    The object sets and the members of a set are each listed by a single
+    command which cannot be split
+
+    :param hidden_nodes: set updated with the long names of the hidden set
+                         members
+    :param chunk_size: number of set members resolved per step
+    :return: generator of empty iter_id_scan steps
+    """
+
+    override = "primaryVisibility"
+
+    object_sets = cmds.ls(type="objectSet") or []
+
+    if not object_sets:
+        return
+
+    override_plugs = cmds.ls(["%s.%s" % (x, override) for x in object_sets])
+
+    yield 0, 0, None, None
+
+    for plug in override_plugs or []:
+        if cmds.getAttr(plug) is not False:
+            continue
+
+        set_members = cmds.sets(plug.split(".")[0], q=True) or []
+
+        yield 0, 0, None, None
+
+        for start in range(0, len(set_members), chunk_size):
+            hidden_nodes.update(cmds.ls(set_members[start:start + chunk_size],
+                                        long=True) or [])
+
+            yield 0, 0, None, None
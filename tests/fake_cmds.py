@@ -0,0 +1,67 @@
+"""
+In memory stand-in for the parts of maya.cmds used by the id manager
+
+The fake scene is the offline backend of id_manager/snapshot.py, this
+module installs it for the tests and builds the test scenes
+
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "id_manager"))
+
+import snapshot
+
+FakeCmds = snapshot.SnapshotCmds
+
+DAG_SHAPES = snapshot.DAG_SHAPES
+
+
+def install(fake_cmds=None):
+    """
+    Register fake maya and mtoa modules and put the id_manager package
+    folder on the python path so its modules can be imported stand alone
+
+    :param fake_cmds: the FakeCmds instance to serve as maya.cmds
+    :return: the FakeCmds instance installed
+    """
+
+    return snapshot.install(fake_cmds)
+
+
+def build_scene(object_count, id_sets, layer="layer1"):
+    """
+    Build a fake scene with meshes added to a render layer and id values
+    spread across the id set colors
+
+    :param object_count: number of meshes to create
+    :param id_sets: list of id set names
+    :param layer: the render layer name
+    :return: the FakeCmds instance with the scene
+    """
+
+    fake_cmds = FakeCmds()
+
+    group = fake_cmds.create_node("geo_GRP", "transform")
+
+    members = []
+    for index in range(object_count):
+        members.append(fake_cmds.create_mesh("obj%s_GEO" % index, group))
+
+    fake_cmds.create_render_layer(layer, members)
+    fake_cmds.current_layer = layer
+
+    colors = [(1, 0, 0), (0, 1, 0), (0, 0, 1), None]
+
+    for set_index, id_set in enumerate(id_sets):
+        attribute = "mtoa_constant_%s" % id_set
+        for index, member in enumerate(members):
+            color = colors[(index + set_index) % len(colors)]
+            if color is None:
+                continue
+            shape = fake_cmds.children[member][0]
+            fake_cmds.add_attribute(shape, attribute, [color])
+
+    return fake_cmds
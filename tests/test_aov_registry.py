@@ -0,0 +1,77 @@
+import unittest
+
+from tests import fake_cmds
+
+
+class AovRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(4, ["idA"]))
+        import aov_registry
+        self.registry = aov_registry.AovRegistry()
+
+        for ai_aov in ("aiAOV_idA", "aiAOV_beauty2"):
+            self.cmds.create_node(ai_aov, "aiAOV")
+            self.cmds.add_attribute(ai_aov, "enabled", False)
+
+        self.cmds.add_attribute("aiAOV_idA", "attr_id", False)
+
+    def test_scan_without_callbacks(self):
+        """
+        Without callbacks every query reads the scene
+        """
+        self.assertEqual(self.registry.get_id_aovs(), ["aiAOV_idA"])
+
+        self.cmds.create_node("aiAOV_idB", "aiAOV")
+        self.cmds.add_attribute("aiAOV_idB", "attr_id", False)
+
+        self.assertEqual(self.registry.get_id_aovs(),
+                         ["aiAOV_idA", "aiAOV_idB"])
+        self.assertTrue(self.registry.is_id_aov("aiAOV_idB"))
+        self.assertFalse(self.registry.exists("aiAOV_idC"))
+
+    def test_tracking_lookups(self):
+        """
+        While tracking the scene is scanned once and kept up to date
+        """
+        self.registry.tracking = True
+
+        self.assertEqual(self.registry.get_aovs(),
+                         ["aiAOV_idA", "aiAOV_beauty2"])
+
+        self.cmds.calls.clear()
+
+        self.assertTrue(self.registry.exists("aiAOV_idA"))
+        self.assertFalse(self.registry.is_id_aov("aiAOV_beauty2"))
+
+        self.registry.add("aiAOV_idB", id_aov=True)
+        self.registry.remove("aiAOV_idA")
+
+        self.assertEqual(self.registry.get_id_aovs(), ["aiAOV_idB"])
+        self.assertEqual(sum(self.cmds.calls.values()), 0)
+        self.assertEqual(self.registry.scans, 1)
+
+    def test_rename_and_id_attribute(self):
+        """
+        Renamed aovs keep their ls order and attr_id changes are read on
+        the next query
+        """
+        self.registry.tracking = True
+        self.registry.get_aovs()
+
+        self.registry.rename("aiAOV_idA", "aiAOV_idZ")
+        self.cmds.add_attribute("aiAOV_beauty2", "attr_id", False)
+
+        self.assertEqual(self.registry.get_aovs(),
+                         ["aiAOV_idZ", "aiAOV_beauty2"])
+        self.assertEqual(self.registry.get_id_aovs(), ["aiAOV_idZ"])
+
+        self.registry.check_id_attribute("aiAOV_beauty2")
+
+        self.assertEqual(self.registry.get_id_aovs(),
+                         ["aiAOV_idZ", "aiAOV_beauty2"])
+        self.assertEqual(self.registry.scans, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import warnings
+
+from tests import fake_cmds
+
+# imp loads the command line tool on python 2 and 3 alike
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    import imp
+
+CLI_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "bin", "id_manager-admin.py")
+
+
+class BatchOperationsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(4, ["idA"]))
+        import batch
+        self.batch = batch
+
+        self.cmds.create_node("aiAOV_idA", "aiAOV")
+        self.cmds.add_attribute("aiAOV_idA", "enabled", False)
+        self.cmds.add_attribute("aiAOV_idA", "attr_id", False)
+
+        self.objects = ["|geo_GRP|obj%s_GEO" % x for x in range(4)]
+
+    def test_assign_ids(self):
+        """
+        Objects matching the patterns are assigned the id color
+        """
+        report = self.batch.assign_ids("idA", "Blue", ["obj[12]_*"],
+                                       "layer1")
+
+        self.assertEqual(sorted(report), self.objects[1:3])
+
+        id_dict = self.batch.list_ids(["idA"])["layer1"]["idA"]
+        self.assertEqual(sorted(id_dict["Blue"]), self.objects[1:3])
+
+    def test_restore_render_layer(self):
+        """
+        The operations switching render layers restore the current layer
+        """
+        self.cmds.create_render_layer("layer2", self.objects[:2])
+
+        self.batch.assign_ids("idA", "Blue", ["obj1_*"], "layer2")
+        self.assertEqual(self.cmds.current_layer, "layer1")
+
+        self.batch.copy_ids(self.batch.list_ids(["idA"]))
+        self.assertEqual(self.cmds.current_layer, "layer1")
+
+    def test_copy_ids(self):
+        """
+        Copied objects keep their color with their alpha and negative colors
+        """
+        shapes = ["%s|obj%s_GEOShape" % (x, i)
+                  for i, x in enumerate(self.objects)]
+
+        self.cmds.add_attribute(shapes[0], "mtoa_constant_idA_Alpha",
+                                [(1, 1, 1)])
+        self.cmds.add_attribute(shapes[1], "mtoa_constant_idA",
+                                [(0, -1, 0)])
+
+        layers_dict = self.batch.list_ids(["idA"])
+        self.assertIn(self.objects[0], layers_dict["layer1"]["idA"]["Alpha"])
+        self.assertIn(self.objects[1],
+                      layers_dict["layer1"]["idA"]["Green_Neg"])
+
+        copied = self.batch.copy_ids(layers_dict)
+        self.assertEqual(copied, {"layer1": {"idA": 4}})
+
+        self.assertEqual(self.batch.list_ids(["idA"]), layers_dict)
+        self.assertEqual(self.cmds.getAttr(shapes[0] +
+                                           ".mtoa_constant_idA_Alpha"),
+                         [(1, 1, 1)])
+
+    def test_validate_ids(self):
+        """
+        Invalid id values are reported
+        """
+        self.cmds.add_attribute(self.objects[3] + "|obj3_GEOShape",
+                                "mtoa_constant_idA", [(1, 1, 0)])
+
+        issues = self.batch.validate_ids()
+
+        self.assertEqual(len(issues), 2)
+        self.assertIn("no id shader", issues[0])
+        self.assertIn("obj3_GEO.mtoa_constant_idA", issues[1])
+
+    def test_process_snapshots_offline(self):
+        """
+        Operations run on snapshot files without Maya
+        """
+        import snapshot
+
+        temp_folder = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(temp_folder, "shot.snapshot.json")
+            snapshot.write_snapshot(self.cmds.to_snapshot(), file_path)
+
+            results = self.batch.process_scenes([file_path], "assign",
+                                                {"id_set": "idA",
+                                                 "id_color": "Blue",
+                                                 "patterns": ["obj1_*"],
+                                                 "render_layer": "layer1"},
+                                                save=True,
+                                                offline=True)
+
+            self.assertEqual(list(results[0]["result"]), self.objects[1:2])
+
+            results = self.batch.process_scenes([file_path], "list",
+                                                offline=True)
+
+            self.assertIn(self.objects[1],
+                          results[0]["result"]["layer1"]["idA"]["Blue"])
+        finally:
+            shutil.rmtree(temp_folder)
+
+
+class CommandLineTests(unittest.TestCase):
+
+    def setUp(self):
+        fake_cmds.install()
+
+        modules = dict(sys.modules)
+        self.addCleanup(self.restore_modules, modules)
+
+        # mtoa is only importable in the Maya sessions of the workers
+        for name in ("mtoa", "mtoa.core", "mtoa.aovs"):
+            sys.modules[name] = None
+
+        package_folder = os.path.dirname(sys.modules["snapshot"].__file__)
+
+        for name, module in modules.items():
+            if name.startswith("id_manager") or \
+                    os.path.dirname(getattr(module, "__file__", None) or
+                                    "") == package_folder:
+                del sys.modules[name]
+
+    def restore_modules(self, modules):
+        for name in list(sys.modules):
+            if name not in modules:
+                del sys.modules[name]
+
+        sys.modules.update(modules)
+
+    def test_import_without_mtoa(self):
+        """
+        The command line tool and the batch operations import before the
+        Maya session loads mtoa
+        """
+        self.assertRaises(ImportError, __import__, "mtoa")
+
+        # run_path clears the globals it returns on python 2
+        cli = imp.load_source("id_manager_admin", CLI_PATH)
+
+        options = cli.parse_args(["validate", "shot.ma"])
+        self.assertEqual(options.operation, "validate")
+
+        from id_manager import batch
+        self.assertIn("validate", batch.OPERATIONS)
+
+
+if __name__ == '__main__':
+    unittest.main()
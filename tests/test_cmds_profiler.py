@@ -0,0 +1,55 @@
+import unittest
+
+from tests import fake_cmds
+
+
+class CmdsProfilerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(20, ["idA"]))
+        import cmds_profiler
+        import utils
+        self.cmds_profiler = cmds_profiler
+        self.utils = utils
+
+    def tearDown(self):
+        self.cmds_profiler.disable()
+
+    def test_records_calls(self):
+        """
+        Every cmds call is recorded per command and per call site
+        """
+        profiler = self.cmds_profiler.enable([self.utils])
+
+        self.utils.id_objects_dict(["idA"])
+
+        commands = dict((x["command"], x) for x in profiler.report()["commands"])
+
+        self.assertEqual(dict((x, y["count"]) for x, y in commands.items()),
+                         dict(self.cmds.calls))
+
+        call_sites = profiler.report()["call_sites"]
+        self.assertTrue(all(x["call_site"].startswith("utils.py:")
+                            for x in call_sites))
+
+        self.assertEqual(sum(x["count"] for x in call_sites
+                             if x["command"] == "getAttr"),
+                         self.cmds.calls["getAttr"])
+
+        self.assertTrue(any("... 20 items]" in x[1]
+                            for x in commands["ls"]["slowest"]))
+
+    def test_disable_restores_cmds(self):
+        """
+        Disabling gives the modules their cmds back
+        """
+        self.cmds_profiler.enable([self.utils])
+        self.assertIsNot(self.utils.cmds, self.cmds)
+
+        self.cmds_profiler.disable()
+        self.assertIs(self.utils.cmds, self.cmds)
+        self.assertFalse(self.cmds_profiler.is_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
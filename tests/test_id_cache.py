@@ -0,0 +1,119 @@
+import unittest
+
+from tests import fake_cmds
+
+
+class IdCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(8, ["idA",
+                                                                "idB"]))
+        import id_cache
+        self.cache = id_cache.IdCache(max_layers=1)
+
+    def test_hits(self):
+        """
+        A second lookup of the same layer and id sets does not query maya
+        """
+        first = self.cache.id_objects_dict(["idA", "idB"])
+
+        self.cmds.calls.clear()
+        second = self.cache.id_objects_dict(["idA", "idB"])
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(sum(self.cmds.calls.values()), 1)
+
+    def test_dirty_objects(self):
+        """
+        Only dirty objects are rescanned and their new ids are returned
+        """
+        self.cache.id_objects_dict(["idA"])
+
+        shape = "|geo_GRP|obj3_GEO|obj3_GEOShape"
+        self.cmds.add_attribute(shape, "mtoa_constant_idA", [(1, 0, 0)])
+        self.cache.mark_dirty([shape])
+
+        id_dict = self.cache.id_objects_dict(["idA"])
+
+        self.assertIn("|geo_GRP|obj3_GEO", id_dict["idA"]["Red"])
+        self.assertNotIn("|geo_GRP|obj3_GEO", id_dict["idA"]["Holdout"])
+        self.assertEqual(self.cache.dirty_refreshes, 1)
+
+    def test_dirty_outside_dag(self):
+        """
+        Names without a dag path separator that are not members are ignored
+        """
+        self.cache.id_objects_dict(["idA"])
+
+        self.cache.mark_dirty(["defaultRenderGlobals", "|geo_GRP"])
+
+        self.cache.id_objects_dict(["idA"])
+        self.assertEqual(self.cache.dirty_refreshes, 0)
+
+    def test_invalidate_nodes(self):
+        """
+        Renaming a member or one of its parents drops the layer cache, a node
+        below a member only flags the member as dirty
+        """
+        for node in ("|geo_GRP", "|geo_GRP|obj3_GEO"):
+            self.cache.id_objects_dict(["idA"])
+
+            self.cache.invalidate_nodes([node])
+            self.assertEqual(self.cache.stats()["layers"], [])
+
+        self.cache.id_objects_dict(["idA"])
+        self.cache.invalidate_nodes(["|geo_GRP|obj3_GEO|obj3_GEOShape",
+                                     "|other_GRP"])
+
+        self.assertEqual(self.cache.stats()["layers"], ["layer1"])
+
+        self.cache.id_objects_dict(["idA"])
+        self.assertEqual(self.cache.dirty_refreshes, 1)
+
+    def test_iter_id_objects_dict(self):
+        """
+        The cooperative scan fills the cache, cached id sets come first
+        """
+        self.cache.id_objects_dict(["idB"])
+
+        steps = list(self.cache.iter_id_objects_dict(["idA", "idB"],
+                                                     chunk_size=5))
+
+        self.assertEqual([x[2] for x in steps if x[2]], ["idB", "idA"])
+
+        self.cmds.calls.clear()
+        id_dict = self.cache.id_objects_dict(["idA", "idB"])
+
+        self.assertEqual(id_dict, dict((x[2], x[3]) for x in steps
+                                       if x[2] is not None))
+        self.assertEqual(sum(self.cmds.calls.values()), 1)
+
+    def test_iter_new_layer(self):
+        """
+        The members of a layer not cached yet are resolved in chunks
+        """
+        steps = list(self.cache.iter_id_objects_dict(["idA", "idB"],
+                                                     chunk_size=3))
+
+        import utils
+        self.assertEqual(dict((x[2], x[3]) for x in steps
+                              if x[2] is not None),
+                         utils.id_objects_dict(["idA", "idB"]))
+        self.assertEqual(self.cache.stats()["layers"], ["layer1"])
+
+    def test_layer_limit(self):
+        """
+        The least recently used layers are dropped
+        """
+        self.cmds.create_render_layer("layer2", [])
+
+        self.cache.id_objects_dict(["idA"], render_layer="layer1")
+        self.cache.id_objects_dict(["idA"], render_layer="layer2")
+
+        self.assertEqual(self.cache.stats()["layers"], ["layer2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
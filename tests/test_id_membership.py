@@ -0,0 +1,68 @@
+import unittest
+
+from tests import fake_cmds
+
+
+class IdSetMembershipTests(unittest.TestCase):
+
+    def setUp(self):
+        fake_cmds.install()
+        import id_membership
+        self.id_membership = id_membership
+
+        self.table = id_membership.ObjectTable()
+        self.membership = id_membership.IdSetMembership(self.table)
+
+        indexes = self.table.indexes(["|obj%s" % x for x in range(12)])
+        self.membership.add(indexes, {"Red": [0, 4],
+                                      "Green": [2],
+                                      "Alpha": [2]})
+
+    def test_id_colors(self):
+        """
+        Colors list their objects in table order, holdout being the rest
+        """
+        self.assertEqual(self.membership["Red"], ["|obj0", "|obj4"])
+        self.assertEqual(self.membership["Blue"], [])
+        self.assertEqual(self.membership["Holdout"],
+                         ["|obj1", "|obj3"] +
+                         ["|obj%s" % x for x in range(5, 12)])
+        self.assertEqual(self.membership.count("Holdout"), 9)
+
+        self.assertEqual(sorted(self.membership),
+                         ["Alpha", "Blue", "Green", "Holdout", "Red"])
+        self.assertRaises(KeyError, self.membership.__getitem__, "Red_Neg")
+        self.assertEqual(self.membership.get("Red_Neg", []), [])
+
+    def test_shared_table(self):
+        """
+        Id sets sharing a table store each object name once
+        """
+        other = self.id_membership.IdSetMembership(self.table)
+        other.add(self.table.indexes(["|obj4", "|obj12"]), {"Blue": [4]})
+
+        self.assertEqual(len(self.table), 13)
+        self.assertEqual(other.to_dict(), {"Red": [],
+                                           "Green": [],
+                                           "Blue": ["|obj4"],
+                                           "Holdout": ["|obj12"]})
+
+        # The other id set objects are not holdouts of the first one
+        self.assertNotIn("|obj12", self.membership["Holdout"])
+
+    def test_lookup_before_names(self):
+        """
+        Names added to an empty table which was already looked up are found
+        """
+        table = self.id_membership.ObjectTable()
+        self.assertNotIn("|obj0", table)
+
+        self.assertEqual(table.indexes(["|obj0", "|obj1"]), [0, 1])
+        self.assertIn("|obj1", table)
+        self.assertEqual(table.index("|obj1"), 1)
+        self.assertEqual(table.indexes(["|obj1", "|obj2"]), [1, 2])
+        self.assertEqual(len(table), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import fake_cmds
+
+
+class LayersIdDictTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(4, ["idA"]))
+        import id_report
+        self.id_report = id_report
+
+        self.objects = ["|geo_GRP|obj%s_GEO" % x for x in range(4)]
+
+        self.cmds.create_render_layer("layer2", self.objects[:2])
+        self.cmds.add_override("layer2",
+                               self.objects[0] + "|obj0_GEOShape"
+                               ".mtoa_constant_idA",
+                               [(0, 0, 1)])
+
+    def test_layers_id_dict(self):
+        """
+        Layer adjustments are read without switching render layers
+        """
+        self.cmds.calls.clear()
+        layers_dict = self.id_report.layers_id_dict(["idA"])
+
+        self.assertEqual(layers_dict["layer1"]["idA"]["Red"],
+                         [self.objects[0]])
+        self.assertEqual(layers_dict["layer2"]["idA"]["Blue"],
+                         [self.objects[0]])
+        self.assertEqual(layers_dict["layer2"]["idA"]["Green"],
+                         [self.objects[1]])
+        # Only the current layer is queried
+        self.assertEqual(self.cmds.calls["editRenderLayerGlobals"], 1)
+        self.assertEqual(self.cmds.current_layer, "layer1")
+
+    def test_current_layer_values(self):
+        """
+        The current layer keeps the scanned values, not the adjustment
+        values stored on the last layer switch
+        """
+        plug = self.objects[0] + "|obj0_GEOShape.mtoa_constant_idA"
+        self.cmds.add_override("layer1", plug, [(1, 0, 0)])
+
+        utils = self.id_report.utils
+        get_layer_overrides = utils.get_layer_overrides
+        self.addCleanup(setattr, utils, "get_layer_overrides",
+                        get_layer_overrides)
+
+        def stale_layer_overrides(plugs):
+            layer_overrides = get_layer_overrides(plugs)
+            layer_overrides[plug]["layer1"] = [(0, 1, 0)]
+
+            return layer_overrides
+
+        utils.get_layer_overrides = stale_layer_overrides
+
+        layers_dict = self.id_report.layers_id_dict(["idA"])
+
+        self.assertEqual(layers_dict["layer1"]["idA"]["Red"],
+                         [self.objects[0]])
+        self.assertEqual(layers_dict["layer2"]["idA"]["Blue"],
+                         [self.objects[0]])
+
+    def test_export_json(self):
+        """
+        The layers id dictionary is exported as json
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+
+        file_path = os.path.join(folder, "ids.json")
+        self.id_report.export_layers_id_json(file_path, ["idA"])
+
+        with open(file_path) as json_file:
+            layers_dict = json.load(json_file)
+
+        self.assertEqual(sorted(layers_dict), ["layer1", "layer2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
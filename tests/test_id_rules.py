@@ -0,0 +1,122 @@
+import unittest
+
+from tests import fake_cmds
+
+
+class IdRulesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(6, ["idA"]))
+        import id_rules
+        self.id_rules = id_rules
+
+        self.cmds.create_node("aiAOV_idA", "aiAOV")
+        self.cmds.add_attribute("aiAOV_idA", "enabled", False)
+        self.cmds.add_attribute("aiAOV_idA", "attr_id", False)
+
+        self.objects = ["|geo_GRP|obj%s_GEO" % x for x in range(6)]
+
+    def test_first_rule_wins(self):
+        """
+        Objects get the color of the first rule they match
+        """
+        rules = self.id_rules.IdRules([
+            {"glob": "obj1_*", "id_set": "idA", "color": "Green"},
+            {"regex": r"obj\d_GEO", "id_set": "idA", "color": "Blue"},
+            {"set": "red_SET", "id_set": "idA", "color": "Red"}])
+
+        self.cmds.create_set("red_SET", self.objects[:2])
+
+        self.assertEqual(rules.match(self.objects[0])["color"], "Blue")
+        self.assertEqual(rules.match(self.objects[1])["color"], "Green")
+        self.assertIsNone(rules.match("|geo_GRP|other_GEO"))
+
+    def test_empty_set(self):
+        """
+        Empty object sets match no object
+        """
+        rules = self.id_rules.IdRules([
+            {"set": "empty_SET", "id_set": "idA", "color": "Red"}])
+
+        self.cmds.create_set("empty_SET", [])
+
+        self.assertIsNone(rules.match(self.objects[0]))
+
+    def test_regex_rules(self):
+        """
+        The groups and backreferences of each regex are kept
+        """
+        rules = self.id_rules.IdRules([
+            {"regex": r"(?P<name>obj)1_GEO", "id_set": "idA",
+             "color": "Green"},
+            {"regex": r"(\w)\1_GEO", "id_set": "idA", "color": "Red"},
+            {"regex": r"(?P<name>\w+)\d_GEO", "id_set": "idA",
+             "color": "Blue"}])
+
+        self.assertEqual(rules.match(self.objects[1])["color"], "Green")
+        self.assertEqual(rules.match("|geo_GRP|aa_GEO")["color"], "Red")
+        self.assertEqual(rules.match(self.objects[2])["color"], "Blue")
+        self.assertIsNone(rules.match("|geo_GRP|ab_GEO"))
+
+        self.assertRaises(ValueError, self.id_rules.IdRules,
+                          [{"regex": "obj(", "id_set": "idA",
+                            "color": "Red"}])
+
+    def test_dry_run(self):
+        """
+        The dry run reports the changes without assigning them
+        """
+        rules = self.id_rules.IdRules([
+            {"glob": "obj*_GEO", "id_set": "idA", "color": "Red"}])
+
+        changes = self.id_rules.apply_rules(rules, dry_run=True)
+
+        # obj0 and obj4 are already red
+        self.assertEqual(len(changes), 4)
+        self.assertEqual(self.cmds.calls["setAttr"], 0)
+
+        self.id_rules.apply_rules(rules)
+
+        self.assertEqual(self.id_rules.apply_rules(rules, dry_run=True), [])
+
+    def test_current_colors(self):
+        """
+        Objects with an alpha color besides the rule color are changed
+        """
+        self.cmds.add_attribute(self.objects[0] + "|obj0_GEOShape",
+                                "mtoa_constant_idA_Alpha", [(1, 1, 1)])
+
+        rules = self.id_rules.IdRules([
+            {"glob": "obj[04]_GEO", "id_set": "idA", "color": "Red"}])
+
+        changes = self.id_rules.apply_rules(rules, dry_run=True)
+
+        self.assertEqual(changes, [(self.objects[0], "idA", ["Alpha", "Red"],
+                                    "Red")])
+
+    def test_restore_render_layer(self):
+        """
+        The current render layer is restored, even when the rules fail
+        """
+        self.cmds.create_render_layer("layer2", self.objects[:3])
+
+        rules = self.id_rules.IdRules([
+            {"glob": "obj*_GEO", "id_set": "idA", "color": "Green"}])
+
+        changes = self.id_rules.apply_rules(rules, "layer2")
+
+        self.assertEqual(len(changes), 2)
+        self.assertEqual(self.cmds.current_layer, "layer1")
+
+        def match(object_name):
+            raise ValueError(object_name)
+
+        rules.match = match
+
+        self.assertRaises(ValueError, self.id_rules.apply_rules, rules,
+                          "layer2")
+        self.assertEqual(self.cmds.current_layer, "layer1")
+
+
+if __name__ == '__main__':
+    unittest.main()
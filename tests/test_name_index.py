@@ -0,0 +1,77 @@
+import fnmatch
+import unittest
+
+from tests import fake_cmds
+
+
+class NameIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        fake_cmds.install()
+        import name_index
+        self.name_index = name_index
+
+        self.objects = ["|scene|char%s_GRP|body%s_GEO" % (x // 10, x)
+                        for x in range(40)]
+        self.objects.append("|scene|Eye_GEO")
+        self.objects.append("|scene|ref:eye_GEO")
+
+        self.index = name_index.NameIndex(self.objects)
+
+    def matching(self, text):
+        match = self.index.match(text)
+
+        return [x for x in self.objects if x in match]
+
+    def test_substring(self):
+        """
+        Texts are searched in the short names, case insensitive
+        """
+        self.assertEqual(self.matching("BODY12_"),
+                         ["|scene|char1_GRP|body12_GEO"])
+        self.assertEqual(self.matching("eye"),
+                         ["|scene|Eye_GEO", "|scene|ref:eye_GEO"])
+        self.assertEqual(len(self.matching("y")), 42)
+        self.assertEqual(self.matching("char"), [])
+
+    def test_glob(self):
+        """
+        Glob patterns match the whole short names, fnmatch style
+        """
+        for pattern in ["body1?_geo", "*3_geo", "body[!1]_*", "body[13]*",
+                        "*eye*", "?ody*", "ref:*", "[]x]*", "body[1"]:
+            self.assertEqual(
+                self.matching(pattern),
+                [x for x in self.objects if fnmatch.fnmatchcase(
+                    x.rsplit("|", 1)[-1].lower(), pattern)], pattern)
+
+        # Reversed ranges match nothing
+        self.assertEqual(self.matching("body[9-1]*"), [])
+
+    def test_filter(self):
+        """
+        Matches too large to list are tested on the objects filtered, only
+        up to the limit
+        """
+        self.name_index.MATCH_LIST_SIZE = 4
+        try:
+            match = self.index.match("_geo")
+            self.assertIsNone(match.objects)
+
+            found, position = match.filter(self.objects, 10, 5)
+            self.assertEqual(found, self.objects[10:15])
+            self.assertEqual(position, 15)
+
+            found, position = match.filter(self.objects, position)
+            self.assertEqual(found, self.objects[15:])
+            self.assertEqual(position, len(self.objects))
+        finally:
+            self.name_index.MATCH_LIST_SIZE = 2000
+
+        match = self.index.match("body3")
+        self.assertEqual(match.filter(self.objects, 1)[0],
+                         [self.objects[3]] + self.objects[30:40])
+
+
+if __name__ == '__main__':
+    unittest.main()
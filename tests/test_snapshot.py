@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import fake_cmds
+
+
+class SnapshotTests(unittest.TestCase):
+
+    def setUp(self):
+        scene = fake_cmds.build_scene(6, ["idA", "idB"])
+        scene.create_render_layer("layer2", scene.layer_members["layer1"][:3])
+        scene.create_set("hidden_SET", scene.layer_members["layer1"][:1],
+                         primary_visibility=False)
+        scene.add_override("layer2",
+                           "|geo_GRP|obj1_GEO|obj1_GEOShape.mtoa_constant_idA",
+                           [(0, 0, 1)])
+
+        self.cmds = fake_cmds.install(scene)
+        import snapshot
+        import utils
+        self.snapshot = snapshot
+        self.utils = utils
+
+        self.temp_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_folder)
+
+    def id_dicts(self):
+        id_dicts = dict()
+        for layer in ("layer1", "layer2"):
+            self.cmds.editRenderLayerGlobals(currentRenderLayer=layer)
+            id_dicts[layer] = self.utils.id_objects_dict(["idA", "idB"])
+
+        return id_dicts
+
+    def test_round_trip(self):
+        """
+        A scene rebuilt from its snapshot gives the same ids
+        """
+        expected = self.id_dicts()
+
+        for file_name in ("scene.json", "scene.json.gz"):
+            file_path = os.path.join(self.temp_folder, file_name)
+            self.snapshot.write_snapshot(self.cmds.to_snapshot(), file_path)
+
+            self.cmds = self.snapshot.install(
+                self.snapshot.load_snapshot(file_path))
+
+            self.assertEqual(self.id_dicts(), expected)
+
+    def test_file_open_and_save(self):
+        """
+        The file command opens and saves snapshots
+        """
+        file_path = os.path.join(self.temp_folder, "scene.json")
+        self.snapshot.write_snapshot(self.cmds.to_snapshot(), file_path)
+
+        backend = self.snapshot.install(self.snapshot.SnapshotCmds())
+        backend.file(file_path, open=True, force=True)
+
+        self.assertEqual(backend.file(q=True, sceneName=True), file_path)
+        self.assertTrue(backend.objExists("obj5_GEO"))
+
+        backend.add_attribute("|geo_GRP", "tag", 1)
+        backend.file(save=True, force=True)
+
+        self.assertEqual(self.snapshot.load_snapshot(file_path)
+                         .getAttr("|geo_GRP.tag"), 1)
+
+    def test_unsupported_version(self):
+        """
+        Snapshots of another version are rejected
+        """
+        data = self.cmds.to_snapshot()
+        data["version"] = 0
+
+        self.assertRaises(ValueError,
+                          self.snapshot.SnapshotCmds.from_snapshot, data)
+
+    def test_aov_interface(self):
+        """
+        The mtoa placeholder creates the aovs in the installed scene
+        """
+        ai_aov = self.snapshot.SnapshotAOVInterface().addAOV("idC", "rgb")
+
+        self.assertEqual(ai_aov, "aiAOV_idC")
+        self.assertEqual(self.cmds.ls(type="aiAOV"), ["aiAOV_idC"])
+        self.assertIs(self.cmds.getAttr("aiAOV_idC.enabled"), True)
+
+
+if __name__ == '__main__':
+    unittest.main()
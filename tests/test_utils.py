@@ -0,0 +1,392 @@
+import unittest
+
+from tests import fake_cmds
+
+
+class IdObjectsDictTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(8, ["idA",
+                                                                "idB"]))
+        import utils
+        self.utils = utils
+
+    def test_id_colors(self):
+        """
+        Objects are sorted into the id colors of each id set
+        """
+        id_dict = self.utils.id_objects_dict(["idA", "idB"])
+
+        objects = ["|geo_GRP|obj%s_GEO" % x for x in range(8)]
+
+        self.assertEqual(sorted(id_dict["idA"]["Red"]),
+                         [objects[0], objects[4]])
+        self.assertEqual(sorted(id_dict["idA"]["Holdout"]),
+                         [objects[3], objects[7]])
+        self.assertEqual(sorted(id_dict["idB"]["Blue"]),
+                         [objects[1], objects[5]])
+        self.assertEqual(sorted(id_dict["idB"]["Holdout"]),
+                         [objects[2], objects[6]])
+
+    def test_alpha_and_negative_colors(self):
+        """
+        Alpha and negative values are added to their own id color lists
+        """
+        shape = "|geo_GRP|obj3_GEO|obj3_GEOShape"
+        self.cmds.add_attribute(shape, "mtoa_constant_idA_Alpha",
+                                [(1, 1, 1)])
+        self.cmds.add_attribute(shape, "mtoa_constant_idA",
+                                [(0, -1, 0)])
+
+        id_dict = self.utils.id_objects_dict(["idA"])
+
+        self.assertEqual(id_dict["idA"]["Alpha"], ["|geo_GRP|obj3_GEO"])
+        self.assertEqual(id_dict["idA"]["Green_Neg"], ["|geo_GRP|obj3_GEO"])
+        self.assertNotIn("|geo_GRP|obj3_GEO", id_dict["idA"]["Holdout"])
+
+    def test_query_count(self):
+        """
+        The scan cost does not grow with the number of id sets
+        """
+        self.cmds.calls.clear()
+        self.utils.scan_id_objects(["|geo_GRP|obj%s_GEO" % x
+                                    for x in range(8)],
+                                   ["idA", "idB"])
+
+        self.assertEqual(self.cmds.calls["ls"], 3)
+        self.assertEqual(self.cmds.calls["listRelatives"], 0)
+        self.assertEqual(self.cmds.calls["attributeQuery"], 0)
+
+    def test_iter_id_objects_dict(self):
+        """
+        The cooperative scan yields per chunk and matches id_objects_dict
+        """
+        steps = list(self.utils.iter_id_objects_dict(["idA", "idB"],
+                                                     chunk_size=3))
+
+        id_dict = dict((x[2], x[3]) for x in steps if x[2] is not None)
+
+        self.assertEqual(id_dict, self.utils.id_objects_dict(["idA", "idB"]))
+
+        # 3 chunks of the 8 objects per id set
+        self.assertEqual([x[:2] for x in steps if x[1]],
+                         [(3, 16), (6, 16), (8, 16), (8, 16),
+                          (11, 16), (14, 16), (16, 16), (16, 16)])
+        self.assertEqual([x[2] for x in steps if x[2]], ["idA", "idB"])
+
+
+class RenderLayerObjectsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(4, []))
+        import utils
+        self.utils = utils
+
+    def test_render_layer_objects(self):
+        """
+        Shape members are resolved to their transforms in member order
+        """
+        objects = ["|geo_GRP|obj%s_GEO" % x for x in range(4)]
+
+        self.cmds.layer_members["layer1"] = [
+            objects[2] + "|obj2_GEOShape",
+            objects[0],
+            objects[2],
+            objects[1] + "|obj1_GEOShape",
+            objects[3]]
+
+        self.assertEqual(self.utils.get_render_layer_objects("layer1"),
+                         [objects[2], objects[0], objects[1], objects[3]])
+        self.assertEqual(self.cmds.calls["nodeType"], 0)
+        self.assertEqual(self.cmds.calls["listRelatives"], 0)
+
+    def test_empty_layer(self):
+        """
+        Layers without members return False
+        """
+        self.cmds.create_render_layer("layer2")
+
+        self.assertFalse(self.utils.get_render_layer_objects("layer2"))
+
+
+class VisibleObjectsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(6, []))
+        import utils
+        self.utils = utils
+
+        self.objects = ["|geo_GRP|obj%s_GEO" % x for x in range(6)]
+
+    def test_visible_objects(self):
+        """
+        Hidden shapes and members of hidden sets are filtered out
+        """
+        self.cmds.add_attribute(self.objects[1] + "|obj1_GEOShape",
+                                "primaryVisibility", False)
+        self.cmds.create_set("hidden_SET", self.objects[2:4], False)
+        self.cmds.create_set("visible_SET", self.objects[4:], True)
+
+        visible = self.utils.get_visible_objects(self.objects)
+
+        self.assertEqual(visible, [self.objects[0], self.objects[4],
+                                   self.objects[5]])
+        self.assertEqual(visible, [x for x in self.objects if
+                                   self.utils.get_object_primary_visibility(x)])
+
+    def test_set_queries(self):
+        """
+        Each object set is only queried once
+        """
+        self.cmds.create_set("hidden_SET", self.objects[2:4], False)
+
+        self.utils.get_visible_objects(self.objects)
+
+        self.assertEqual(self.cmds.calls["sets"], 1)
+        self.assertEqual(self.cmds.calls["listSets"], 0)
+
+    def test_empty_nodes(self):
+        """
+        Empty node lists are not queried, Maya would list the whole scene
+        """
+        self.assertEqual(self.utils.get_objects_shape_nodes([]), dict())
+
+        self.assertEqual(self.cmds.calls["ls"], 0)
+
+        # Only the type and the shapes of a group without shape are listed
+        group = self.cmds.create_node("empty_GRP", "transform")
+
+        self.assertEqual(self.utils.get_visible_objects([group], set()), [])
+        self.assertEqual(self.cmds.calls["ls"], 2)
+
+
+class SetAttributeIdsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install(fake_cmds.build_scene(8, ["idA"]))
+        import utils
+        self.utils = utils
+
+        self.objects = ["|geo_GRP|obj%s_GEO" % x for x in range(8)]
+
+    def test_set_attribute_ids(self):
+        """
+        The id color is set on every object and reported per object
+        """
+        report = self.utils.set_attribute_ids(self.objects + ["|missing"],
+                                              "idA", "Green")
+
+        id_dict = self.utils.id_objects_dict(["idA"])
+
+        self.assertEqual(sorted(id_dict["idA"]["Green"]), self.objects)
+        self.assertEqual(report["|missing"], "skipped")
+        self.assertEqual(report[self.objects[0]], "created")
+
+        report = self.utils.set_attribute_ids(self.objects, "idA", "Blue")
+        self.assertEqual(report[self.objects[0]], "assigned")
+
+    def test_alpha(self):
+        """
+        Alpha clears the color attribute and sets the alpha attribute
+        """
+        self.utils.set_attribute_id(self.objects[0], "idA", "Alpha")
+
+        id_dict = self.utils.id_objects_dict(["idA"])
+
+        self.assertEqual(id_dict["idA"]["Alpha"], [self.objects[0]])
+        self.assertNotIn(self.objects[0], id_dict["idA"]["Red"])
+
+    def test_query_count(self):
+        """
+        Layer adjustments are created in a single call
+        """
+        self.utils.set_attribute_ids(self.objects, "idA", "Red")
+
+        self.assertEqual(self.cmds.calls["editRenderLayerAdjustment"], 1)
+        self.assertEqual(self.cmds.calls["setAttr"], 16)
+
+    def test_transaction(self):
+        """
+        Nested id edits are run inside a single undo chunk
+        """
+        with self.utils.id_edit_transaction():
+            self.utils.set_attribute_ids(self.objects[:4], "idA", "Red")
+            self.utils.set_attribute_ids(self.objects[4:], "idA", "Blue")
+
+        # Open and close the chunk once
+        self.assertEqual(self.cmds.calls["undoInfo"], 2)
+
+
+class LayersAovsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install()
+        import utils
+        self.utils = utils
+
+        self.cmds.create_render_layer("layer1")
+        self.cmds.create_render_layer("layer2")
+
+        for aov, enabled in (("aiAOV_idA", False),
+                             ("aiAOV_idB", True),
+                             ("aiAOV_other", True)):
+            self.cmds.create_node(aov, "aiAOV")
+            self.cmds.add_attribute(aov, "enabled", enabled)
+
+        self.cmds.add_attribute("aiAOV_idA", "attr_id", False)
+        self.cmds.add_attribute("aiAOV_idB", "attr_id", False)
+        self.cmds.add_override("layer1", "aiAOV_idA.enabled", True)
+
+    def test_layers_aovs(self):
+        """
+        Id aovs are listed on the layers where they are enabled
+        """
+        self.assertEqual(self.utils.get_layers_aovs(),
+                         {"layer1": ["beauty", "idA", "idB"],
+                          "layer2": ["beauty", "idB"]})
+
+    def test_current_layer_values(self):
+        """
+        The current layer uses the attribute values, not the adjustment
+        values stored on the last layer switch
+        """
+        self.cmds.current_layer = "layer1"
+
+        get_layer_overrides = self.utils.get_layer_overrides
+        self.addCleanup(setattr, self.utils, "get_layer_overrides",
+                        get_layer_overrides)
+
+        def stale_layer_overrides(plugs):
+            layer_overrides = get_layer_overrides(plugs)
+            layer_overrides["aiAOV_idA.enabled"]["layer1"] = False
+            layer_overrides["aiAOV_idA.enabled"]["layer2"] = True
+
+            return layer_overrides
+
+        self.utils.get_layer_overrides = stale_layer_overrides
+
+        self.assertEqual(self.utils.get_layers_aovs(),
+                         {"layer1": ["beauty", "idA", "idB"],
+                          "layer2": ["beauty", "idA", "idB"]})
+
+    def test_query_count(self):
+        """
+        The layer overrides of all aovs are gathered in a single query
+        """
+        self.utils.get_layers_aovs()
+
+        self.assertEqual(self.cmds.calls["listConnections"], 1)
+        self.assertEqual(self.cmds.calls["attributeQuery"], 0)
+
+
+class LayerOverridesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install()
+        import utils
+        self.utils = utils
+
+        self.cmds.create_render_layer("layer1")
+
+        self.shapes = []
+        for group in ("charA_GRP", "charB_GRP"):
+            parent = self.cmds.create_node(group, "transform")
+            self.shapes.append(
+                "%s|body_GEOShape" % self.cmds.create_mesh("body_GEO",
+                                                           parent))
+
+        for shape in self.shapes:
+            self.cmds.add_attribute(shape, "mtoa_constant_idA", [(0, 0, 0)])
+
+    def test_duplicate_short_names(self):
+        """
+        Adjustments are reported on the plugs queried when shapes share the
+        same short name
+        """
+        plugs = ["%s.mtoa_constant_idA" % x for x in self.shapes]
+
+        self.cmds.add_override("layer1", plugs[0], [(1, 0, 0)])
+
+        self.assertEqual(self.cmds.listConnections(plugs, plugs=True,
+                                                   connections=True)[0],
+                         "charA_GRP|body_GEO|body_GEOShape.mtoa_constant_idA")
+
+        self.assertEqual(self.utils.get_layer_overrides(plugs),
+                         {plugs[0]: {"defaultRenderLayer": [(0, 0, 0)],
+                                     "layer1": [(1, 0, 0)]}})
+        self.assertEqual(self.cmds.calls["ls"], 1)
+
+
+class CreateIdAovsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = fake_cmds.install()
+        import utils
+        self.utils = utils
+
+        self.cmds.create_render_layer("layer1")
+        self.cmds.current_layer = "layer1"
+
+        for aov in ("aiAOV_idA", "aiAOV_idB"):
+            self.cmds.create_node(aov, "aiAOV")
+            self.cmds.add_attribute(aov, "enabled", False)
+
+        self.cmds.add_attribute("aiAOV_idA", "attr_id", False)
+
+        cmds = self.cmds
+
+        class AOVInterface(object):
+            def addAOV(self, aov_name, data_type):
+                ai_aov = cmds.create_node("aiAOV_%s" % aov_name, "aiAOV")
+                cmds.add_attribute(ai_aov, "enabled", True)
+
+        from mtoa import aovs
+        self.addCleanup(setattr, aovs, "AOVInterface", aovs.AOVInterface)
+        aovs.AOVInterface = AOVInterface
+
+    def test_create_id_aovs(self):
+        """
+        Missing aovs are created and every aov becomes an id aov enabled
+        on the layer
+        """
+        ai_aovs = self.utils.create_id_aovs(["idA", "idB", "idC", "idC"],
+                                            "layer1")
+
+        self.assertEqual(ai_aovs, ["aiAOV_idA", "aiAOV_idB", "aiAOV_idC"])
+        self.assertEqual(self.utils.get_id_aovs(), ai_aovs)
+
+        for ai_aov in ai_aovs:
+            self.assertIs(self.cmds.getAttr("%s.enabled" % ai_aov), 1)
+
+        # Only the new aov is disabled on the other layers
+        self.assertEqual(
+            self.cmds.adjustments["layer1"]["aiAOV_idC.enabled"], 1)
+        self.assertEqual(self.cmds.attributes["aiAOV_idC"]["enabled"], 0)
+
+        self.assertEqual(self.cmds.listConnections("aiAOV_idB.defaultValue"),
+                         ["AOV_idB_MAT"])
+        self.assertIsNone(
+            self.cmds.listConnections("aiAOV_idA.defaultValue"))
+
+    def test_query_count(self):
+        """
+        The overrides are added in one batch and the viewport refreshed once
+        """
+        self.utils.create_id_aovs(["idB", "idC", "idD"], "layer1")
+
+        self.assertEqual(self.cmds.calls["editRenderLayerAdjustment"], 1)
+        self.assertEqual(self.cmds.calls["addAttr"], 1)
+        self.assertEqual(self.cmds.calls["refresh"], 3)
+
+    def test_expand_aov_names(self):
+        """
+        Names are split on commas and spaces and ranges are expanded
+        """
+        self.assertEqual(self.utils.expand_aov_names("id_a, id_b id_c[1-3]"),
+                         ["id_a", "id_b", "id_c1", "id_c2", "id_c3"])
+
+        self.assertRaises(ValueError, self.utils.expand_aov_names, "id-a")
+
+
+if __name__ == '__main__':
+    unittest.main()